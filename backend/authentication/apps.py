@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class AuthenticationConfig(AppConfig):
     name = 'authentication'
+
+    def ready(self):
+        from . import user_cache  # noqa: F401 - connects the signals invalidating cached user rows
@@ -0,0 +1,148 @@
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import TokenError
+from django.conf import settings
+from config.async_views import AsyncAPIView
+from config.responses import api_response
+from config.response_codes import EC, SC
+from config.error_helpers import api_err_dict
+from .permissions import IsAuthenticatedEC
+from .serializers import (
+    AsyncCookieTokenRefreshSerializer,
+    AsyncLoginSerializer,
+    AsyncRegisterSerializer,
+)
+from .tokens import RefreshToken
+
+# Async versions of the hot auth endpoints (see views.py), used when settings.ASYNC_VIEWS is on (ASGI).
+# Same responses and error codes, DB/cache/hashing work is awaited instead of holding a worker thread.
+
+cookie = settings.AUTH_COOKIE
+
+
+def set_refresh_cookie(response, refresh_token):
+    response.set_cookie(
+        key=cookie["NAME"],
+        value=refresh_token,
+        httponly=cookie["HTTP_ONLY"],
+        secure=cookie["SECURE"],
+        samesite=cookie["SAMESITE"],
+        domain=cookie["DOMAIN"],
+        path=cookie["PATH"],
+    )
+
+
+class AsyncCookieTokenRefreshView(AsyncAPIView):
+    permission_classes = [AllowAny]
+
+    async def post(self, request, *args, **kwargs):
+        refresh_token = request.COOKIES.get(cookie["NAME"])
+
+        if not refresh_token:
+            raise AuthenticationFailed(
+                {
+                    "_global": [
+                        api_err_dict(EC.AuthFailed.REFRESH_TOKEN_MISSING),
+                    ]
+                }
+            )
+
+        serializer = AsyncCookieTokenRefreshSerializer(data={"refresh": refresh_token})
+        serializer.is_valid(raise_exception=True)
+
+        data = await serializer.arefresh()
+        data["access_token"] = data.pop("access")
+        new_refresh_token = data.pop("refresh", None)
+
+        response = api_response(
+            success=True,
+            code=SC.Auth.TOKEN_REFRESHED,
+            payload=data,
+        )
+
+        if new_refresh_token:
+            set_refresh_cookie(response, new_refresh_token)
+
+        return response
+
+
+class AsyncLoginView(AsyncAPIView):
+    permission_classes = [AllowAny]
+    throttle_scope = "login"
+    throttle_identifier_field = "identifier"
+
+    async def post(self, request):
+        serializer = AsyncLoginSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        data = await serializer.alogin()
+        refresh_token = data.pop(cookie["NAME"])
+
+        response = api_response(
+            success=True,
+            code=SC.Auth.LOGIN_SUCCESS,
+            payload=data,
+        )
+        set_refresh_cookie(response, refresh_token)
+
+        return response
+
+
+class AsyncRegisterView(AsyncAPIView):
+    permission_classes = [AllowAny]
+    throttle_scope = "register"
+    throttle_identifier_field = "username"
+
+    async def post(self, request):
+        serializer = AsyncRegisterSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        data = await serializer.aregister()
+        refresh_token = data.pop(cookie["NAME"])
+
+        response = api_response(
+            success=True,
+            code=SC.Auth.REGISTER_SUCCESS,
+            payload=data,
+            http_status=status.HTTP_201_CREATED,
+        )
+        set_refresh_cookie(response, refresh_token)
+
+        return response
+
+
+class AsyncLogoutView(AsyncAPIView):
+    permission_classes = [AllowAny]
+
+    async def post(self, request):
+        refresh_token = request.COOKIES.get(cookie["NAME"])
+
+        if refresh_token:
+            try:
+                await RefreshToken(refresh_token, verify_blacklist=False).ablacklist()
+            except TokenError:
+                # token already expired/invalid → ignore
+                pass
+
+        response = api_response(
+            success=True,
+            code=SC.Auth.LOGOUT_SUCCESS,
+        )
+        response.delete_cookie(cookie["NAME"])
+
+        return response
+
+
+class AsyncMeView(AsyncAPIView):
+    permission_classes = [IsAuthenticatedEC]
+
+    async def get(self, request):
+        user = request.user
+        return api_response(
+            success=True,
+            code=SC.Auth.GENERIC,
+            payload={
+                "user": {"id": user.id, "username": user.username, "email": user.email}
+            },
+        )
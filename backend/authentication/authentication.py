@@ -0,0 +1,62 @@
+# authentication.py
+from asgiref.sync import sync_to_async
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from .user_cache import aget_cached_user, get_cached_user
+
+# https://github.com/jazzband/djangorestframework-simplejwt/blob/master/rest_framework_simplejwt/authentication.py
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    simplejwt's JWTAuthentication, but the user is built from the verified token claims and the per-process user row cache.
+    Repeated requests of the same user do not touch the DB until the cache entry expires or its version gets bumped.
+    Raises the same errors as the original get_user().
+    aauthenticate() is the async version used by AsyncAPIView.
+    """
+    def get_user(self, validated_token):
+        # Revoke check compares password hash - not cached, use the original DB lookup
+        if api_settings.CHECK_REVOKE_TOKEN or api_settings.USER_ID_FIELD != "id":
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        return self.check_user(get_cached_user(user_id))
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        # Access tokens are verified without any I/O
+        validated_token = self.get_validated_token(raw_token)
+
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN or api_settings.USER_ID_FIELD != "id":
+            return await sync_to_async(super().get_user)(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        return self.check_user(await aget_cached_user(user_id))
+
+    def check_user(self, user):
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        return user
@@ -0,0 +1,209 @@
+import hashlib
+import math
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from config.cache_helpers import abump_counter, acache_get, bump_counter, cache_is_local
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+blacklist_index_settings = settings.BLACKLIST_INDEX
+
+GENERATION_KEY = "auth:blacklist_generation"
+
+# Rows blacklisted up to SYNC_OVERLAP before the last sync are read again on the next one: rows become visible when
+# their transaction commits, not in id or blacklisted_at order, and blacklisted_at comes from the clock of the
+# writing server
+SYNC_OVERLAP = timedelta(seconds=blacklist_index_settings["SYNC_OVERLAP"])
+
+
+class BloomFilter:
+    """
+    Fixed size Bloom filter over strings. No false negatives, false positives at ~error_rate once `capacity` items are added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))) # bits
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        # Double hashing (Kirsch-Mitzenmacher): one 128-bit digest gives all k positions
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str):
+        """Items already (probably) present are not counted again"""
+        new = False
+        for pos in self._positions(item):
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not self.bits[byte] & mask:
+                self.bits[byte] |= mask
+                new = True
+        if new:
+            self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class BlacklistIndex:
+    """
+    Per-process membership index over blacklisted refresh token jtis.
+
+    - Warmed in a background thread on first lookup from not expired BlacklistedToken rows, lookups fall back to SQL until then.
+    - Kept up to date incrementally: every blacklist write bumps a generation counter in the Django cache,
+      readers that see a new generation pull only rows blacklisted since their last sync (minus SYNC_OVERLAP).
+    - "Not in index" is answered without SQL, "maybe in index" is confirmed in the DB.
+
+    Only used with a shared cache (settings.CACHE_URL): a local one doesn't carry the generation bumps of the other
+    workers, every lookup is answered by the DB then.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, enabled=True):
+        self.enabled = enabled # False - every lookup goes to the DB
+        self.initial_capacity = capacity
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self._filter: BloomFilter | None = None
+        self._synced_at = None # start of the last sync - rows blacklisted since (minus SYNC_OVERLAP) are pulled next
+        self._generation = None
+        self._warming = False
+
+    @staticmethod
+    def _load(bloom: BloomFilter, queryset):
+        """Adds jtis of the queryset to the filter"""
+        for jti in queryset.values_list("token__jti", flat=True).iterator(chunk_size=10_000):
+            bloom.add(jti)
+
+    def warm(self):
+        """(Re)builds the filter from not expired blacklisted tokens - expired ones are rejected by the exp check anyway"""
+        generation = cache.get(GENERATION_KEY, 0)
+        synced_at = aware_utcnow()
+        live = BlacklistedToken.objects.filter(token__expires_at__gt=synced_at)
+        bloom = BloomFilter(max(self.initial_capacity, live.count() * 2), self.error_rate)
+        self._load(bloom, live)
+
+        # Swap only when fully built, concurrent lookups keep using the old filter (or warm their own)
+        with self._lock:
+            self._filter = bloom
+            self._synced_at = synced_at
+            self._generation = generation
+
+    def _warm_in_background(self):
+        try:
+            self.warm()
+        finally:
+            self._warming = False
+            connections.close_all() # thread's own connections only
+
+    def start_warm(self):
+        """Starts building the filter in a background thread (once)"""
+        with self._lock:
+            if self._warming:
+                return
+            self._warming = True
+        threading.Thread(target=self._warm_in_background, name="blacklist-index-warm", daemon=True).start()
+
+    def sync(self) -> bool:
+        """
+        Pulls blacklist rows written (by any process) since the last sync, if there are any.
+        Returns False if the filter is not built yet.
+        """
+        if self._filter is None:
+            self.start_warm()
+            return False
+
+        generation = cache.get(GENERATION_KEY, 0)
+        if generation == self._generation:
+            return True
+
+        with self._lock:
+            self._generation = generation
+            synced_at = aware_utcnow()
+            since = self._synced_at - SYNC_OVERLAP
+            self._load(self._filter, BlacklistedToken.objects.filter(blacklisted_at__gte=since))
+            self._synced_at = synced_at
+
+        self._check_capacity()
+        return True
+
+    async def async_sync(self) -> bool:
+        """See sync()"""
+        if self._filter is None:
+            self.start_warm()
+            return False
+
+        generation = await acache_get(GENERATION_KEY, 0)
+        if generation == self._generation:
+            return True
+
+        # No lock held across awaits - concurrent coroutines may load the same rows, adding twice is harmless
+        self._generation = generation
+        since, synced_at = self._synced_at - SYNC_OVERLAP, aware_utcnow()
+        rows = BlacklistedToken.objects.filter(blacklisted_at__gte=since).values_list("token__jti", flat=True)
+        async for jti in rows:
+            self._filter.add(jti)
+        self._synced_at = max(self._synced_at, synced_at)
+
+        self._check_capacity()
+        return True
+
+    def _check_capacity(self):
+        # Over capacity the false positive rate climbs - rebuild bigger, current filter stays usable meanwhile
+        if self._filter.count > self._filter.capacity:
+            self.start_warm()
+
+    def _record(self, jti: str, generation: int):
+        if self._filter is None:
+            return
+
+        with self._lock:
+            self._filter.add(jti)
+            # Only our own write since the last sync - nothing new to pull. _synced_at moves on the next real sync.
+            if self._generation is not None and generation == self._generation + 1:
+                self._generation = generation
+
+    def add(self, jti: str):
+        """
+        Registers blacklist write done by this process and notifies the other ones - once it's committed,
+        a process syncing on the bump has to see the row
+        """
+        transaction.on_commit(lambda: self._record(jti, bump_counter(GENERATION_KEY)))
+
+    async def aadd(self, jti: str):
+        """See add()"""
+        self._record(jti, await abump_counter(GENERATION_KEY))
+
+    def is_blacklisted(self, jti: str) -> bool:
+        if self.enabled and self.sync() and jti not in self._filter:
+            return False
+
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+    async def ais_blacklisted(self, jti: str) -> bool:
+        """See is_blacklisted()"""
+        if self.enabled and await self.async_sync() and jti not in self._filter:
+            return False
+
+        return await BlacklistedToken.objects.filter(token__jti=jti).aexists()
+
+    def reset(self):
+        with self._lock:
+            self._filter = None
+            self._synced_at = None
+            self._generation = None
+
+
+blacklist_index = BlacklistIndex(
+    capacity=blacklist_index_settings["CAPACITY"],
+    error_rate=blacklist_index_settings["ERROR_RATE"],
+    enabled=not cache_is_local(),
+)
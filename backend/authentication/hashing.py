@@ -0,0 +1,199 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from rest_framework.exceptions import Throttled
+from config.metrics import record_hashing
+
+# Password hashing executor.
+# PBKDF2 runs in a bounded process pool instead of the request thread, so a login surge can't starve cheap endpoints.
+# At most QUEUE_DEPTH jobs are in flight per process, above that requests are rejected with RATE_LIMITED.
+# A worker process dying (OOM kill...) breaks the whole pool - it's replaced by a new one and the job retried once.
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+
+# ---------- WORKER SIDE (runs in the pool processes) ----------
+
+def _init_worker():
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    django.setup()
+
+
+def _noop():
+    return None
+
+
+def _verify(raw_password, encoded) -> tuple[bool, bool]:
+    from django.contrib.auth.hashers import verify_password
+
+    return verify_password(raw_password, encoded)
+
+
+def _hash(raw_password) -> str:
+    from django.contrib.auth.hashers import make_password
+
+    return make_password(raw_password)
+
+
+# ---------- REQUEST SIDE ----------
+
+def get_executor() -> ProcessPoolExecutor | None:
+    """Pool shared by all threads of the process, None when WORKERS is 0 (hash inline)"""
+    global _executor
+
+    workers = settings.PASSWORD_HASHING["WORKERS"]
+    if not workers:
+        return None
+
+    with _executor_lock:
+        if _executor is None:
+            # spawn - forking a process with running threads (server, scheduler) is not safe
+            _executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        return _executor
+
+
+def start_hashing_pool():
+    """Starts the pool processes ahead of the first login - call once per server process (config.wsgi / config.asgi)"""
+    executor = get_executor()
+    if executor is None:
+        return
+
+    for _ in range(settings.PASSWORD_HASHING["WORKERS"]):
+        executor.submit(_noop)
+
+
+def _discard_executor(executor):
+    """Drops a broken pool, the next job starts a new one"""
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _release(_future=None):
+    global _in_flight
+    with _in_flight_lock:
+        _in_flight -= 1
+
+
+def submit(fn, *args) -> Future:
+    """
+    Submits a hashing job, raises Throttled if QUEUE_DEPTH jobs are already in flight.
+    Without a pool the job runs inline, still counted towards QUEUE_DEPTH.
+    """
+    global _in_flight
+    with _in_flight_lock:
+        if _in_flight >= settings.PASSWORD_HASHING["QUEUE_DEPTH"]:
+            raise Throttled()
+        _in_flight += 1
+
+    executor = get_executor()
+    if executor is None:
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as exc:
+            future.set_exception(exc)
+        finally:
+            _release()
+        return future
+
+    try:
+        try:
+            future = executor.submit(fn, *args)
+        except BrokenProcessPool: # broken by an earlier job
+            _discard_executor(executor)
+            future = get_executor().submit(fn, *args)
+    except Exception:
+        _release()
+        raise
+    future.add_done_callback(_release)
+    return future
+
+
+def run(fn, *args):
+    """submit(fn, *args).result(), retried once in a new pool if a worker process died running it"""
+    try:
+        return submit(fn, *args).result()
+    except BrokenProcessPool:
+        return submit(fn, *args).result() # submit() replaces the broken pool
+
+
+async def arun(fn, *args):
+    """See run(), awaits the pool instead of blocking the thread"""
+    try:
+        return await asyncio.wrap_future(submit(fn, *args))
+    except BrokenProcessPool:
+        return await asyncio.wrap_future(submit(fn, *args))
+
+
+def verify_password(user, raw_password) -> bool:
+    """
+    Replacement of user.check_password() hashing in the pool.
+    Same as Django, upgrades the stored hash if the hasher settings changed.
+    """
+    start = time.perf_counter()
+    is_correct, must_update = run(_verify, raw_password, user.password)
+    record_hashing(time.perf_counter() - start)
+
+    if is_correct and must_update:
+        user.password = hash_password(raw_password) # a rehash is no password change - no password_changed()
+        user.save(update_fields=["password"])
+
+    return is_correct
+
+
+def hash_password(raw_password) -> str:
+    """make_password() in the pool"""
+    start = time.perf_counter()
+    try:
+        return run(_hash, raw_password)
+    finally:
+        record_hashing(time.perf_counter() - start)
+
+
+def set_password(user, raw_password):
+    """
+    Replacement of user.set_password() hashing in the pool. Doesn't save the user -
+    save() runs the password_changed() of the validators, like after user.set_password().
+    """
+    user.password = hash_password(raw_password)
+    user._password = raw_password
+
+
+async def averify_password(user, raw_password) -> bool:
+    """See verify_password(), awaits the pool instead of blocking the thread. `user.password` has to be loaded."""
+    start = time.perf_counter()
+    is_correct, must_update = await arun(_verify, raw_password, user.password)
+    record_hashing(time.perf_counter() - start)
+
+    if is_correct and must_update:
+        user.password = await ahash_password(raw_password)
+        await user.asave(update_fields=["password"])
+
+    return is_correct
+
+
+async def ahash_password(raw_password) -> str:
+    """See hash_password()"""
+    start = time.perf_counter()
+    try:
+        return await arun(_hash, raw_password)
+    finally:
+        record_hashing(time.perf_counter() - start)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from authentication.token_storage import is_partitioned, run_token_maintenance
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates upcoming expiry buckets of the outstanding/blacklisted token tables and drops the expired ones. "
+        "Partitions are dropped whole on PostgreSQL, elsewhere expired buckets are deleted in small batches."
+    )
+
+    def handle(self, *args, **options):
+        result = run_token_maintenance()
+
+        if is_partitioned():
+            self.stdout.write(f"Created partitions: {', '.join(result['created']) or '-'}")
+            self.stdout.write(f"Dropped partitions: {', '.join(result['dropped']) or '-'}")
+        else:
+            self.stdout.write(f"Deleted expired tokens: {result['deleted']}")
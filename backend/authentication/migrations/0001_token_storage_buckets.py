@@ -0,0 +1,114 @@
+from django.conf import settings
+from django.db import migrations, models
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import aware_utcnow
+
+EXPIRES_AT_INDEX = models.Index(fields=["expires_at"], name="outstanding_expires_at_idx")
+
+# simplejwt's token tables re-created as range partitioned ones, live rows are copied over.
+# Partitioned tables need the partition key in every unique constraint: PK becomes (id, key), jti is unique per bucket.
+# One blacklist row per token is kept by the insert path (authentication.token_storage.blacklist_token()).
+# The FK blacklisted -> outstanding can't point to a partitioned table without the key, cascades are done by Django anyway.
+PARTITION_SQL = """
+ALTER TABLE "{outstanding}" RENAME TO "{outstanding}_old";
+ALTER TABLE "{blacklisted}" RENAME TO "{blacklisted}_old";
+
+CREATE SEQUENCE "{outstanding}_pid_seq" AS bigint;
+CREATE TABLE "{outstanding}" (
+    "id" bigint NOT NULL DEFAULT nextval('"{outstanding}_pid_seq"'),
+    "user_id" bigint NULL REFERENCES "{users}" ("id") DEFERRABLE INITIALLY DEFERRED,
+    "jti" varchar(255) NOT NULL,
+    "token" text NOT NULL,
+    "created_at" timestamp with time zone NULL,
+    "expires_at" timestamp with time zone NOT NULL,
+    PRIMARY KEY ("id", "expires_at"),
+    UNIQUE ("jti", "expires_at")
+) PARTITION BY RANGE ("expires_at");
+ALTER SEQUENCE "{outstanding}_pid_seq" OWNED BY "{outstanding}"."id";
+CREATE INDEX "{outstanding}_user_id_pidx" ON "{outstanding}" ("user_id");
+CREATE TABLE "{outstanding}_pdefault" PARTITION OF "{outstanding}" DEFAULT;
+
+CREATE SEQUENCE "{blacklisted}_pid_seq" AS bigint;
+CREATE TABLE "{blacklisted}" (
+    "id" bigint NOT NULL DEFAULT nextval('"{blacklisted}_pid_seq"'),
+    "token_id" bigint NOT NULL,
+    "blacklisted_at" timestamp with time zone NOT NULL,
+    PRIMARY KEY ("id", "blacklisted_at"),
+    UNIQUE ("token_id", "blacklisted_at")
+) PARTITION BY RANGE ("blacklisted_at");
+ALTER SEQUENCE "{blacklisted}_pid_seq" OWNED BY "{blacklisted}"."id";
+CREATE TABLE "{blacklisted}_pdefault" PARTITION OF "{blacklisted}" DEFAULT;
+"""
+
+PARTITION_SQL_BUCKET = """
+CREATE TABLE "{name}" PARTITION OF "{table}" FOR VALUES FROM (%s) TO (%s);
+"""
+
+COPY_SQL = """
+INSERT INTO "{outstanding}" ("id", "user_id", "jti", "token", "created_at", "expires_at")
+SELECT "id", "user_id", "jti", "token", "created_at", "expires_at" FROM "{outstanding}_old" WHERE "expires_at" > now();
+
+INSERT INTO "{blacklisted}" ("id", "token_id", "blacklisted_at")
+SELECT b."id", b."token_id", b."blacklisted_at" FROM "{blacklisted}_old" b
+JOIN "{outstanding}_old" o ON o."id" = b."token_id" WHERE o."expires_at" > now();
+
+SELECT setval('"{outstanding}_pid_seq"', COALESCE((SELECT MAX("id") FROM "{outstanding}_old"), 0) + 1, false);
+SELECT setval('"{blacklisted}_pid_seq"', COALESCE((SELECT MAX("id") FROM "{blacklisted}_old"), 0) + 1, false);
+
+DROP TABLE "{blacklisted}_old";
+DROP TABLE "{outstanding}_old";
+"""
+
+
+def bucket_token_tables(apps, schema_editor):
+    from authentication.token_storage import bucket_start, partition_name
+
+    OutstandingToken = apps.get_model("token_blacklist", "OutstandingToken")
+    BlacklistedToken = apps.get_model("token_blacklist", "BlacklistedToken")
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+
+    if schema_editor.connection.vendor != "postgresql":
+        schema_editor.add_index(OutstandingToken, EXPIRES_AT_INDEX)
+        return
+
+    tables = {
+        "outstanding": OutstandingToken._meta.db_table,
+        "blacklisted": BlacklistedToken._meta.db_table,
+        "users": User._meta.db_table,
+    }
+    schema_editor.execute(PARTITION_SQL.format(**tables))
+
+    # Buckets for every live row (blacklisted_at goes back one token lifetime) and the ones coming up,
+    # later ones are created by the token maintenance
+    size = settings.TOKEN_STORAGE["BUCKET_SIZE"]
+    now = aware_utcnow()
+    start = bucket_start(now - api_settings.REFRESH_TOKEN_LIFETIME)
+    end = bucket_start(now) + size * (settings.TOKEN_STORAGE["PRECREATE_BUCKETS"] + 1)
+    while start < end:
+        for table in (tables["outstanding"], tables["blacklisted"]):
+            schema_editor.execute(
+                PARTITION_SQL_BUCKET.format(name=partition_name(table, start), table=table),
+                [start, start + size],
+            )
+        start += size
+
+    schema_editor.execute(COPY_SQL.format(**tables))
+
+
+def unbucket_token_tables(apps, schema_editor):
+    # Partitioned tables keep working with simplejwt's models, only the SQLite index is removed
+    if schema_editor.connection.vendor != "postgresql":
+        OutstandingToken = apps.get_model("token_blacklist", "OutstandingToken")
+        schema_editor.remove_index(OutstandingToken, EXPIRES_AT_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("token_blacklist", "0013_alter_blacklistedtoken_options_and_more"),
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(bucket_token_tables, unbucket_token_tables),
+    ]
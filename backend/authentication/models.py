@@ -0,0 +1,18 @@
+from django.db import models
+
+
+class ThrottleCounter(models.Model):
+    """Request count of one throttle key in one fixed window, used by authentication.throttling.DatabaseStore"""
+
+    key = models.CharField(max_length=64)
+    window = models.BigIntegerField() # window start // window duration
+    count = models.PositiveIntegerField(default=0)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["key", "window"], name="throttle_counter_key_window_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.key} @ {self.window}: {self.count}"
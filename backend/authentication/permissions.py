@@ -1,6 +1,6 @@
 # permissions.py
 from rest_framework.permissions import BasePermission
-from rest_framework.exceptions import NotAuthenticated
+from rest_framework.exceptions import NotAuthenticated, NotFound, PermissionDenied
 from config.response_codes import EC
 from config.error_helpers import api_err_dict
 
@@ -15,3 +15,33 @@ class IsAuthenticatedEC(BasePermission):
         if not request.user or not request.user.is_authenticated:
             raise NotAuthenticated({"_global": [api_err_dict(EC.NotAuth.USER_NOT_LOGGED_IN),]})
         return True
+
+
+class IsAdminEC(BasePermission):
+    """
+    Staff users only (DRF's IsAdminUser), with custom Error Codes:
+    USER_NOT_LOGGED_IN for anonymous users, Forbidden for the authenticated ones.
+    """
+    def has_permission(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            raise NotAuthenticated({"_global": [api_err_dict(EC.NotAuth.USER_NOT_LOGGED_IN),]})
+        if not request.user.is_staff:
+            raise PermissionDenied({"_global": [api_err_dict(EC.Forbidden.GENERIC),]})
+        return True
+
+
+class HasObjectAccessEC(BasePermission):
+    """
+    Object-level access (e.g. owner / shared-with user / public - recipes.access), checked by the view with
+    check_object_permissions(request, object id). The view resolves it - view.object_access(request, ids) ->
+    {id: level}, one query for a whole page, cached on the request - and sets the `required_access` level.
+    Levels are ints, 0 = can't see the object: NOT_FOUND, its existence isn't revealed.
+    A visible object with a lower level than required is Forbidden.
+    """
+    def has_object_permission(self, request, view, obj):
+        access = view.object_access(request, [obj])[obj]
+        if not access:
+            raise NotFound()
+        if access < view.required_access:
+            raise PermissionDenied({"_global": [api_err_dict(EC.Forbidden.GENERIC),]})
+        return True
@@ -0,0 +1,93 @@
+import asyncio
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from config.cache_helpers import acache_add, acache_delete, acache_get, acache_set
+
+# Single-flight refresh per refresh token.
+# Tabs of one browser share the refresh cookie and refresh at the same moment - without coalescing the first one
+# rotates the token and the rest fail on the blacklist (logging the user out).
+# The first refresh of a jti rotates it and keeps the new pair in the cache for WINDOW seconds,
+# concurrent/late refreshes of the same jti wait for it and get the same pair instead of rotating again.
+# The pair is only readable by the holder of the old token, and only within the window.
+#
+# The lock and the result live in the default cache - coalescing spans worker processes only with a shared cache
+# (CACHE_URL). With the local memory cache it works within one process: concurrent refreshes of a token that land on
+# different workers each rotate it, and all but the first fail on the blacklist with 401.
+
+grace_settings = settings.REFRESH_GRACE
+
+RESULT_KEY = "auth:refresh_result:{jti}"
+LOCK_KEY = "auth:refresh_lock:{jti}"
+
+
+def refresh_once(jti, rotate):
+    """Returns rotate()'s result, calling it once per jti within the grace window"""
+    window = grace_settings["WINDOW"]
+    if not window:
+        return rotate()
+
+    result_key, lock_key = RESULT_KEY.format(jti=jti), LOCK_KEY.format(jti=jti)
+
+    result = cache.get(result_key)
+    if result is not None:
+        return result
+
+    if not cache.add(lock_key, True, timeout=grace_settings["WAIT"]):
+        # Another request is rotating this token - wait for its result
+        deadline = time.monotonic() + grace_settings["WAIT"]
+        while time.monotonic() < deadline:
+            time.sleep(grace_settings["POLL_INTERVAL"])
+
+            result = cache.get(result_key)
+            if result is not None:
+                return result
+            if cache.add(lock_key, True, timeout=grace_settings["WAIT"]):
+                break # it failed, try it here (fails the same way if the token is bad)
+        else:
+            return rotate()
+
+    try:
+        result = cache.get(result_key) # might have been stored while taking the lock
+        if result is None:
+            result = rotate()
+            cache.set(result_key, result, timeout=window)
+        return result
+    finally:
+        cache.delete(lock_key)
+
+
+async def arefresh_once(jti, arotate):
+    """See refresh_once(), `arotate` is a coroutine function"""
+    window = grace_settings["WINDOW"]
+    if not window:
+        return await arotate()
+
+    result_key, lock_key = RESULT_KEY.format(jti=jti), LOCK_KEY.format(jti=jti)
+
+    result = await acache_get(result_key)
+    if result is not None:
+        return result
+
+    if not await acache_add(lock_key, True, timeout=grace_settings["WAIT"]):
+        deadline = time.monotonic() + grace_settings["WAIT"]
+        while time.monotonic() < deadline:
+            await asyncio.sleep(grace_settings["POLL_INTERVAL"])
+
+            result = await acache_get(result_key)
+            if result is not None:
+                return result
+            if await acache_add(lock_key, True, timeout=grace_settings["WAIT"]):
+                break
+        else:
+            return await arotate()
+
+    try:
+        result = await acache_get(result_key)
+        if result is None:
+            result = await arotate()
+            await acache_set(result_key, result, timeout=window)
+        return result
+    finally:
+        await acache_delete(lock_key)
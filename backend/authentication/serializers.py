@@ -4,23 +4,30 @@ from config.constants import (
     MIN_IDENTIFIER_LEN,
     MIN_PASSWORD_LEN,
 )
-from config.error_helpers import api_err_dict, remove_empty_list_fields
+from config.error_helpers import api_err_dict, remove_empty_list_fields, violated_constraint
 from config.response_codes import EC
 from config.validators import (
     validate_blank,
-    validate_email_register,
+    validate_email_format,
+    validate_email_unique,
     validate_length,
     validate_password_match,
     validate_required,
     validate_username_format,
     validate_username_unique,
 )
+from asgiref.sync import sync_to_async
 from django.contrib.auth import get_user_model
-from django.core.exceptions import ValidationError as DjangoValidationError
-from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Q, Value, When
+from django.db.models.functions import Lower
 from rest_framework import serializers
 from rest_framework.exceptions import AuthenticationFailed, ValidationError
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from .tokens import RefreshToken
+from .refresh_grace import arefresh_once, refresh_once
+from .hashing import ahash_password, averify_password, set_password, verify_password
 from django.contrib.auth.models import AbstractUser
 from typing import cast, Type
 from django.conf import settings
@@ -29,12 +36,118 @@ from django.utils import timezone
 User = cast(Type[AbstractUser], get_user_model())
 cookie = settings.AUTH_COOKIE
 
+# Unique constraint/index names of users.User -> (model field, error code).
+# The case-sensitive `username` column unique (AbstractUser) can fire before the lower() one - postgres/sqlite names.
+UNIQUE_VIOLATIONS = {
+    "user_username_ci_unique": ("username", EC.Validation.USERNAME_TAKEN),
+    "users_user_username_key": ("username", EC.Validation.USERNAME_TAKEN),
+    "users_user.username": ("username", EC.Validation.USERNAME_TAKEN),
+    "user_email_ci_unique": ("email", EC.Validation.EMAIL_TAKEN),
+}
+
+
+def save_user_unique(user, field_names: dict, **save_kwargs):
+    """
+    Saves the user relying on the unique constraints instead of pre-check queries.
+    A violation is raised as ValidationError under the serializer field mapped in `field_names` ({model field: serializer field}).
+    """
+    try:
+        with transaction.atomic():
+            user.save(**save_kwargs)
+    except IntegrityError as e:
+        model_field, code = UNIQUE_VIOLATIONS.get(violated_constraint(e), (None, None))
+        if model_field not in field_names:
+            raise
+        raise ValidationError({field_names[model_field]: [api_err_dict(code)]}) from e
+
+class CookieTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    simplejwt's TokenRefreshSerializer using RefreshToken with the blacklist index.
+    Concurrent refreshes of the same token get the same new pair (see refresh_grace.py).
+    """
+    token_class = RefreshToken
+
+    def validate(self, attrs):
+        # Signature and expiry only - within the grace window the token is already blacklisted by the first refresh
+        jti = self.token_class(attrs["refresh"], verify_blacklist=False)[api_settings.JTI_CLAIM]
+        return refresh_once(jti, lambda: super(CookieTokenRefreshSerializer, self).validate(attrs))
+
+
+class AsyncCookieTokenRefreshSerializer(CookieTokenRefreshSerializer):
+    """
+    CookieTokenRefreshSerializer for async views: is_valid() only checks the input,
+    the rotation is done by `await arefresh()` which returns what TokenRefreshSerializer puts in validated_data.
+    Raises TokenError like the token classes do.
+    """
+
+    def validate(self, attrs):
+        return attrs
+
+    async def arefresh(self):
+        refresh = self.token_class(self.validated_data["refresh"], verify_blacklist=False)
+        return await arefresh_once(refresh[api_settings.JTI_CLAIM], lambda: self.arotate(refresh))
+
+    async def arotate(self, refresh):
+        await refresh.acheck_blacklist()
+
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM, None)
+        if user_id and (
+            user := await get_user_model().objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        ):
+            if not api_settings.USER_AUTHENTICATION_RULE(user):
+                raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+
+        data = {"access": str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                await refresh.ablacklist()
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            await refresh.aoutstand()
+
+            data["refresh"] = str(refresh)
+
+        return data
+
+
+def auth_payload(user, refresh_token):
+    """validated_data of the login/register serializers"""
+    return {
+        cookie["NAME"]: str(refresh_token),
+        "access_token": str(refresh_token.access_token),
+        "user": {
+            "id": user.pk,
+            "username": user.username,
+            "email": user.email,
+        },
+    }
+
+
 class LoginSerializer(serializers.Serializer):
 
     identifier = serializers.CharField(required=False, allow_blank=True) # bypass DRF validator to return custom codes
     password = serializers.CharField(required=False, allow_blank=True, write_only=True)
 
     def validate(self, attrs):
+        self.validate_fields(attrs)
+
+        user = self.get_user(attrs["identifier"])
+
+        if not user or not verify_password(user, attrs["password"]):
+            raise AuthenticationFailed({"_global": [api_err_dict(EC.AuthFailed.INVALID_CREDENTIALS),]})
+
+        self.check_active(user)
+
+        user.last_login = timezone.now()
+        user.save(update_fields=["last_login"])
+
+        return auth_payload(user, RefreshToken.for_user(user))
+
+    def validate_fields(self, attrs):
+        """Field checks without DB access, raises ValidationError"""
 
         identifier = attrs.get("identifier")
         password = attrs.get("password")
@@ -77,34 +190,53 @@ class LoginSerializer(serializers.Serializer):
         if errors:
             raise ValidationError(errors)
 
-        try:
-            validate_email(identifier)
-            user = User.objects.get(email__iexact=identifier)
-        except (DjangoValidationError, User.DoesNotExist):
-            user = User.objects.filter(username__iexact=identifier).first()
-            if not user:
-                raise AuthenticationFailed({"_global": [api_err_dict(EC.AuthFailed.INVALID_CREDENTIALS),]})
-
-        if not user.check_password(password):
-            raise AuthenticationFailed({"_global": [api_err_dict(EC.AuthFailed.INVALID_CREDENTIALS),]})
+    def get_user(self, identifier):
+        return self.get_user_queryset(identifier).first()
+
+    def get_user_queryset(self, identifier):
+        """
+        Email or username match in one query, served by the lower(email)/lower(username) indexes.
+        Email match wins over username match (usernames may look like emails), then the oldest account.
+        """
+        identifier = Lower(Value(identifier))
+        email_match = Q(email_lower=identifier)
+
+        return (
+            User.objects.alias(email_lower=Lower("email"), username_lower=Lower("username"))
+            .filter(email_match | Q(username_lower=identifier))
+            .order_by(Case(When(email_match, then=Value(0)), default=Value(1)), "pk")
+        )
 
+    def check_active(self, user):
         if not user.is_active:
             raise AuthenticationFailed({"_global": [api_err_dict(EC.AuthFailed.ACCOUNT_DISABLED),]})
-        
-        user.last_login = timezone.now()
-        user.save(update_fields=["last_login"])
 
-        refresh_token = RefreshToken.for_user(user)
 
-        return {
-            cookie["NAME"]: str(refresh_token),
-            "access_token": str(refresh_token.access_token),
-            "user": {
-                "id": user.pk,
-                "username": user.username,
-                "email": user.email,
-            },
-        }
+class AsyncLoginSerializer(LoginSerializer):
+    """
+    LoginSerializer for async views: is_valid() runs only the field checks,
+    credentials are checked by `await alogin()` which returns what LoginSerializer puts in validated_data.
+    """
+
+    def validate(self, attrs):
+        self.validate_fields(attrs)
+        return attrs
+
+    async def aget_user(self, identifier):
+        return await self.get_user_queryset(identifier).afirst()
+
+    async def alogin(self):
+        user = await self.aget_user(self.validated_data["identifier"])
+
+        if not user or not await averify_password(user, self.validated_data["password"]):
+            raise AuthenticationFailed({"_global": [api_err_dict(EC.AuthFailed.INVALID_CREDENTIALS),]})
+
+        self.check_active(user)
+
+        user.last_login = timezone.now()
+        await user.asave(update_fields=["last_login"])
+
+        return auth_payload(user, await RefreshToken.afor_user(user))
 
 
 class RegisterSerializer(serializers.Serializer):
@@ -115,6 +247,16 @@ class RegisterSerializer(serializers.Serializer):
     password_confirm = serializers.CharField(required=False, allow_blank=True, allow_null=True, write_only=True)
 
     def validate(self, attrs):
+        self.raise_errors(self.validate_fields(attrs))
+
+        user = self.build_user(attrs)
+        set_password(user, attrs["password"])
+        self.insert_user(user)
+
+        return auth_payload(user, RefreshToken.for_user(user))
+
+    def validate_fields(self, attrs):
+        """Field checks without DB access, returns errors dict"""
 
         username = attrs.get("username")
         email = attrs.get("email")
@@ -147,39 +289,60 @@ class RegisterSerializer(serializers.Serializer):
         if password and password_confirm:
             errors.setdefault("password_confirm", []).extend(validate_password_match(password, password_confirm))
 
-        # ---------- USERNAME UNIQUE ----------
-        errors.setdefault("username", []).extend(validate_username_unique(username))
-
         # ---------- USERNAME FORMAT ----------
         errors.setdefault("username", []).extend(validate_username_format(username))
 
-        # ---------- EMAIL (optional) ----------
-        errors["email"] = validate_email_register(email)
-        
+        # ---------- EMAIL FORMAT (optional) ----------
+        errors["email"] = validate_email_format(email)
+
+        return errors
+
+    def raise_errors(self, errors):
         errors = remove_empty_list_fields(errors)
 
         if errors:
             raise ValidationError(errors)
 
-        # ---------- CREATE ----------
-        user = User.objects.create_user(
-            username=username,
-            email=email if email else None,
-            password=password,
+    def build_user(self, attrs):
+        """Same as create_user() without the hashing (done in the hashing pool) and saving"""
+        email = attrs.get("email")
+        return User(
+            username=User.normalize_username(attrs["username"]),
+            email=User.objects.normalize_email(email) if email else None,
         )
 
-        refresh_token = RefreshToken.for_user(user)
-
-        return {
-            cookie["NAME"]: str(refresh_token),
-            "access_token": str(refresh_token.access_token),
-            "user": {
-                "id": user.pk,
-                "username": user.username,
-                "email": user.email,
-            }
-        }
-    
+    def insert_user(self, user):
+        """
+        One INSERT, taken username/email come back from the unique constraints.
+        A single INSERT reports one violation, the other field is checked only then - both errors are returned as before.
+        """
+        try:
+            save_user_unique(user, {"username": "username", "email": "email"})
+        except ValidationError as e:
+            self.raise_errors({
+                "username": e.detail.get("username") or validate_username_unique(user.username),
+                "email": e.detail.get("email") or validate_email_unique(user.email),
+            })
+
+
+class AsyncRegisterSerializer(RegisterSerializer):
+    """
+    RegisterSerializer for async views: is_valid() runs only the field checks,
+    the user is created by `await aregister()` which returns what RegisterSerializer puts in validated_data.
+    """
+
+    def validate(self, attrs):
+        self.raise_errors(self.validate_fields(attrs))
+        return attrs
+
+    async def aregister(self):
+        user = self.build_user(self.validated_data)
+        user.password = await ahash_password(self.validated_data["password"])
+        user._password = self.validated_data["password"] # password_changed() of the validators, see set_password()
+        await sync_to_async(self.insert_user)(user)
+
+        return auth_payload(user, await RefreshToken.afor_user(user))
+
 
 class DeleteAccountSerializer(serializers.Serializer):
 
@@ -216,7 +379,7 @@ class DeleteAccountSerializer(serializers.Serializer):
             raise ValidationError(errors)
 
         # ---------- PASSWORD CHECK ----------
-        if not user.check_password(password):
+        if not verify_password(user, password):
             raise AuthenticationFailed({
                 "password": [
                     api_err_dict(EC.AuthFailed.INVALID_PASSWORD)
@@ -278,7 +441,7 @@ class ChangePasswordSerializer(serializers.Serializer):
             raise ValidationError(errors)
 
         # ---------- PASSWORD CHECK ----------
-        if not user.check_password(current_password):
+        if not verify_password(user, current_password):
             raise AuthenticationFailed({
                 "current_password": [
                     api_err_dict(EC.AuthFailed.INVALID_PASSWORD)
@@ -330,9 +493,6 @@ class ChangeUsernameSerializer(serializers.Serializer):
                 max_code=EC.Validation.PASSWORD_TOO_LONG)
             errors.setdefault("password", []).extend(field_errors)
 
-        # ---------- USERNAME UNIQUE ----------
-        errors.setdefault("username_new", []).extend(validate_username_unique(username_new))
-
         # ---------- USERNAME FORMAT ----------
         errors.setdefault("username_new", []).extend(validate_username_format(username_new))
 
@@ -342,7 +502,7 @@ class ChangeUsernameSerializer(serializers.Serializer):
             raise ValidationError(errors)
         
         # ---------- PASSWORD CHECK ----------
-        if not user.check_password(password):
+        if not verify_password(user, password):
             raise AuthenticationFailed({
                 "password": [
                     api_err_dict(EC.AuthFailed.INVALID_PASSWORD)
@@ -356,7 +516,7 @@ class ChangeUsernameSerializer(serializers.Serializer):
         username_new = self.validated_data["username_new"]
 
         user.username = username_new
-        user.save(update_fields=["username"])
+        save_user_unique(user, {"username": "username_new"}, update_fields=["username"])
 
         return user
 
@@ -394,8 +554,8 @@ class ChangeEmailSerializer(serializers.Serializer):
                 max_code=EC.Validation.PASSWORD_TOO_LONG)
             errors.setdefault("password", []).extend(field_errors)
 
-        # ---------- EMAIL (not empty by now, can use validate_email_register) ----------
-        errors["email"] = validate_email_register(email)
+        # ---------- EMAIL FORMAT (uniqueness is left to the constraint) ----------
+        errors["email"] = validate_email_format(email)
         
         errors = remove_empty_list_fields(errors)
 
@@ -403,7 +563,7 @@ class ChangeEmailSerializer(serializers.Serializer):
             raise ValidationError(errors)
         
         # ---------- PASSWORD CHECK ----------
-        if not user.check_password(password):
+        if not verify_password(user, password):
             raise AuthenticationFailed({
                 "password": [
                     api_err_dict(EC.AuthFailed.INVALID_PASSWORD)
@@ -416,6 +576,6 @@ class ChangeEmailSerializer(serializers.Serializer):
         user = self.context["request"].user
         email_new = self.validated_data["email"]
         user.email = email_new
-        user.save(update_fields=["email"])
+        save_user_unique(user, {"email": "email"}, update_fields=["email"])
 
         return user
\ No newline at end of file
@@ -0,0 +1,261 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from itertools import count
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.throttling import BaseThrottle
+from config.cache_helpers import bump_counter, cache_is_local
+from .models import ThrottleCounter
+
+# https://github.com/encode/django-rest-framework/blob/main/rest_framework/throttling.py
+#
+# Throttles of the endpoints that hash passwords (login, register, me/* confirming the password).
+# DRF checks throttles in APIView.initial(), before the serializer runs - a rejected request never reaches the hashing pool.
+#
+# Sliding window counter instead of DRF's per-request history: a key keeps only the counts of the current and previous
+# fixed window, the previous one weighted by the part still covered by the sliding window:
+#     estimate = previous * (1 - elapsed / duration) + current
+# Two counters per key, O(1) per check whatever the rate. Check and increment are not atomic,
+# concurrent requests of one key can overshoot the limit by the number of requests in flight.
+
+throttle_settings = settings.THROTTLING
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate) -> tuple[int, int]:
+    """'5/min' -> (5, 60), same format as DRF's rates"""
+    num, period = rate.split("/")
+    return int(num), PERIODS[period[0]]
+
+
+def hash_key(*parts) -> str:
+    """Fixed length key safe for any store (identifiers are user input)"""
+    return hashlib.blake2b(":".join(parts).encode(), digest_size=16).hexdigest()
+
+
+# ---------- STORES ----------
+
+class LocalStore:
+    """Counters in this process' memory, bounded LRU. No I/O, but every worker process counts on its own."""
+    is_local = True
+
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self._data: OrderedDict[str, tuple[int, int, int]] = OrderedDict() # key -> (window, current, previous)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _shift(entry, window) -> tuple[int, int]:
+        if entry is None:
+            return 0, 0
+
+        stored_window, current, previous = entry
+        if stored_window == window:
+            return previous, current
+        if stored_window == window - 1:
+            return current, 0
+        return 0, 0
+
+    def counts(self, key, window) -> tuple[int, int]:
+        """(previous, current) window counts"""
+        with self._lock:
+            return self._shift(self._data.get(key), window)
+
+    def incr(self, key, window, duration):
+        with self._lock:
+            previous, current = self._shift(self._data.get(key), window)
+            self._data[key] = (window, current + 1, previous)
+            self._data.move_to_end(key)
+
+            if len(self._data) > self.max_keys:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class CacheStore:
+    """Counters in the default cache - shared by all processes with a shared backend (Redis, Memcached)"""
+
+    @property
+    def is_local(self):
+        return cache_is_local()
+
+    @staticmethod
+    def _cache_key(key, window):
+        return f"throttle:{key}:{window}"
+
+    def counts(self, key, window) -> tuple[int, int]:
+        previous_key, current_key = self._cache_key(key, window - 1), self._cache_key(key, window)
+        values = cache.get_many([previous_key, current_key])
+        return values.get(previous_key, 0), values.get(current_key, 0)
+
+    def incr(self, key, window, duration):
+        # The window's counter is read until the end of the next one
+        bump_counter(self._cache_key(key, window), timeout=2 * duration)
+
+
+class DatabaseStore:
+    """
+    Counters in the ThrottleCounter table - shared by all processes without a shared cache.
+    Expired rows are deleted every CLEANUP_EVERY increments of a process.
+    """
+    is_local = False
+    CLEANUP_EVERY = 1000
+
+    def __init__(self):
+        self._increments = count(1)
+
+    def counts(self, key, window) -> tuple[int, int]:
+        rows = dict(
+            ThrottleCounter.objects.filter(key=key, window__in=(window - 1, window)).values_list("window", "count")
+        )
+        return rows.get(window - 1, 0), rows.get(window, 0)
+
+    def incr(self, key, window, duration):
+        counter = ThrottleCounter.objects.filter(key=key, window=window)
+
+        if not counter.update(count=F("count") + 1):
+            try:
+                with transaction.atomic():
+                    ThrottleCounter.objects.create(
+                        key=key,
+                        window=window,
+                        count=1,
+                        expires_at=timezone.now() + timedelta(seconds=2 * duration),
+                    )
+            except IntegrityError: # created by a concurrent request
+                counter.update(count=F("count") + 1)
+
+        if next(self._increments) % self.CLEANUP_EVERY == 0:
+            self.delete_expired()
+
+    def delete_expired(self) -> int:
+        deleted, _ = ThrottleCounter.objects.filter(expires_at__lt=timezone.now()).delete()
+        return deleted
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Store selected by THROTTLING["STORE"]: "local", "cache" or "db" """
+    global _store
+
+    with _store_lock:
+        if _store is None:
+            name = throttle_settings["STORE"]
+            if name == "local":
+                _store = LocalStore(throttle_settings["LOCAL_MAX_KEYS"])
+            elif name == "db":
+                _store = DatabaseStore()
+            else:
+                _store = CacheStore()
+        return _store
+
+
+# ---------- THROTTLES ----------
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Rate comes from THROTTLING["RATES"][view.throttle_scope][kind].
+    Views without a scope, or scopes without a rate for this kind, are not throttled.
+    aallow_request() is the async version used by AsyncAPIView.
+    """
+    kind: str
+
+    def get_key(self, request, view) -> str | None:
+        raise NotImplementedError(".get_key() must be overridden")
+
+    def get_rate(self, view):
+        scope = getattr(view, "throttle_scope", None)
+        return throttle_settings["RATES"].get(scope, {}).get(self.kind)
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+
+        rate = self.get_rate(view)
+        key = rate and self.get_key(request, view)
+        if not key:
+            return True
+
+        limit, duration = parse_rate(rate)
+        key = hash_key(view.throttle_scope, self.kind, key)
+        store = get_store()
+
+        window, elapsed = divmod(time.time(), duration)
+        window = int(window)
+        previous, current = store.counts(key, window)
+
+        weight = 1 - elapsed / duration
+        if previous * weight + current + 1 > limit:
+            self.wait_seconds = self.get_wait(previous, current, limit, elapsed, duration)
+            return False
+
+        store.incr(key, window, duration)
+        return True
+
+    async def aallow_request(self, request, view):
+        if get_store().is_local:
+            return self.allow_request(request, view)
+        return await sync_to_async(self.allow_request)(request, view)
+
+    @staticmethod
+    def get_wait(previous, current, limit, elapsed, duration) -> float:
+        """Seconds until one more request fits into the sliding window"""
+        room = limit - 1 - current
+        if room >= 0 and previous:
+            # the previous window's weight drops enough within the current one
+            return max((1 - room / previous) * duration - elapsed, 1)
+
+        # only in the next window, once the current one's weight drops enough
+        next_weight = (limit - 1) / current if current else 1
+        return duration - elapsed + max(1 - next_weight, 0) * duration
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class IPRateThrottle(SlidingWindowThrottle):
+    """
+    Keyed by client IP - REMOTE_ADDR, or the X-Forwarded-For address appended by the outermost of
+    REST_FRAMEWORK["NUM_PROXIES"] trusted proxies (DRF's get_ident)
+    """
+    kind = "ip"
+
+    def get_key(self, request, view):
+        return self.get_ident(request)
+
+
+class IdentifierRateThrottle(SlidingWindowThrottle):
+    """
+    Keyed by the normalized identifier the request targets:
+    the `view.throttle_identifier_field` value of the request body, otherwise the authenticated user.
+    """
+    kind = "identifier"
+
+    def get_key(self, request, view):
+        field = getattr(view, "throttle_identifier_field", None)
+
+        if field:
+            value = request.data.get(field) if hasattr(request.data, "get") else None
+            if not isinstance(value, str) or not value.strip():
+                return None # fails validation anyway, without hashing
+            return value.strip().casefold()
+
+        user = getattr(request, "user", None)
+        if user and user.is_authenticated:
+            return str(user.pk)
+
+        return None
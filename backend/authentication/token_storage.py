@@ -0,0 +1,250 @@
+import threading
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connection, connections, transaction
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow
+from config.logger_setup import log_exception
+
+token_storage_settings = settings.TOKEN_STORAGE
+
+OUTSTANDING_TABLE = OutstandingToken._meta.db_table
+BLACKLISTED_TABLE = BlacklistedToken._meta.db_table
+
+# Partition key of each table. Blacklisted rows don't know the expiry of their token, but blacklisted_at is always
+# between token creation and expiry - a blacklisted_at bucket is dead REFRESH_TOKEN_LIFETIME after its end.
+PARTITION_KEYS = {
+    OUTSTANDING_TABLE: "expires_at",
+    BLACKLISTED_TABLE: "blacklisted_at",
+}
+
+MAINTENANCE_LOCK_KEY = "auth:token_maintenance_lock"
+
+BLACKLIST_LOCK_SPACE = 0x0B1A # first key of the advisory locks of blacklist writes (pg_advisory_xact_lock(int, int))
+MAINTENANCE_LOCK_SPACE = 0x0B1B # advisory lock of maintenance statements - servers not sharing a cache take turns
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def bucket_start(moment: datetime) -> datetime:
+    """Start of the expiry bucket containing `moment` (buckets are aligned to the unix epoch, UTC)"""
+    size = token_storage_settings["BUCKET_SIZE"]
+    return moment - ((moment - EPOCH) % size)
+
+
+def partition_name(table: str, start: datetime) -> str:
+    return f"{table}_p{start:%Y%m%d%H%M}"
+
+
+def is_partitioned() -> bool:
+    return connection.vendor == "postgresql"
+
+
+# ---------- POSTGRES (partitioned tables) ----------
+
+def list_partitions(cursor, table: str) -> dict[str, tuple[datetime, datetime] | None]:
+    """Partition name -> (from, to) bounds, None for the DEFAULT partition"""
+    cursor.execute(
+        """
+        SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = %s
+        """,
+        [table],
+    )
+    partitions = {}
+    for name, bound in cursor.fetchall():
+        if bound == "DEFAULT":
+            partitions[name] = None
+            continue
+        # FOR VALUES FROM ('2026-01-01 10:00:00+00') TO ('2026-01-01 11:00:00+00')
+        low, high = (part.split("'")[1] for part in bound.split(" TO "))
+        partitions[name] = (datetime.fromisoformat(low), datetime.fromisoformat(high))
+    return partitions
+
+
+def run_ddl(*statements: tuple[str, list | None]) -> bool:
+    """
+    Runs (sql, params) statements in one short transaction with lock_timeout, so it never queues behind (and blocks)
+    the refresh hot path, under the maintenance advisory lock. Returns False if a lock could not be taken -
+    it will be retried on the next run.
+    """
+    try:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL lock_timeout = %s", [token_storage_settings["LOCK_TIMEOUT"]])
+                cursor.execute("SELECT pg_advisory_xact_lock(%s, 0)", [MAINTENANCE_LOCK_SPACE])
+                for sql, params in statements:
+                    cursor.execute(sql, params)
+        return True
+    except DatabaseError as exc:
+        log_exception(exc)
+        return False
+
+
+def default_partition(table: str) -> str:
+    return f"{table}_pdefault"
+
+
+def ensure_partitions(now: datetime) -> list[str]:
+    """
+    Creates partitions for the current bucket and PRECREATE_BUCKETS ahead. Returns names of created ones.
+    Rows of the bucket written to the DEFAULT partition meanwhile (maintenance late or off) are moved into it -
+    PostgreSQL refuses to create a partition over rows of the DEFAULT one.
+    """
+    size = token_storage_settings["BUCKET_SIZE"]
+    first = bucket_start(now)
+    starts = [first + size * i for i in range(token_storage_settings["PRECREATE_BUCKETS"] + 1)]
+
+    created = []
+    for table in PARTITION_KEYS:
+        with connection.cursor() as cursor:
+            existing = list_partitions(cursor, table)
+
+        for start in starts:
+            name = partition_name(table, start)
+            if name in existing:
+                continue
+            bounds = [start, start + size]
+            key = PARTITION_KEYS[table]
+            if run_ddl(
+                (
+                    f'CREATE TEMPORARY TABLE "moved" ON COMMIT DROP AS WITH "rows" AS ('
+                    f'DELETE FROM "{default_partition(table)}" WHERE "{key}" >= %s AND "{key}" < %s RETURNING *'
+                    f') SELECT * FROM "rows"',
+                    bounds,
+                ),
+                (f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" FOR VALUES FROM (%s) TO (%s)', bounds),
+                (f'INSERT INTO "{table}" SELECT * FROM "moved"', None),
+            ):
+                created.append(name)
+    return created
+
+
+def drop_expired_partitions(now: datetime) -> list[str]:
+    """
+    Drops whole partitions whose rows are all expired - O(1) regardless of the row count.
+    Expired rows of the DEFAULT partitions (buckets never created) are deleted.
+    Blacklist rows of the dropped / deleted outstanding tokens go in the same transaction - blacklist partitions
+    are dropped a token lifetime later, their rows would point to no token until then.
+    """
+    lifetime = api_settings.REFRESH_TOKEN_LIFETIME
+    cutoffs = {
+        OUTSTANDING_TABLE: now,
+        BLACKLISTED_TABLE: now - lifetime,
+    }
+
+    dropped = []
+    for table, cutoff in cutoffs.items():
+        with connection.cursor() as cursor:
+            partitions = list_partitions(cursor, table)
+
+        for name, bounds in sorted(partitions.items()):
+            if bounds is None or bounds[1] > cutoff:
+                continue
+            if run_ddl(*blacklist_of(table, f'SELECT "id" FROM "{name}"'), (f'DROP TABLE IF EXISTS "{name}"', None)):
+                dropped.append(name)
+
+        if default_partition(table) in partitions:
+            expired = f'FROM "{default_partition(table)}" WHERE "{PARTITION_KEYS[table]}" < %s'
+            run_ddl(*blacklist_of(table, f'SELECT "id" {expired}', [cutoff]), (f"DELETE {expired}", [cutoff]))
+    return dropped
+
+
+def blacklist_of(table: str, token_ids: str, params: list | None = None) -> list[tuple[str, list | None]]:
+    """Deletes the blacklist rows of the outstanding tokens selected by `token_ids` (SQL), none for other tables"""
+    if table != OUTSTANDING_TABLE:
+        return []
+    return [(f'DELETE FROM "{BLACKLISTED_TABLE}" WHERE "token_id" IN ({token_ids})', params)]
+
+
+def blacklist_token(token) -> tuple[BlacklistedToken, bool]:
+    """
+    get_or_create() of the blacklist row of an OutstandingToken - one per token. The partitioned table can't have
+    a unique constraint on token_id alone (the partition key has to be in it): concurrent writes of one token are
+    serialized by a transaction level advisory lock instead, the second one finds the row of the first.
+    """
+    with transaction.atomic():
+        if is_partitioned():
+            with connection.cursor() as cursor:
+                # 31 bits of the id - a collision only makes two tokens wait for each other
+                cursor.execute("SELECT pg_advisory_xact_lock(%s, %s)", [BLACKLIST_LOCK_SPACE, token.pk % 2**31])
+        return BlacklistedToken.objects.get_or_create(token=token)
+
+
+# ---------- OTHER BACKENDS (SQLite - one table, buckets over the expires_at index) ----------
+
+def delete_expired_buckets(now: datetime) -> int:
+    """
+    SQLite has no partitions - expired rows are removed bucket by bucket in small batches,
+    each in its own short write transaction, so refreshes are never blocked for long.
+    Returns the number of deleted outstanding tokens.
+    """
+    batch_size = token_storage_settings["DELETE_BATCH_SIZE"]
+    deleted = 0
+
+    while True:
+        with transaction.atomic():
+            ids = list(
+                OutstandingToken.objects
+                .filter(expires_at__lt=bucket_start(now))
+                .order_by("expires_at")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                return deleted
+
+            BlacklistedToken.objects.filter(token_id__in=ids).delete()
+            OutstandingToken.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
+
+
+# ---------- ENTRY POINTS ----------
+
+def run_token_maintenance(now: datetime | None = None) -> dict:
+    """Creates upcoming buckets and removes expired ones. Safe to run concurrently and repeatedly."""
+    now = now or aware_utcnow()
+
+    if is_partitioned():
+        return {
+            "created": ensure_partitions(now),
+            "dropped": drop_expired_partitions(now),
+        }
+
+    return {"deleted": delete_expired_buckets(now)}
+
+
+def run_scheduled_token_maintenance():
+    """One maintenance run per MAINTENANCE_INTERVAL across all workers sharing the cache"""
+    interval = token_storage_settings["MAINTENANCE_INTERVAL"]
+    if not cache.add(MAINTENANCE_LOCK_KEY, True, timeout=interval):
+        return
+
+    try:
+        run_token_maintenance()
+    except Exception as exc:
+        log_exception(exc)
+    finally:
+        connections.close_all() # thread's own connections only
+
+
+def start_token_maintenance_scheduler():
+    """
+    Scheduler hook - call once per server process (config.wsgi / config.asgi).
+    Runs maintenance in a daemon thread every MAINTENANCE_INTERVAL seconds, 0 disables it.
+    """
+    interval = token_storage_settings["MAINTENANCE_INTERVAL"]
+    if not interval:
+        return
+
+    def loop():
+        stop = threading.Event()
+        while not stop.wait(interval):
+            run_scheduled_token_maintenance()
+
+    threading.Thread(target=loop, name="token-maintenance", daemon=True).start()
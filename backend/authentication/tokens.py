@@ -0,0 +1,98 @@
+# tokens.py
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from rest_framework_simplejwt.tokens import BlacklistMixin, RefreshToken as BaseRefreshToken, Token
+from rest_framework_simplejwt.utils import datetime_from_epoch
+from .blacklist_index import blacklist_index
+from .token_storage import blacklist_token
+
+# https://github.com/jazzband/djangorestframework-simplejwt/blob/master/rest_framework_simplejwt/tokens.py
+
+class RefreshToken(BaseRefreshToken):
+    """
+    simplejwt's RefreshToken, but blacklist membership goes through the in-memory blacklist index.
+    Use this one instead of simplejwt's everywhere, so blacklist writes of this process update the index right away
+    and write one row per token (token_storage.blacklist_token()).
+
+    The `a`-prefixed methods are async ORM versions of simplejwt's DB methods, for the async views.
+    """
+    def __init__(self, token=None, verify=True, verify_blacklist=True):
+        # verify_blacklist=False - signature and claims are still verified, blacklist is left to acheck_blacklist()
+        self.verify_blacklist = verify_blacklist
+        super().__init__(token, verify)
+
+    def verify(self, *args, **kwargs):
+        if self.verify_blacklist:
+            return super().verify(*args, **kwargs)
+        return Token.verify(self, *args, **kwargs)
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+
+        if blacklist_index.is_blacklisted(jti):
+            raise TokenError(_("Token is blacklisted"))
+
+    def _get_user(self):
+        user_id = self.payload.get(api_settings.USER_ID_CLAIM)
+        return get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+
+    def blacklist(self):
+        token, _created = OutstandingToken.objects.get_or_create(
+            jti=self.payload[api_settings.JTI_CLAIM],
+            defaults={
+                "user": self._get_user(),
+                "created_at": self.current_time,
+                "token": str(self),
+                "expires_at": datetime_from_epoch(self.payload["exp"]),
+            },
+        )
+        blacklisted = blacklist_token(token)
+        blacklist_index.add(self.payload[api_settings.JTI_CLAIM])
+        return blacklisted
+
+    # ---------- ASYNC ----------
+
+    async def acheck_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+
+        if await blacklist_index.ais_blacklisted(jti):
+            raise TokenError(_("Token is blacklisted"))
+
+    async def _aget_user(self):
+        user_id = self.payload.get(api_settings.USER_ID_CLAIM)
+        return await get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id}).afirst()
+
+    async def aoutstand(self):
+        return await OutstandingToken.objects.aget_or_create(
+            jti=self.payload[api_settings.JTI_CLAIM],
+            defaults={
+                "user": await self._aget_user(),
+                "created_at": self.current_time,
+                "token": str(self),
+                "expires_at": datetime_from_epoch(self.payload["exp"]),
+            },
+        )
+
+    async def ablacklist(self):
+        token, _created = await self.aoutstand()
+        blacklisted = await sync_to_async(blacklist_token)(token) # transaction + advisory lock
+        await blacklist_index.aadd(self.payload[api_settings.JTI_CLAIM])
+        return blacklisted
+
+    @classmethod
+    async def afor_user(cls, user):
+        # Token.for_user() only builds the claims, BlacklistMixin.for_user() would write the OutstandingToken synchronously
+        token = super(BlacklistMixin, cls).for_user(user)
+
+        await OutstandingToken.objects.acreate(
+            user=user,
+            jti=token[api_settings.JTI_CLAIM],
+            token=str(token),
+            created_at=token.current_time,
+            expires_at=datetime_from_epoch(token["exp"]),
+        )
+        return token
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 from .views import (
     LoginView,
@@ -11,6 +12,15 @@ from .views import (
     ChangeEmailView,
 )
 
+if settings.ASYNC_VIEWS:
+    from .async_views import (
+        AsyncCookieTokenRefreshView as CookieTokenRefreshView,
+        AsyncLoginView as LoginView,
+        AsyncLogoutView as LogoutView,
+        AsyncMeView as MeView,
+        AsyncRegisterView as RegisterView,
+    )
+
 urlpatterns = [
     path("login/", LoginView.as_view(), name="login"),
     path("token/refresh/", CookieTokenRefreshView.as_view(), name="token_refresh"),
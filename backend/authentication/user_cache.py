@@ -0,0 +1,152 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from django.db.models.signals import post_delete, post_save
+from config.cache_helpers import abump_counter, acache_get, bump_counter, cache_is_local
+
+User = get_user_model()
+user_cache_settings = settings.USER_CACHE
+
+# Only the columns needed to answer authenticated requests. Anything else (password, last_login...)
+# stays deferred on the principal and is loaded lazily by Django on first access.
+# Kept in model field order - Model.from_db() expects values in that order.
+CACHED_FIELDS = tuple(
+    f.attname for f in User._meta.concrete_fields
+    if f.attname in ("id", "username", "email", "is_active", "theme", "language")
+)
+
+VERSION_KEY = "auth:user_version:{user_id}"
+
+
+def get_user_version(user_id) -> int:
+    """Current version of the user row. Shared between workers if CACHES points to a shared backend."""
+    return cache.get(VERSION_KEY.format(user_id=user_id), 0)
+
+
+def bump_user_version(user_id):
+    """
+    Invalidates every cached copy of the user row (in every process sharing the cache backend).
+    Called by the signals below on every save / delete of a user - call it after writes bypassing them
+    (QuerySet.update(), raw SQL) to the fields in CACHED_FIELDS.
+    """
+    bump_counter(VERSION_KEY.format(user_id=user_id))
+    user_cache.evict(user_id)
+
+
+async def abump_user_version(user_id):
+    """See bump_user_version()"""
+    await abump_counter(VERSION_KEY.format(user_id=user_id))
+    user_cache.evict(user_id)
+
+
+class UserRowCache:
+    """
+    Per-process LRU cache of user rows with TTL, keyed by str(user_id).
+    Entry is valid as long as it is not expired and its version matches get_user_version().
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, version: int):
+        with self._lock:
+            user_id = str(user_id)
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+
+            entry_version, expires_at, values = entry
+            if entry_version != version or expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+
+            self._entries.move_to_end(user_id)
+            return values
+
+    def set(self, user_id, version: int, values: tuple):
+        user_id = str(user_id)
+        with self._lock:
+            self._entries[user_id] = (version, time.monotonic() + self.ttl, values)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def evict(self, user_id):
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserRowCache(
+    max_size=user_cache_settings["MAX_SIZE"],
+    # a local cache doesn't carry the version bumps of the other processes - only the TTL ends their stale copies
+    ttl=user_cache_settings["LOCAL_TTL"] if cache_is_local() else user_cache_settings["TTL"],
+)
+
+
+def build_user(values: tuple):
+    """Builds a User instance from cached values, remaining fields are deferred (loaded on access)"""
+    return User.from_db(router.db_for_read(User), CACHED_FIELDS, values)
+
+
+def get_cached_user(user_id):
+    """
+    Returns User built from the cache, or from a single narrow query on miss.
+    Returns None if user does not exist.
+    """
+    version = get_user_version(user_id)
+
+    values = user_cache.get(user_id, version)
+    if values is not None:
+        return build_user(values)
+
+    values = User.objects.filter(pk=user_id).values_list(*CACHED_FIELDS).first()
+    if values is None:
+        return None
+
+    user_cache.set(user_id, version, values)
+    return build_user(values)
+
+
+async def aget_cached_user(user_id):
+    """See get_cached_user()"""
+    version = await acache_get(VERSION_KEY.format(user_id=user_id), 0)
+
+    values = user_cache.get(user_id, version)
+    if values is not None:
+        return build_user(values)
+
+    values = await User.objects.filter(pk=user_id).values_list(*CACHED_FIELDS).afirst()
+    if values is None:
+        return None
+
+    user_cache.set(user_id, version, values)
+    return build_user(values)
+
+
+# ---------- SIGNALS ----------
+# Every write through the ORM - API views, admin, shell - invalidates the cached rows
+
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and not set(update_fields) & set(CACHED_FIELDS)):
+        return # last_login of a login, password...
+    bump_user_version(instance.pk)
+
+
+def user_deleted(sender, instance, **kwargs):
+    bump_user_version(instance.pk)
+
+
+post_save.connect(user_saved, sender=User)
+post_delete.connect(user_deleted, sender=User)
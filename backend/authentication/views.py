@@ -3,6 +3,7 @@ from rest_framework_simplejwt.views import (
 )
 from rest_framework_simplejwt.exceptions import TokenError
 from .serializers import (
+    CookieTokenRefreshSerializer,
     LoginSerializer,
     RegisterSerializer,
     DeleteAccountSerializer,
@@ -13,7 +14,7 @@ from .serializers import (
 from rest_framework.views import APIView
 from .permissions import IsAuthenticatedEC
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from .tokens import RefreshToken
 from rest_framework.permissions import AllowAny
 from rest_framework import status
 from config.responses import api_response
@@ -21,12 +22,14 @@ from rest_framework.exceptions import AuthenticationFailed
 from config.response_codes import EC, SC
 from django.conf import settings
 from config.error_helpers import api_err_dict
+from .hashing import set_password
 
 cookie = settings.AUTH_COOKIE
 
 
 class CookieTokenRefreshView(TokenRefreshView):
     permission_classes = [AllowAny]
+    serializer_class = CookieTokenRefreshSerializer
 
     def post(self, request, *args, **kwargs):
         refresh_token = request.COOKIES.get(cookie["NAME"])
@@ -71,6 +74,8 @@ class CookieTokenRefreshView(TokenRefreshView):
 
 class LoginView(APIView):
     permission_classes = [AllowAny]
+    throttle_scope = "login"
+    throttle_identifier_field = "identifier"
 
     def post(self, request):
         serializer = LoginSerializer(data=request.data)
@@ -100,6 +105,8 @@ class LoginView(APIView):
 
 class RegisterView(APIView):
     permission_classes = [AllowAny]
+    throttle_scope = "register"
+    throttle_identifier_field = "username"
 
     def post(self, request):
         serializer = RegisterSerializer(data=request.data)
@@ -166,6 +173,7 @@ class MeView(APIView):
 
 class DeleteAccountView(APIView):
     permission_classes = [IsAuthenticatedEC]
+    throttle_scope = "password_confirm"
 
     def delete(self, request):
         serializer = DeleteAccountSerializer(
@@ -197,6 +205,7 @@ class DeleteAccountView(APIView):
 
 class ChangePasswordView(APIView):
     permission_classes = [IsAuthenticatedEC]
+    throttle_scope = "password_confirm"
 
     def patch(self, request):
         serializer = ChangePasswordSerializer(
@@ -207,7 +216,7 @@ class ChangePasswordView(APIView):
         user = request.user
         data = serializer.validated_data
 
-        user.set_password(data["new_password"])
+        set_password(user, data["new_password"])
         user.save()
 
         refresh_token = request.COOKIES.get(cookie["NAME"])
@@ -231,6 +240,7 @@ class ChangePasswordView(APIView):
 
 class ChangeUsernameView(APIView):
     permission_classes = [IsAuthenticatedEC]
+    throttle_scope = "password_confirm"
 
     def patch(self, request):
         serializer = ChangeUsernameSerializer(data=request.data, context={"request": request})
@@ -248,6 +258,7 @@ class ChangeUsernameView(APIView):
 
 class ChangeEmailView(APIView):
     permission_classes = [IsAuthenticatedEC]
+    throttle_scope = "password_confirm"
 
     def patch(self, request):
         serializer = ChangeEmailSerializer(data=request.data, context={"request": request})
@@ -0,0 +1,137 @@
+"""
+Sync views through the WSGI handler (a thread per in-flight request) vs async views through the ASGI handler
+(one event loop), for the hot auth endpoints: /auth/me/ and /auth/token/refresh/.
+
+Requests go through Django's test clients - full middleware + view stack in process, no server or network,
+so this compares handler overhead and how both stacks behave with N requests in flight.
+Runs against a throwaway test database created from DATABASES['default'], the real one is not touched.
+On SQLite the test database is a file (the default in-memory one fails concurrent writes instead of waiting),
+use Postgres for representative refresh numbers - SQLite serializes the writes.
+
+    python -m benchmarks.async_views --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+from django.test import AsyncClient, Client, override_settings  # noqa: E402
+from django.urls import path  # noqa: E402
+
+from authentication.async_views import AsyncCookieTokenRefreshView, AsyncMeView  # noqa: E402
+from authentication.tokens import RefreshToken  # noqa: E402
+from authentication.views import CookieTokenRefreshView, MeView  # noqa: E402
+
+# Both variants side by side, whatever ASYNC_VIEWS is set to
+urlpatterns = [
+    path("sync/me/", MeView.as_view()),
+    path("sync/refresh/", CookieTokenRefreshView.as_view()),
+    path("async/me/", AsyncMeView.as_view()),
+    path("async/refresh/", AsyncCookieTokenRefreshView.as_view()),
+]
+
+cookie = settings.AUTH_COOKIE
+
+
+def me_request(access_token):
+    return {"path": "me/", "headers": {"authorization": f"Bearer {access_token}"}}
+
+
+def refresh_request(refresh_token):
+    return {"path": "refresh/", "cookie": refresh_token}
+
+
+def run_sync(requests: list[dict], concurrency: int) -> tuple[list[float], int]:
+    def call(request):
+        client = Client()
+        if "cookie" in request:
+            client.cookies[cookie["NAME"]] = request["cookie"]
+
+        start = time.perf_counter()
+        response = client.post("/sync/" + request["path"]) if "cookie" in request else client.get(
+            "/sync/" + request["path"], headers=request["headers"]
+        )
+        elapsed = (time.perf_counter() - start) * 1000
+        connections.close_all()
+        return elapsed, response.status_code
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(call, requests))
+    return [elapsed for elapsed, _ in results], sum(status != 200 for _, status in results)
+
+
+def run_async(requests: list[dict], concurrency: int) -> tuple[list[float], int]:
+    async def call(request, semaphore):
+        client = AsyncClient()
+        if "cookie" in request:
+            client.cookies[cookie["NAME"]] = request["cookie"]
+
+        async with semaphore:
+            start = time.perf_counter()
+            if "cookie" in request:
+                response = await client.post("/async/" + request["path"])
+            else:
+                response = await client.get("/async/" + request["path"], headers=request["headers"])
+            return (time.perf_counter() - start) * 1000, response.status_code
+
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+        return await asyncio.gather(*(call(request, semaphore) for request in requests))
+
+    results = asyncio.run(main())
+    return [elapsed for elapsed, _ in results], sum(status != 200 for _, status in results)
+
+
+def report(name: str, timings: list[float], wall: float, errors: int):
+    timings = sorted(timings)
+    p50 = timings[len(timings) // 2]
+    p99 = timings[int(len(timings) * 0.99) - 1]
+    print(
+        f"{name:<14} {len(timings) / wall:8.0f} req/s | p50 {p50:8.3f} ms | p99 {p99:8.3f} ms | non-200 {errors}"
+    )
+
+
+def bench(name: str, runner, requests: list[dict], concurrency: int):
+    start = time.perf_counter()
+    timings, errors = runner(requests, concurrency)
+    report(name, timings, time.perf_counter() - start, errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000, help="requests per endpoint and variant")
+    parser.add_argument("--concurrency", type=int, default=32, help="requests in flight")
+    args = parser.parse_args()
+
+    if connection.vendor == "sqlite":
+        connection.settings_dict["TEST"]["NAME"] = str(settings.BASE_DIR / "benchmark_async_views.sqlite3")
+
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        with override_settings(ROOT_URLCONF=__name__):
+            user = get_user_model().objects.create_user(username="bench", password="bench")
+            access_token = str(RefreshToken.for_user(user).access_token)
+
+            print(f"{args.requests} requests, {args.concurrency} in flight")
+            for variant, runner in (("sync", run_sync), ("async", run_async)):
+                bench(f"{variant} me", runner, [me_request(access_token)] * args.requests, args.concurrency)
+
+            for variant, runner in (("sync", run_sync), ("async", run_async)):
+                # Tokens are minted upfront, only the refresh itself is timed
+                tokens = [str(RefreshToken.for_user(user)) for _ in range(args.requests)]
+                bench(f"{variant} refresh", runner, [refresh_request(token) for token in tokens], args.concurrency)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
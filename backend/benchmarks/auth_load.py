@@ -0,0 +1,260 @@
+"""
+Load benchmark of the auth API: seeds N users, then drives login, token refresh, me, change-username and
+the protected test view with C requests in flight. Reports p50/p95/p99 latency, throughput and DB queries per request.
+
+Requests go through Django's test client from a thread pool - full middleware + view stack in process,
+no server or network. Runs against a throwaway test database created from DATABASES['default']
+(SQLite or a local Postgres), the real one is not touched. Throttles are switched off for the run.
+Queries per request come from config.metrics (METRICS["ENABLED"]), null without it.
+
+    python -m benchmarks.auth_load --users 200 --requests 1000 --concurrency 16 --output run.json
+    python -m benchmarks.auth_load --baseline run.json --threshold 0.15   # exit status 1 on a regression
+
+Login and change-username hash a password (PBKDF2 in the PASSWORD_HASHING pool) and dominate their numbers,
+a concurrency above PASSWORD_HASHING["QUEUE_DEPTH"] gets 429s on them - counted as errors.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.contrib.auth.hashers import make_password  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+from django.test import Client  # noqa: E402
+
+from authentication.tokens import RefreshToken  # noqa: E402
+from config import metrics  # noqa: E402
+
+PASSWORD = "benchmark-password"
+COOKIE_NAME = settings.AUTH_COOKIE["NAME"]
+
+# Scenario -> compared metric -> True if higher is worse
+REGRESSION_METRICS = {
+    "p95_ms": True,
+    "p99_ms": True,
+    "throughput": False,
+    "queries_per_request": True,
+}
+
+
+# ---------- SEEDING ----------
+
+def seed_users(n) -> list:
+    """N users sharing one password hash - hashing it N times would take longer than the benchmark"""
+    encoded = make_password(PASSWORD)
+    User = get_user_model()
+    User.objects.bulk_create(
+        [User(username=f"bench_{i}", email=f"bench_{i}@example.com", password=encoded) for i in range(n)],
+        batch_size=1000,
+    )
+    return list(User.objects.filter(username__startswith="bench_").order_by("pk"))
+
+
+def access_tokens(users) -> list[str]:
+    return [str(RefreshToken.for_user(user).access_token) for user in users]
+
+
+# ---------- SCENARIOS ----------
+# Each builds the list of request kwargs upfront, only the requests themselves are timed.
+# Tokens are minted right before their scenario - access tokens live ACCESS_TOKEN_LIFETIME only.
+
+def login_requests(users, n):
+    return [
+        {"method": "post", "path": "/api/v1/auth/login/",
+         "data": {"identifier": users[i % len(users)].username, "password": PASSWORD}}
+        for i in range(n)
+    ]
+
+
+def refresh_requests(users, n):
+    # a fresh refresh token per request, each one is rotated (blacklisted) by its request
+    return [
+        {"method": "post", "path": "/api/v1/auth/token/refresh/",
+         "cookie": str(RefreshToken.for_user(users[i % len(users)]))}
+        for i in range(n)
+    ]
+
+
+def me_requests(users, n):
+    tokens = access_tokens(users)
+    return [{"method": "get", "path": "/api/v1/auth/me/", "token": tokens[i % len(tokens)]} for i in range(n)]
+
+
+def change_username_requests(users, n):
+    tokens = access_tokens(users)
+    return [
+        {"method": "patch", "path": "/api/v1/auth/me/username/", "token": tokens[i % len(tokens)],
+         "data": {"username_new": f"renamed_{i}", "password": PASSWORD}}
+        for i in range(n)
+    ]
+
+
+def protected_requests(users, n):
+    tokens = access_tokens(users)
+    return [{"method": "get", "path": "/api/v1/protected/", "token": tokens[i % len(tokens)]} for i in range(n)]
+
+
+SCENARIOS = {
+    "login": login_requests,
+    "refresh": refresh_requests,
+    "me": me_requests,
+    "change_username": change_username_requests,
+    "protected": protected_requests,
+}
+
+
+# ---------- RUNNING ----------
+
+def call(request) -> tuple[float, int]:
+    client = Client()
+    kwargs = {"content_type": "application/json"}
+    if "token" in request:
+        kwargs["headers"] = {"authorization": f"Bearer {request['token']}"}
+    if "cookie" in request:
+        client.cookies[COOKIE_NAME] = request["cookie"]
+
+    start = time.perf_counter()
+    response = getattr(client, request["method"])(request["path"], request.get("data"), **kwargs)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    connections.close_all()
+    return elapsed, response.status_code
+
+
+def total_queries() -> float | None:
+    if not settings.METRICS["ENABLED"]:
+        return None
+    return sum(value for key, value in metrics.snapshot().items() if key.startswith("api_db_queries_total\t"))
+
+
+def percentile(sorted_values, fraction) -> float:
+    index = max(int(round(fraction * len(sorted_values))) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def run_scenario(requests, concurrency) -> dict:
+    queries_before = total_queries()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(call, requests))
+    wall = time.perf_counter() - start
+
+    queries_after = total_queries()
+
+    timings = sorted(elapsed for elapsed, _ in results)
+    return {
+        "requests": len(results),
+        "errors": sum(not 200 <= status < 300 for _, status in results),
+        "throughput": round(len(results) / wall, 2),
+        "p50_ms": round(percentile(timings, 0.50), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+        "p99_ms": round(percentile(timings, 0.99), 3),
+        "queries_per_request": (
+            None if queries_before is None else round((queries_after - queries_before) / len(results), 2)
+        ),
+    }
+
+
+# ---------- COMPARING ----------
+
+def find_regressions(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Metrics worse than the baseline by more than `threshold` (relative), scenarios missing on either side skipped"""
+    regressions = []
+
+    for scenario, current in results["results"].items():
+        previous = baseline.get("results", {}).get(scenario)
+        if previous is None:
+            continue
+
+        for name, higher_is_worse in REGRESSION_METRICS.items():
+            new, old = current.get(name), previous.get(name)
+            if new is None or old is None:
+                continue
+
+            if higher_is_worse:
+                worse = new > old * (1 + threshold) and new - old > 0.01
+            else:
+                worse = new < old * (1 - threshold)
+
+            if worse:
+                regressions.append(f"{scenario} {name}: {old} -> {new}")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100, help="users seeded")
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="requests in flight")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON file of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change counted as a regression")
+    args = parser.parse_args()
+
+    # Every request of a scenario comes from one IP and a handful of users
+    settings.THROTTLING["RATES"].clear()
+
+    if connection.vendor == "sqlite":
+        # a file - the default in-memory test database fails concurrent writes instead of waiting
+        connection.settings_dict["TEST"]["NAME"] = str(settings.BASE_DIR / "benchmark_auth_load.sqlite3")
+
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        users = seed_users(args.users)
+
+        results = {
+            "meta": {
+                "time": datetime.now(timezone.utc).isoformat(),
+                "database": connection.vendor,
+                "async_views": settings.ASYNC_VIEWS,
+                "hashing_workers": settings.PASSWORD_HASHING["WORKERS"],
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "users": args.users,
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+            },
+            "results": {},
+        }
+
+        print(f"{args.users} users, {args.requests} requests per scenario, {args.concurrency} in flight")
+        for scenario in args.scenarios:
+            requests = SCENARIOS[scenario](users, args.requests)
+            result = results["results"][scenario] = run_scenario(requests, args.concurrency)
+            print(
+                f"{scenario:<16} {result['throughput']:8.1f} req/s | p50 {result['p50_ms']:8.3f} ms"
+                f" | p95 {result['p95_ms']:8.3f} ms | p99 {result['p99_ms']:8.3f} ms"
+                f" | queries/req {result['queries_per_request']} | errors {result['errors']}"
+            )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = find_regressions(results, json.load(file), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Refresh latency: simplejwt's blacklist check (SQL on every refresh) vs the in-memory blacklist index.
+
+Runs against a throwaway test database created from DATABASES['default'], the real one is not touched.
+The index is on even without a shared cache (CACHE_URL) - the benchmark is one process.
+
+    python -m benchmarks.blacklist_index --rows 2000000 --refreshes 500
+"""
+import argparse
+import os
+import statistics
+import time
+import uuid
+from datetime import timedelta
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer  # noqa: E402
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken  # noqa: E402
+
+from authentication.blacklist_index import blacklist_index  # noqa: E402
+from authentication.serializers import CookieTokenRefreshSerializer  # noqa: E402
+from authentication.tokens import RefreshToken  # noqa: E402
+
+BATCH_SIZE = 10_000
+
+
+def seed_blacklist(rows: int):
+    expires_at = timezone.now() + timedelta(days=1)
+    done = 0
+    while done < rows:
+        size = min(BATCH_SIZE, rows - done)
+        outstanding = OutstandingToken.objects.bulk_create(
+            OutstandingToken(jti=uuid.uuid4().hex, token="", expires_at=expires_at) for _ in range(size)
+        )
+        BlacklistedToken.objects.bulk_create(BlacklistedToken(token=token) for token in outstanding)
+        done += size
+        print(f"\rseeded {done}/{rows}", end="", flush=True)
+    print()
+
+
+def measure(serializer_class, user, refreshes: int) -> list[float]:
+    # Tokens are minted upfront, only the refresh itself is timed
+    tokens = [str(RefreshToken.for_user(user)) for _ in range(refreshes)]
+    timings = []
+    for token in tokens:
+        start = time.perf_counter()
+        serializer = serializer_class(data={"refresh": token})
+        serializer.is_valid(raise_exception=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name: str, timings: list[float]):
+    timings = sorted(timings)
+    p50 = timings[len(timings) // 2]
+    p99 = timings[int(len(timings) * 0.99) - 1]
+    print(f"{name:<12} mean {statistics.mean(timings):7.3f} ms | p50 {p50:7.3f} ms | p99 {p99:7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="blacklisted tokens to seed")
+    parser.add_argument("--refreshes", type=int, default=300, help="timed refreshes per variant")
+    args = parser.parse_args()
+
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        seed_blacklist(args.rows)
+        user = get_user_model().objects.create_user(username="bench", password="bench")
+
+        blacklist_index.enabled = True
+        start = time.perf_counter()
+        blacklist_index.warm()
+        print(f"index warm-up: {(time.perf_counter() - start):.2f} s for {args.rows} rows")
+
+        report("sql check", measure(TokenRefreshSerializer, user, args.refreshes))
+        report("index", measure(CookieTokenRefreshSerializer, user, args.refreshes))
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
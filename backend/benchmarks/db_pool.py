@@ -0,0 +1,157 @@
+"""
+DB connection reuse under concurrent load, for every DB_POOL["MODE"]: "off", "persistent" and "pool" (PostgreSQL only).
+Each mode runs in its own process (the mode is read at startup), against a throwaway test database.
+
+Every request runs one query through the full middleware stack, from C threads at once. Reported per mode:
+latency, connections Django opened (checkouts in "pool" mode), distinct DB sessions behind them
+(pg_backend_pid(), PostgreSQL only) and the pool's own counters.
+Exits with status 1 if the "pool" mode used more DB sessions than DB_POOL["MAX_SIZE"] - connections were not reused.
+
+    python -m benchmarks.db_pool --requests 2000 --concurrency 16
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import close_old_connections, connection, connections  # noqa: E402
+from django.db.backends.signals import connection_created  # noqa: E402
+from django.http import JsonResponse  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+from django.urls import path  # noqa: E402
+
+from config.db_pool import get_pool, pool_stats, warm_up_db_pool  # noqa: E402
+
+MODES = ("off", "persistent", "pool")
+
+
+def query_view(request):
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT pg_backend_pid()")
+        else:
+            cursor.execute("SELECT 1")
+        return JsonResponse({"session": cursor.fetchone()[0]})
+
+
+urlpatterns = [path("query/", query_view)]
+
+
+# ---------- CHILD (one mode) ----------
+
+def measure(requests, concurrency) -> dict:
+    opened = []
+    opened_lock = threading.Lock()
+
+    def on_connect(sender, connection, **kwargs):
+        with opened_lock:
+            opened.append(1)
+
+    connection_created.connect(on_connect, weak=False)
+
+    def call(_):
+        start = time.perf_counter()
+        response = Client().get("/query/")
+        # the test client doesn't close connections on request_finished, a server does
+        close_old_connections()
+        elapsed = (time.perf_counter() - start) * 1000
+        return elapsed, response.json()["session"]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(call, range(requests)))
+        # runs on the pool's threads - their persistent connections are closed by the threads themselves
+        list(pool.map(lambda _: connections.close_all(), range(concurrency)))
+    wall = time.perf_counter() - start
+
+    connection_created.disconnect(on_connect)
+
+    timings = sorted(elapsed for elapsed, _ in results)
+    sessions = {session for _, session in results}
+    return {
+        "mode": settings.DB_POOL["MODE"],
+        "throughput": round(requests / wall, 1),
+        "p50_ms": round(timings[len(timings) // 2], 3),
+        "p99_ms": round(timings[int(len(timings) * 0.99) - 1], 3),
+        "connections_opened": len(opened),
+        "db_sessions": len(sessions) if connection.vendor == "postgresql" else None,
+        "pool": pool_stats(),
+    }
+
+
+def run_child(args):
+    if connection.vendor == "sqlite":
+        # a file - the in-memory test database is one connection, nothing to measure
+        connection.settings_dict["TEST"]["NAME"] = str(settings.BASE_DIR / "benchmark_db_pool.sqlite3")
+
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        if get_pool() is not None:
+            connection.close_pool()  # opened by the migrations, reopened below the way a worker starts
+        warm_up_db_pool()
+        with override_settings(ROOT_URLCONF=__name__):
+            result = measure(args.requests, args.concurrency)
+    finally:
+        connections.close_all()
+        if get_pool() is not None:
+            connection.close_pool()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    print(json.dumps(result))
+
+
+# ---------- PARENT ----------
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return run_child(args)
+
+    if connection.vendor != "postgresql" and "pool" in args.modes:
+        print("pool mode skipped - PostgreSQL only")
+        args.modes.remove("pool")
+
+    print(f"{args.requests} requests, {args.concurrency} in flight, DB_POOL MAX_SIZE {settings.DB_POOL['MAX_SIZE']}")
+    failed = False
+    for mode in args.modes:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.db_pool", "--child",
+             "--requests", str(args.requests), "--concurrency", str(args.concurrency)],
+            env={**os.environ, "DB_POOL_MODE": mode},
+            capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+
+        pool = result["pool"]
+        print(
+            f"{mode:<11} {result['throughput']:8.1f} req/s | p50 {result['p50_ms']:7.3f} ms | p99 {result['p99_ms']:7.3f} ms"
+            f" | opened {result['connections_opened']:5} | db sessions {result['db_sessions']}"
+            + (f" | pool connects {pool['connects']}, wait {pool['wait_seconds']:.3f} s" if pool else "")
+        )
+
+        if mode == "pool" and result["db_sessions"] > settings.DB_POOL["MAX_SIZE"]:
+            print(f"FAIL {result['db_sessions']} DB sessions, the pool holds at most {settings.DB_POOL['MAX_SIZE']}")
+            failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Per request middleware overhead: one flat MIDDLEWARE list (every request runs session/CSRF/auth/messages)
+vs settings.MIDDLEWARE with config.middleware.RouteMiddleware (only /admin/ and unknown paths run them).
+
+Trivial views under /api/ and /admin/, so the numbers are the handler + middleware only. No database needed.
+Sync through the WSGI test client, async through the ASGI one.
+
+    python -m benchmarks.middleware --iterations 20000
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.http import HttpResponse  # noqa: E402
+from django.test import AsyncClient, Client, override_settings  # noqa: E402
+from django.urls import path  # noqa: E402
+
+
+def ping(request):
+    return HttpResponse(b"{}", content_type="application/json")
+
+
+urlpatterns = [
+    path("api/v1/ping/", ping),
+    path("admin/ping/", ping),
+]
+
+# The stack before RouteMiddleware, same order
+FLAT_MIDDLEWARE = [
+    "config.metrics.MetricsMiddleware",
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    "corsheaders.middleware.CorsMiddleware",
+]
+
+PATHS = ("/api/v1/ping/", "/admin/ping/")
+
+
+def bench_sync(url, iterations) -> float:
+    client = Client()
+    client.get(url) # loads the middleware
+    start = time.perf_counter()
+    for _ in range(iterations):
+        client.get(url)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def bench_async(url, iterations) -> float:
+    async def run():
+        client = AsyncClient()
+        await client.get(url)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            await client.get(url)
+        return (time.perf_counter() - start) / iterations * 1e6
+
+    return asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=10_000)
+    args = parser.parse_args()
+
+    variants = {"flat": FLAT_MIDDLEWARE, "routed": settings.MIDDLEWARE}
+
+    print(f"{args.iterations} requests per path")
+    for mode, bench in (("sync", bench_sync), ("async", bench_async)):
+        for url in PATHS:
+            results = {}
+            for variant, middleware in variants.items():
+                with override_settings(ROOT_URLCONF=__name__, MIDDLEWARE=middleware):
+                    results[variant] = bench(url, args.iterations)
+                print(f"{mode:<6} {url:<14} {variant:<7} {results[variant]:8.1f} us/request")
+            print(f"{mode:<6} {url:<14} speedup {results['flat'] / results['routed']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Recipe access (owner / shared-with user / public): the cost of the access checks and filters, against a throwaway
+test database.
+
+Seeds --recipes recipes of 100 authors, --private of them private, and shares --shares private recipes with
+the benchmark user, who also authors some. Then times, for the user and for an anonymous requester:
+resolve_access() of a page of 100 recipes, the first and a deep feed page and a search for a common word -
+the lists filtered in SQL.
+Exits with status 1 if resolving a page takes more than 1 query, if a list returns a recipe the requester can't read,
+or if a list is over --max-slowdown times slower for the user than for the anonymous requester.
+
+    python -m benchmarks.recipe_access --recipes 100000 --private 0.1 --shares 500
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import timedelta
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.contrib.auth.models import AnonymousUser  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from recipes.access import Access, resolve_access  # noqa: E402
+from recipes.models import Recipe, RecipeShare  # noqa: E402
+from recipes.search import reindex_recipes, search_recipes  # noqa: E402
+from recipes.summaries import feed_page, refresh_summaries  # noqa: E402
+
+DISHES = ("soup", "stew", "salad", "curry", "pie", "risotto", "casserole", "tart", "roast", "bake")
+BATCH = 5000
+REPEAT = 20
+PAGE_SIZE = 100
+FEED_LIMIT = 20
+
+
+def seed(recipes, private, shares, rng):
+    """Returns the benchmark user and the ids of the recipes they can read"""
+    User = get_user_model()
+    authors = User.objects.bulk_create(
+        [User(username=f"bench_author_{a}", email=f"a{a}@example.com") for a in range(100)]
+    )
+    user = authors[0]
+    now = timezone.now()
+    for start in range(0, recipes, BATCH):
+        created = Recipe.objects.bulk_create([
+            Recipe(
+                author=rng.choice(authors),
+                title=f"{rng.choice(DISHES)} number {r}",
+                is_public=rng.random() >= private,
+            )
+            for r in range(start, min(recipes, start + BATCH))
+        ])
+        for recipe in created:
+            recipe.updated_at = now - timedelta(minutes=(recipe.pk * 7919) % 525_600)
+        Recipe.objects.bulk_update(created, ["updated_at"])
+        # bulk writes send no signals
+        recipe_ids = [recipe.pk for recipe in created]
+        refresh_summaries(recipe_ids)
+        reindex_recipes(recipe_ids)
+        print(f"\rseeded {start + len(created)}/{recipes}", end="", flush=True)
+    print()
+
+    others_private = list(Recipe.objects.filter(is_public=False).exclude(author=user).values_list("id", flat=True))
+    RecipeShare.objects.bulk_create(
+        [RecipeShare(recipe_id=recipe_id, user=user) for recipe_id in rng.sample(others_private, shares)]
+    )
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    readable = set(Recipe.objects.filter(is_public=True).values_list("id", flat=True))
+    readable |= set(Recipe.objects.filter(author=user).values_list("id", flat=True))
+    readable |= set(RecipeShare.objects.filter(user=user).values_list("recipe_id", flat=True))
+    return user, readable
+
+
+def timed(run) -> float:
+    """p50 milliseconds of REPEAT runs"""
+    samples = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=100_000)
+    parser.add_argument("--private", type=float, default=0.1, help="share of private recipes")
+    parser.add_argument("--shares", type=int, default=500, help="private recipes shared with the benchmark user")
+    parser.add_argument("--deep-page", type=int, default=1000, help="feed page timed besides the first one")
+    parser.add_argument("--max-slowdown", type=float, default=3, help="lists of the user vs the anonymous requester")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    settings.DEBUG = False
+    rng = random.Random(args.seed)
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    failed = False
+    try:
+        start = time.perf_counter()
+        user, readable = seed(args.recipes, args.private, args.shares, rng)
+        print(f"{connection.vendor}: {args.recipes} recipes seeded in {time.perf_counter() - start:.1f} s, "
+              f"{len(readable)} readable by the user")
+        requesters = {"anonymous": AnonymousUser(), "user": user}
+        public = set(Recipe.objects.filter(is_public=True).values_list("id", flat=True))
+        readable_by = {"anonymous": public, "user": readable}
+
+        # ---------- PAGE OF OBJECTS ----------
+        # half readable by the user, half any
+        page = rng.sample(sorted(readable), PAGE_SIZE // 2) + rng.sample(range(1, args.recipes), PAGE_SIZE // 2)
+        factory = APIRequestFactory()
+
+        def resolve(requester):
+            request = factory.get("/")
+            request.user = requester
+            return resolve_access(request, page)
+
+        for name, requester in requesters.items():
+            with CaptureQueriesContext(connection) as queries:
+                access = resolve(requester)
+            wrong = [
+                recipe_id for recipe_id, level in access.items()
+                if (level > Access.NONE) != (recipe_id in readable_by[name])
+            ]
+            print(f"resolve_access, {PAGE_SIZE} recipes, {name}: {len(queries)} queries, "
+                  f"{timed(lambda: resolve(requester)):.2f} ms")
+            if len(queries) > 1 or wrong:
+                print(f"FAIL {len(queries)} queries, wrong access of {wrong[:5]}")
+                failed = True
+
+        # ---------- LISTS ----------
+        deep_page = min(args.deep_page, len(public) // FEED_LIMIT // 2) # within the anonymous feed
+        deep = {}
+        for name, requester in requesters.items():
+            after = None
+            for _ in range(deep_page - 1):
+                rows = feed_page(after, FEED_LIMIT, requester)
+                after = (rows[-1]["updated_at"], rows[-1]["recipe_id"])
+            deep[name] = after
+
+        lists = {
+            "feed, page 1": lambda requester, name: feed_page(None, FEED_LIMIT, requester),
+            f"feed, page {deep_page}": lambda requester, name: feed_page(deep[name], FEED_LIMIT, requester),
+            "search 'soup'": lambda requester, name: [
+                {"recipe_id": recipe_id} for recipe_id, _ in search_recipes(["soup"], [], FEED_LIMIT, 0, requester)
+            ],
+        }
+        print(f"{'list':<20}{'anonymous ms':>14}{'user ms':>10}")
+        for label, run in lists.items():
+            ms = {}
+            for name, requester in requesters.items():
+                rows = run(requester, name)
+                leaked = [row["recipe_id"] for row in rows if row["recipe_id"] not in readable_by[name]]
+                if leaked or len(rows) != FEED_LIMIT:
+                    print(f"FAIL {label}, {name}: {len(rows)} rows, unreadable {leaked[:5]}")
+                    failed = True
+                ms[name] = timed(lambda: run(requester, name))
+            print(f"{label:<20}{ms['anonymous']:14.2f}{ms['user']:10.2f}")
+            if ms["user"] > ms["anonymous"] * args.max_slowdown:
+                print(f"FAIL {label} is over {args.max_slowdown}x slower for the user")
+                failed = True
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Recipe detail endpoint: queries per request and latency of the nested document, against a throwaway test database.
+
+Seeds one recipe with --categories x --items ingredients and --steps steps, then GETs /api/v1/recipes/<id>/
+anonymously and as its author (access check and requesterVoted included).
+Exits with status 1 if a request runs more than 2 queries (1 expected on PostgreSQL), or - on PostgreSQL -
+if the single query document differs from the one of the prefetch plan used by the other backends.
+
+    python -m benchmarks.recipe_detail --iterations 2000 --categories 4 --items 8 --steps 12
+"""
+import argparse
+import os
+import sys
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.contrib.auth.models import AnonymousUser  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+from recipes.documents import postgres_document, prefetch_document  # noqa: E402
+from recipes.models import IngredientCategory, IngredientItem, Recipe, RecipeVote, Step  # noqa: E402
+from rest_framework_simplejwt.tokens import AccessToken  # noqa: E402
+
+MAX_QUERIES = 2
+
+
+def seed_recipe(categories, items, steps) -> Recipe:
+    author = get_user_model().objects.create_user(username="bench_author", password="bench")
+    recipe = Recipe.objects.create(
+        author=author, title="Benchmark recipe", description="Seeded", base_servings=4, rating_sum=9, rating_count=2,
+    )
+
+    created = IngredientCategory.objects.bulk_create(
+        [IngredientCategory(recipe=recipe, position=c, title=f"Category {c}" if c else None) for c in range(categories)]
+    )
+    IngredientItem.objects.bulk_create([
+        IngredientItem(category=category, position=i, name=f"ingredient {c}.{i}", amount=i + 0.5, unit="g",
+                       notes="finely chopped" if i % 2 else None)
+        for c, category in enumerate(created)
+        for i in range(items)
+    ])
+    Step.objects.bulk_create(
+        [Step(recipe=recipe, position=s, title=f"Step {s}" if s % 3 == 0 else "", description=f"Do thing {s}")
+         for s in range(steps)]
+    )
+    return recipe
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--categories", type=int, default=3)
+    parser.add_argument("--items", type=int, default=6)
+    parser.add_argument("--steps", type=int, default=8)
+    args = parser.parse_args()
+
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    failed = False
+    try:
+        recipe = seed_recipe(args.categories, args.items, args.steps)
+        url = f"/api/v1/recipes/{recipe.pk}/"
+        client = Client()
+
+        RecipeVote.objects.create(recipe=recipe, user=recipe.author, value=5)
+        auth = {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(recipe.author)}"}
+
+        for requester, headers in (("anonymous", {}), ("author", auth)):
+            client.get(url, **headers) # the author's user row is cached from then on (CachedJWTAuthentication)
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(url, **headers)
+            assert response.status_code == 200, response.content
+
+            print(f"{connection.vendor}, {requester}: {len(queries)} queries per request (max {MAX_QUERIES})")
+            if len(queries) > MAX_QUERIES:
+                print("FAIL too many queries:\n" + "\n".join(query["sql"] for query in queries))
+                failed = True
+
+        if connection.vendor == "postgresql":
+            for user in (AnonymousUser(), recipe.author):
+                same = postgres_document(recipe.pk, user) == prefetch_document(recipe.pk, user)
+                print(f"single query document == prefetch plan document, {user}: {same}")
+                failed |= not same
+
+        anonymous = AnonymousUser()
+        variants = {
+            "endpoint": lambda: client.get(url),
+            "prefetch plan": lambda: prefetch_document(recipe.pk, anonymous),
+        }
+        if connection.vendor == "postgresql":
+            variants["single query"] = lambda: postgres_document(recipe.pk, anonymous)
+
+        for name, run in variants.items():
+            start = time.perf_counter()
+            for _ in range(args.iterations):
+                run()
+            elapsed = (time.perf_counter() - start) / args.iterations * 1e6
+            print(f"{name:<14} {elapsed:8.1f} us")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Recipe feed: latency of deep pages, keyset on RecipeSummary vs OFFSET on recipes + users, against a throwaway
+test database.
+
+Seeds --recipes recipes (default 100k) with their summaries, then GETs /api/v1/recipes/feed/ walking the cursor
+down to the deepest page of --depths, timing the pages at each depth, and runs the OFFSET query of the same page
+(recipes JOIN users ORDER BY updated_at DESC, id DESC LIMIT .. OFFSET ..) for comparison.
+Exits with status 1 if a page runs more than 1 query (anonymous), or if the deepest keyset page is over
+--max-slowdown times slower than the first one.
+
+    python -m benchmarks.recipe_feed --recipes 100000 --limit 20 --depths 1,10,100,1000,4000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import timedelta
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from recipes.documents import SUMMARY_FIELDS  # noqa: E402
+from recipes.models import Recipe  # noqa: E402
+from recipes.summaries import refresh_summaries  # noqa: E402
+
+BATCH = 5000
+REPEAT = 20
+
+
+def seed(recipes):
+    User = get_user_model()
+    authors = User.objects.bulk_create([User(username=f"bench_author_{a}", email=f"a{a}@example.com") for a in range(100)])
+    now = timezone.now()
+    for start in range(0, recipes, BATCH):
+        created = Recipe.objects.bulk_create([
+            Recipe(author=authors[r % len(authors)], title=f"Recipe {r}", base_servings=r % 6 + 1)
+            for r in range(start, min(recipes, start + BATCH))
+        ])
+        # spread over a year, some on the same microsecond - ties are broken by id
+        for recipe in created:
+            recipe.updated_at = now - timedelta(minutes=(recipe.pk * 7919) % 525_600)
+        Recipe.objects.bulk_update(created, ["updated_at"])
+        # bulk writes send no signals
+        refresh_summaries(recipe.pk for recipe in created)
+        print(f"\rseeded {start + len(created)}/{recipes}", end="", flush=True)
+    print()
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+
+def offset_page(page, limit):
+    return list(
+        Recipe.objects.order_by("-updated_at", "-id").values(*SUMMARY_FIELDS)[page * limit:(page + 1) * limit]
+    )
+
+
+def timed(run) -> float:
+    """p50 milliseconds of REPEAT runs"""
+    samples = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--depths", default="1,10,100,1000,4000", help="pages timed, comma separated")
+    parser.add_argument("--max-slowdown", type=float, default=2, help="deepest keyset page vs the first one")
+    args = parser.parse_args()
+
+    settings.THROTTLING["RATES"] = {}
+    depths = sorted(int(depth) for depth in args.depths.split(","))
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    failed = False
+    try:
+        start = time.perf_counter()
+        seed(args.recipes)
+        print(f"{connection.vendor}: {args.recipes} recipes and summaries seeded in {time.perf_counter() - start:.1f} s")
+
+        client = Client()
+        url = "/api/v1/recipes/feed/"
+        client.get(url) # loads the URLconf and views
+
+        print(f"{'page':>6}{'keyset ms':>11}{'offset ms':>11}")
+        cursor, page, keyset_ms = None, 1, {}
+        while page <= depths[-1]:
+            params = {"limit": args.limit} | ({"cursor": cursor} if cursor else {})
+            if page in depths:
+                with CaptureQueriesContext(connection) as queries:
+                    client.get(url, params)
+                if len(queries) > 1:
+                    print(f"FAIL page {page} ran {len(queries)} queries")
+                    failed = True
+                keyset_ms[page] = timed(lambda: client.get(url, params))
+                print(f"{page:>6}{keyset_ms[page]:11.2f}{timed(lambda: offset_page(page - 1, args.limit)):11.2f}")
+
+            cursor = client.get(url, params).json()["payload"]["nextCursor"]
+            if cursor is None:
+                break
+            page += 1
+
+        deepest = keyset_ms[max(keyset_ms)]
+        if deepest > keyset_ms[min(keyset_ms)] * args.max_slowdown:
+            print(f"FAIL page {max(keyset_ms)} is over {args.max_slowdown}x slower than page {min(keyset_ms)}")
+            failed = True
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Recipe image uploads: memory of the streamed upload and the render pool's throughput, against a throwaway
+test database and image directory.
+
+Generates --images distinct JPEG photos of --width x --height pixels (noise, so they don't compress to nothing),
+then for each of them times, the way RecipeImageView.put does it:
+  upload - recipes.images.store_upload() from a file stream (hash + write to disk + header check), peak memory
+           traced with tracemalloc - it has to stay a few chunks, whatever the size of the file
+  submit - the request side of the render: submit_render() with the pool of --workers processes
+and waits for all the renders, which gives the pool's throughput. The same renders run inline (WORKERS 0, in the
+request thread) for comparison.
+Exits with status 1 if a render fails, if a variant is missing or upscaled, or if an upload's peak memory is over
+--max-upload-mib.
+
+    python -m benchmarks.recipe_images --images 16 --width 4000 --height 3000 --workers 4
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from recipes import images  # noqa: E402
+from recipes.models import RecipeImage  # noqa: E402
+
+
+def make_photo(width, height, seed) -> bytes:
+    noise = Image.effect_noise((width // 4, height // 4), 64).resize((width, height))
+    gradient = Image.linear_gradient("L").resize((width, height)).rotate(seed * 37 % 360)
+    photo = Image.merge("RGB", (noise, gradient, Image.new("L", (width, height), seed * 13 % 256)))
+    buffer = io.BytesIO()
+    photo.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def upload(path) -> tuple[str, float, float]:
+    """(key, seconds, peak MiB) of storing the file as an upload"""
+    with open(path, "rb") as stream:
+        tracemalloc.start()
+        start = time.perf_counter()
+        key, width, height = images.store_upload(stream)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    RecipeImage.objects.create(key=key, width=width, height=height)
+    return key, elapsed, peak / 2**20
+
+
+def render_all(keys, workers) -> tuple[float, float]:
+    """(seconds of the slowest submit, seconds until every render is done)"""
+    images.image_settings["WORKERS"] = workers
+    RecipeImage.objects.filter(key__in=keys).update(status=RecipeImage.Status.PENDING)
+    images.start_image_pool()
+    if workers:
+        images.get_executor().submit(images._noop).result() # started, not timed
+
+    start = time.perf_counter()
+    futures, slowest = [], 0
+    for key in keys:
+        submitted = time.perf_counter()
+        images.reserve_render()
+        futures.append(images.submit_render(key))
+        slowest = max(slowest, time.perf_counter() - submitted)
+    for future in futures:
+        future.result()
+    return slowest, time.perf_counter() - start
+
+
+def check_variants(keys) -> list[str]:
+    problems = []
+    for image in RecipeImage.objects.filter(key__in=keys):
+        if image.status != RecipeImage.Status.READY:
+            problems.append(f"{image.key[:12]} {image.status}")
+            continue
+        for name in images.image_settings["WIDTHS"]:
+            for extension in ("webp", "jpg"):
+                path = images.variant_path(image.key, f"{name}.{extension}")
+                if not path.exists():
+                    problems.append(f"{path} missing")
+                elif Image.open(path).width != min(name, image.width):
+                    problems.append(f"{path} is {Image.open(path).width} wide")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=16)
+    parser.add_argument("--width", type=int, default=4000)
+    parser.add_argument("--height", type=int, default=3000)
+    parser.add_argument("--workers", type=int, default=4, help="processes of the render pool")
+    parser.add_argument("--max-upload-mib", type=float, default=1, help="peak memory of one upload")
+    args = parser.parse_args()
+
+    settings.DEBUG = False
+    workdir = Path(tempfile.mkdtemp(prefix="recipe_images_"))
+    # the pool's processes read the settings from the environment - the test database and directory included
+    os.environ["RECIPE_IMAGES_ROOT"] = str(workdir / "images")
+    images.image_settings["ROOT"] = workdir / "images"
+    images.image_settings["QUEUE_DEPTH"] = args.images
+    if connection.vendor == "sqlite":
+        connection.settings_dict["TEST"]["NAME"] = str(workdir / "test.sqlite3") # not in memory - shared
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    os.environ["DB_NAME"] = connection.settings_dict["NAME"]
+    failed = False
+    try:
+        paths = []
+        for n in range(args.images):
+            path = workdir / f"photo_{n}.jpg"
+            path.write_bytes(make_photo(args.width, args.height, n))
+            paths.append(path)
+        photo_mib = sum(path.stat().st_size for path in paths) / len(paths) / 2**20
+        print(f"{connection.vendor}: {args.images} photos of {args.width}x{args.height}, {photo_mib:.1f} MiB each")
+
+        uploads = [upload(path) for path in paths]
+        keys = [key for key, _, _ in uploads]
+        upload_ms = max(seconds for _, seconds, _ in uploads) * 1000
+        upload_mib = max(mib for _, _, mib in uploads)
+        print(f"upload: slowest {upload_ms:.1f} ms, peak {upload_mib:.2f} MiB")
+        if upload_mib > args.max_upload_mib:
+            print(f"FAIL an upload peaked at {upload_mib:.2f} MiB, over {args.max_upload_mib} MiB")
+            failed = True
+
+        print(f"{'render':<12}{'slowest submit ms':>19}{'total s':>9}{'images/s':>10}")
+        for label, workers in (("inline", 0), (f"pool of {args.workers}", args.workers)):
+            slowest, total = render_all(keys, workers)
+            print(f"{label:<12}{slowest * 1000:19.1f}{total:9.2f}{args.images / total:10.1f}")
+            if problems := check_variants(keys):
+                print(f"FAIL {label}: {problems[:5]}")
+                failed = True
+    finally:
+        if images._executor is not None:
+            images._executor.shutdown()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        for path in sorted(workdir.rglob("*"), reverse=True):
+            path.rmdir() if path.is_dir() else path.unlink()
+        workdir.rmdir()
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
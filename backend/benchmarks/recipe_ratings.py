@@ -0,0 +1,136 @@
+"""
+Recipe votes: throughput of concurrent votes, drift of the counts on the recipe rows and the requesterVoted lookup,
+against a throwaway test database.
+
+Seeds --recipes recipes and --users users, then --threads threads cast/change/remove --votes random votes each
+(popular recipes get most of them, so the same rows are updated concurrently). Afterwards every recipe is recounted
+from its votes (reconcile_batch with dry_run) - any drift is a lost update. Then times requesterVoted for a page.
+Exits with status 1 on drift, or if requesterVoted of a page takes more than one query.
+
+    python -m benchmarks.recipe_ratings --recipes 10000 --users 200 --threads 8 --votes 500
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+from recipes.models import Recipe, RecipeVote  # noqa: E402
+from recipes.ratings import cast_vote, reconcile_batch, remove_vote, requester_voted  # noqa: E402
+
+PAGE_SIZE = 100
+
+
+def seed(recipes, users):
+    User = get_user_model()
+    created_users = User.objects.bulk_create(
+        [User(username=f"bench_voter_{u}", email=f"voter{u}@example.com") for u in range(users)]
+    )
+    created_recipes = Recipe.objects.bulk_create(
+        [Recipe(author=created_users[0], title=f"Recipe {r}") for r in range(recipes)]
+    )
+    return created_users, [recipe.pk for recipe in created_recipes]
+
+
+def voter(users, recipe_ids, votes, seed, samples, errors):
+    rng = random.Random(seed)
+    popular = recipe_ids[:20]
+    try:
+        for _ in range(votes):
+            user = rng.choice(users)
+            recipe_id = rng.choice(popular) if rng.random() < 0.7 else rng.choice(recipe_ids)
+            start = time.perf_counter()
+            if rng.random() < 0.1:
+                remove_vote(recipe_id, user)
+            else:
+                cast_vote(recipe_id, user, rng.randint(1, 5))
+            samples.append((time.perf_counter() - start) * 1000)
+    except Exception as e: # reported, the other threads go on
+        errors.append(repr(e))
+    finally:
+        connections.close_all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=10_000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8, help="1 on SQLite, which has one writer at a time")
+    parser.add_argument("--votes", type=int, default=500, help="per thread")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    threads = args.threads if connection.vendor == "postgresql" else 1
+    rng = random.Random(args.seed)
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    failed = False
+    try:
+        users, recipe_ids = seed(args.recipes, args.users)
+
+        # ---------- VOTES ----------
+        samples, errors = [], []
+        workers = [
+            threading.Thread(target=voter, args=(users, recipe_ids, args.votes, rng.random(), samples, errors))
+            for _ in range(threads)
+        ]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+
+        samples.sort()
+        print(f"{connection.vendor}: {len(samples)} votes by {threads} threads, {len(samples) / elapsed:.0f} votes/s, "
+              f"p50 {statistics.median(samples):.2f} ms, p95 {samples[int(len(samples) * 0.95)]:.2f} ms")
+        if errors:
+            print(f"FAIL {len(errors)} threads failed: {errors[0]}")
+            failed = True
+
+        # ---------- DRIFT ----------
+        start = time.perf_counter()
+        last_id, checked, drifted = 0, 0, []
+        while True:
+            last_id, count, batch = reconcile_batch(last_id, 1000, dry_run=True)
+            if last_id is None:
+                break
+            checked += count
+            drifted += batch
+        print(f"recounted {checked} recipes ({RecipeVote.objects.count()} votes) in "
+              f"{time.perf_counter() - start:.2f} s, drifted: {len(drifted)}")
+        if drifted:
+            print(f"FAIL lost updates, first: {drifted[0]}")
+            failed = True
+
+        # ---------- REQUESTER VOTED ----------
+        user = RecipeVote.objects.values_list("user_id", flat=True).first()
+        user = next(u for u in users if u.pk == user)
+        page = recipe_ids[:PAGE_SIZE]
+        with CaptureQueriesContext(connection) as queries:
+            voted = requester_voted(user, page)
+        start = time.perf_counter()
+        for _ in range(200):
+            requester_voted(user, page)
+        print(f"requesterVoted of a {PAGE_SIZE} recipe page: {len(voted)} voted, {len(queries)} queries, "
+              f"{(time.perf_counter() - start) / 200 * 1000:.2f} ms")
+        failed |= len(queries) != 1
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
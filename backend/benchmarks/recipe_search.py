@@ -0,0 +1,180 @@
+"""
+Recipe search latency on a large catalogue, against a throwaway test database.
+
+Seeds --recipes recipes (default 100k) written from a Zipf distributed vocabulary, with --items ingredients and
+--steps steps each, builds the search data (tsvectors on PostgreSQL, the in-process index elsewhere), then runs
+GET /api/v1/recipes/search/ for common/rare words, prefixes, "must contain these ingredients" and combined queries.
+Reports p50/p95/p99 per query kind and the cost of a write (save + reindex after commit).
+Exits with status 1 if a p95 is over --max-p95 milliseconds or a saved recipe is not found by its new words.
+
+    python -m benchmarks.recipe_search --recipes 100000 --queries 200
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from django.test import Client  # noqa: E402
+
+from recipes.models import IngredientCategory, IngredientItem, Recipe, Step  # noqa: E402
+from recipes.search import reindex_recipes  # noqa: E402
+from recipes.search_index import search_index  # noqa: E402
+
+INGREDIENTS = (
+    "garlic", "onion", "tomato", "olive oil", "butter", "flour", "sugar", "salt", "black pepper", "egg", "milk",
+    "chicken breast", "ground beef", "pork shoulder", "salmon", "shrimp", "rice", "pasta", "potato", "carrot",
+    "celery", "bell pepper", "chili", "ginger", "lemon", "lime", "parsley", "basil", "thyme", "rosemary", "cumin",
+    "paprika", "cinnamon", "honey", "soy sauce", "vinegar", "mushroom", "spinach", "zucchini", "eggplant",
+    "chickpeas", "lentils", "coconut milk", "cream", "parmesan", "mozzarella", "cheddar", "yogurt", "bread", "apple",
+)
+ADJECTIVES = ("fresh", "dried", "chopped", "smoked", "roasted", "ground", "cherry", "red", "green", "sweet")
+DISHES = ("soup", "stew", "salad", "curry", "pie", "risotto", "casserole", "stir fry", "tart", "roast", "bake")
+SYLLABLES = ("ka", "lo", "mi", "ren", "tu", "sa", "bo", "chi", "de", "fa", "gu", "ho", "ja", "ne", "pi", "ro", "ve")
+
+BATCH = 5000
+
+
+def vocabulary(size, rng) -> list[str]:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def seed(recipes, items, steps, rng) -> list[str]:
+    """Creates the catalogue, returns its vocabulary - most common word first"""
+    words = vocabulary(5000, rng)
+    rng.shuffle(words)
+    cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+
+    def sentence(length):
+        return " ".join(rng.choices(words, cum_weights=cum_weights, k=length))
+
+    author = get_user_model().objects.create_user(username="bench_author", password="bench")
+    for start in range(0, recipes, BATCH):
+        count = min(BATCH, recipes - start)
+        created = Recipe.objects.bulk_create([
+            Recipe(
+                author=author,
+                title=f"{rng.choice(ADJECTIVES)} {rng.choice(INGREDIENTS)} {rng.choice(DISHES)} {sentence(1)}",
+                description=sentence(20),
+                base_servings=rng.randint(1, 8),
+            )
+            for _ in range(count)
+        ])
+        categories = IngredientCategory.objects.bulk_create(
+            [IngredientCategory(recipe=recipe, position=0) for recipe in created]
+        )
+        IngredientItem.objects.bulk_create([
+            IngredientItem(category=category, position=i, name=f"{rng.choice(ADJECTIVES)} {name}", amount=1, unit="g")
+            for category in categories
+            for i, name in enumerate(rng.sample(INGREDIENTS, items))
+        ])
+        Step.objects.bulk_create([
+            Step(recipe=recipe, position=s, description=sentence(12)) for recipe in created for s in range(steps)
+        ])
+        # bulk_create sends no signals
+        reindex_recipes([recipe.pk for recipe in created])
+        print(f"\rseeded {start + count}/{recipes}", end="", flush=True)
+    print()
+
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+    return words
+
+
+def query_kinds(words, rng) -> dict[str, callable]:
+    common, rare = words[:20], words[1000:]
+    return {
+        "common word": lambda: {"q": rng.choice(common)},
+        "rare word": lambda: {"q": rng.choice(rare)},
+        "two words": lambda: {"q": f"{rng.choice(common)} {rng.choice(words[:300])}"},
+        "prefix": lambda: {"q": rng.choice(common)[:3]},
+        "title words": lambda: {"q": f"{rng.choice(INGREDIENTS)} {rng.choice(DISHES)}"},
+        "ingredients": lambda: {"ingredients": ",".join(rng.sample(INGREDIENTS, 2))},
+        "3 ingredients": lambda: {"ingredients": ",".join(rng.sample(INGREDIENTS, 3))},
+        "words+ingredient": lambda: {"q": rng.choice(DISHES), "ingredients": rng.choice(INGREDIENTS)},
+        "page 5": lambda: {"q": rng.choice(common), "offset": 80},
+    }
+
+
+def percentile(samples, fraction) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=100_000)
+    parser.add_argument("--items", type=int, default=8)
+    parser.add_argument("--steps", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200, help="requests per query kind")
+    parser.add_argument("--max-p95", type=float, default=50, help="milliseconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    settings.THROTTLING["RATES"] = {}
+    rng = random.Random(args.seed)
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    failed = False
+    try:
+        start = time.perf_counter()
+        words = seed(args.recipes, args.items, args.steps, rng)
+        print(f"{connection.vendor}: {args.recipes} recipes seeded and indexed in {time.perf_counter() - start:.1f} s")
+
+        client = Client()
+        if connection.vendor != "postgresql":
+            start = time.perf_counter()
+            search_index.rebuild()
+            print(f"in-process index built from the DB in {time.perf_counter() - start:.1f} s")
+        client.get("/api/v1/recipes/search/", {"q": words[0]}) # loads the URLconf and views
+
+        print(f"{'query':<18}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'results':>9}")
+        for kind, make_params in query_kinds(words, rng).items():
+            samples, results = [], 0
+            for _ in range(args.queries):
+                params = make_params()
+                start = time.perf_counter()
+                response = client.get("/api/v1/recipes/search/", params)
+                samples.append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200, response.content
+                results += len(response.json()["payload"]["results"])
+            samples.sort()
+            p95 = percentile(samples, 0.95)
+            print(f"{kind:<18}{statistics.median(samples):9.2f}{p95:9.2f}{percentile(samples, 0.99):9.2f}"
+                  f"{results / args.queries:9.1f}")
+            if p95 > args.max_p95:
+                print(f"FAIL {kind} p95 over {args.max_p95} ms")
+                failed = True
+
+        # write path: a saved recipe is searchable by its new words right after commit
+        recipe = Recipe.objects.order_by("?").first()
+        start = time.perf_counter()
+        with transaction.atomic():
+            recipe.title = "zzbenchmarkword"
+            recipe.save()
+            Step.objects.filter(recipe=recipe).first().save() # one reindex per transaction, not per row
+        write = (time.perf_counter() - start) * 1000
+        found = client.get("/api/v1/recipes/search/", {"q": "zzbenchmark"}).json()["payload"]["results"]
+        print(f"save + reindex {write:.2f} ms, found by the new title: {[r['id'] for r in found] == [str(recipe.pk)]}")
+        failed |= [r["id"] for r in found] != [str(recipe.pk)]
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Recipe NDJSON import/export: throughput and memory at growing stream sizes, against a throwaway test database.
+
+For each of --sizes, writes an NDJSON file of that many recipes (--items ingredient items and --steps steps each),
+imports it (recipes.transfer.import_recipes, as `manage.py import_recipes` does) as the recipes of a new user,
+then exports them (export_lines, the body of GET /api/v1/recipes/export/) into a byte counter, and again with
+aexport_lines (the body under ASGI).
+Peak memory is traced with tracemalloc, above what was allocated before each run.
+Exits with status 1 if a line fails, if the export doesn't return every imported recipe, or if the peak of the
+largest size is over --max-growth times the peak of the smallest one - memory has to stay flat, not follow the stream.
+
+    python -m benchmarks.recipe_transfer --sizes 10000,100000
+    python -m benchmarks.recipe_transfer --sizes 100000,1000000  # the target scale, takes a while
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import django
+from asgiref.sync import sync_to_async
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+
+from config.renderers import dumps  # noqa: E402
+from recipes.models import Recipe  # noqa: E402
+from recipes.transfer import aexport_lines, export_lines, import_recipes  # noqa: E402
+
+
+def write_stream(path, recipes, items, steps):
+    with open(path, "wb") as file:
+        for r in range(recipes):
+            file.write(dumps({
+                "title": f"Recipe {r}",
+                "description": f"Description of recipe {r}, " * 4,
+                "details": {"baseServings": r % 6 + 1},
+                "ingredients": [
+                    {
+                        "title": f"Part {c}",
+                        "items": [
+                            {"name": f"ingredient {(r + i) % 500}", "amount": i + 0.5, "unit": "g", "notes": None}
+                            for i in range(c, items, 2)
+                        ],
+                    }
+                    for c in range(2)
+                ],
+                "steps": [{"title": f"Step {s}", "description": f"Do step {s} of recipe {r}"} for s in range(steps)],
+            }) + b"\n")
+
+
+def traced(run):
+    """(result, seconds, peak MiB above the memory allocated before the run)"""
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, (peak - baseline) / 2**20
+
+
+def export_bytes(recipes) -> tuple[int, int]:
+    lines = size = 0
+    for line in export_lines(recipes):
+        lines += 1
+        size += len(line)
+    return lines, size
+
+
+def aexport_bytes(recipes) -> tuple[int, int]:
+    async def run():
+        lines = size = 0
+        async for line in aexport_lines(recipes):
+            lines += 1
+            size += len(line)
+        await sync_to_async(connections.close_all)() # of the thread the chunks were read in
+        return lines, size
+
+    return asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000", help="recipes per stream, comma separated")
+    parser.add_argument("--items", type=int, default=10, help="ingredient items per recipe, in 2 categories")
+    parser.add_argument("--steps", type=int, default=5, help="steps per recipe")
+    parser.add_argument("--max-growth", type=float, default=1.5, help="peak memory, largest size vs the smallest")
+    args = parser.parse_args()
+
+    settings.DEBUG = False # the debug cursor keeps the SQL of the last queries - bulk INSERTs are long
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    failed = False
+    peaks = {}
+    try:
+        print(
+            f"{'recipes':>9}{'import/s':>10}{'import MiB':>12}{'export/s':>10}{'export MiB':>12}"
+            f"{'aexport/s':>11}{'aexport MiB':>13}{'NDJSON MiB':>12}"
+        )
+        for size in sizes:
+            author = get_user_model().objects.create(username=f"bench_importer_{size}", email=f"i{size}@example.com")
+            with tempfile.NamedTemporaryFile(suffix=".ndjson") as file:
+                write_stream(file.name, size, args.items, args.steps)
+                errors = []
+                with open(file.name, "rb") as stream:
+                    (imported, failed_lines), import_s, import_mib = traced(
+                        lambda: import_recipes(stream, author, lambda line, line_errors: errors.append(line))
+                    )
+            if failed_lines or imported != size:
+                print(f"FAIL {size}: {imported} imported, {failed_lines} lines failed (first: {errors[:1]})")
+                failed = True
+
+            (lines, exported_bytes), export_s, export_mib = traced(
+                lambda: export_bytes(Recipe.objects.filter(author=author))
+            )
+            (alines, aexported_bytes), aexport_s, aexport_mib = traced(
+                lambda: aexport_bytes(Recipe.objects.filter(author=author))
+            )
+            for label, exported in (("exported", lines), ("exported async", alines)):
+                if exported != imported:
+                    print(f"FAIL {size}: {exported} recipes {label} of {imported}")
+                    failed = True
+            if aexported_bytes != exported_bytes:
+                print(f"FAIL {size}: the async export is {aexported_bytes} bytes, the export {exported_bytes}")
+                failed = True
+
+            peaks[size] = max(import_mib, export_mib, aexport_mib)
+            print(f"{size:>9}{size / import_s:10.0f}{import_mib:12.1f}{size / export_s:10.0f}{export_mib:12.1f}"
+                  f"{size / aexport_s:11.0f}{aexport_mib:13.1f}{exported_bytes / 2**20:12.1f}")
+
+        if peaks[sizes[-1]] > peaks[sizes[0]] * args.max_growth:
+            print(f"FAIL peak memory of {sizes[-1]} recipes is over {args.max_growth}x the peak of {sizes[0]}")
+            failed = True
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Response encoding: DRF's content negotiation + JSONRenderer vs APIContentNegotiation + APIRenderer,
+for the MeView and LoginView envelopes. No database needed, only negotiation and rendering are timed.
+
+    python -m benchmarks.renderers --iterations 200000
+"""
+import argparse
+import os
+import timeit
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from rest_framework.negotiation import DefaultContentNegotiation  # noqa: E402
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer  # noqa: E402
+from rest_framework.request import Request  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from config.renderers import APIContentNegotiation, APIRenderer, orjson  # noqa: E402
+from config.response_codes import SC  # noqa: E402
+from config.responses import api_response  # noqa: E402
+
+USER = {"id": 42, "username": "benchmark_user", "email": "benchmark@example.com"}
+
+ENVELOPES = {
+    "me": lambda: api_response(success=True, code=SC.Auth.GENERIC, payload={"user": USER}),
+    "login": lambda: api_response(
+        success=True,
+        code=SC.Auth.LOGIN_SUCCESS,
+        payload={"access_token": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9." + "x" * 180, "user": USER},
+    ),
+}
+
+
+def encode(negotiation, renderers, request, response):
+    renderer, media_type = negotiation.select_renderer(request, renderers)
+    return renderer.render(response.data, media_type, {})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=100_000)
+    args = parser.parse_args()
+
+    # axios' default Accept header
+    request = Request(APIRequestFactory().get("/api/v1/auth/me/", HTTP_ACCEPT="application/json, text/plain, */*"))
+
+    variants = {
+        "drf": (DefaultContentNegotiation(), [JSONRenderer(), BrowsableAPIRenderer()]),
+        "api": (APIContentNegotiation(), [APIRenderer(), BrowsableAPIRenderer()]),
+    }
+
+    print(f"encoder: {'orjson' if orjson else 'json'}, {args.iterations} iterations")
+    for name, build in ENVELOPES.items():
+        response = build()
+        results = {}
+        for variant, (negotiation, renderers) in variants.items():
+            assert encode(*variants["drf"], request, response) == encode(negotiation, renderers, request, response)
+            seconds = timeit.timeit(
+                lambda: encode(negotiation, renderers, request, response), number=args.iterations
+            )
+            results[variant] = seconds / args.iterations * 1e6
+            print(f"{name:<6} {variant:<4} {results[variant]:7.3f} us/response")
+        print(f"{name:<6} speedup {results['drf'] / results['api']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
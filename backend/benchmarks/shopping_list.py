@@ -0,0 +1,166 @@
+"""
+Shopping list: merge cost of large inputs and latency of the endpoint, against a throwaway test database.
+
+Merges --items synthetic ingredient items (default 10k) with recipes.shopping.merge_items and with a per item
+dict implementation, checks both lists are the same and reports the time of each. Then seeds --recipes recipes
+(a week of meals and more) and POSTs them all to /api/v1/recipes/shopping-list/.
+Exits with status 1 if the lists differ, the endpoint runs more than 1 query or its p95 is over --max-ms.
+
+    python -m benchmarks.shopping_list --items 10000 --recipes 60
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+from recipes.models import IngredientCategory, IngredientItem, Recipe  # noqa: E402
+from recipes.shopping import AMOUNT_DIGITS, DISPLAY_UNITS, merge_items, normalize_unit  # noqa: E402
+
+MAX_QUERIES = 1
+
+NAMES = (
+    "Garlic", "Onion", "Tomato", "Olive oil", "Butter", "Flour", "Sugar", "Salt", "Egg", "Milk", "Rice", "Pasta",
+    "Potato", "Carrot", "Lemon", "Parsley", "Cumin", "Honey", "Cream", "Parmesan", "Chicken breast", "Salmon",
+)
+UNITS = ("g", "kg", "dag", "oz", "lb", "ml", "l", "tsp", "tbsp", "cup", "", "pcs", "clove", "pinch", "bunch")
+
+
+def merge_items_per_item(recipe_ids, names, amounts, units, scales) -> list[dict]:
+    """The reference - one dict update per item"""
+    totals, shown_names = {}, {}
+    for recipe_id, name, amount, unit in zip(recipe_ids, names, amounts, units):
+        base_unit, factor = normalize_unit(unit)
+        key = (name.strip().lower(), base_unit)
+        shown_names.setdefault(key[0], name.strip())
+        totals[key] = totals.get(key, 0.0) + amount * scales[recipe_id] * factor
+
+    entries = []
+    for key in sorted(totals):
+        amount, unit = totals[key], key[1]
+        if unit in DISPLAY_UNITS and amount >= DISPLAY_UNITS[unit][1]:
+            unit, factor = DISPLAY_UNITS[unit]
+            amount /= factor
+        entries.append({"name": shown_names[key[0]], "amount": round(amount, AMOUNT_DIGITS), "unit": unit})
+    return entries
+
+
+def columns(items, recipes, rng):
+    recipe_ids = [rng.randrange(recipes) for _ in range(items)]
+    names = [rng.choice(NAMES) if rng.random() < 0.8 else rng.choice(NAMES).lower() + " " for _ in range(items)]
+    amounts = [rng.choice((0.5, 1, 2, 3, 100, 250)) for _ in range(items)]
+    units = [rng.choice(UNITS) for _ in range(items)]
+    scales = {recipe_id: rng.randint(1, 8) / rng.randint(1, 4) for recipe_id in range(recipes)}
+    return recipe_ids, names, amounts, units, scales
+
+
+def timed(run, iterations, rounds=5) -> float:
+    """Milliseconds per run, the best of `rounds`"""
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            run()
+        best = min(best, (time.perf_counter() - start) / iterations * 1000)
+    return best
+
+
+def seed(recipes, items, rng) -> list[int]:
+    author = get_user_model().objects.create_user(username="bench_author", password="bench")
+    created = Recipe.objects.bulk_create(
+        [Recipe(author=author, title=f"Recipe {r}", base_servings=rng.randint(1, 6)) for r in range(recipes)]
+    )
+    categories = IngredientCategory.objects.bulk_create(
+        [IngredientCategory(recipe=recipe, position=c) for recipe in created for c in range(2)]
+    )
+    IngredientItem.objects.bulk_create([
+        IngredientItem(category=category, position=i, name=rng.choice(NAMES), amount=rng.randint(1, 500),
+                       unit=rng.choice(UNITS))
+        for category in categories
+        for i in range(items // 2)
+    ])
+    return [recipe.pk for recipe in created]
+
+
+def percentile(samples, fraction) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=10_000, help="items of the merge benchmark")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--recipes", type=int, default=60, help="recipes POSTed to the endpoint")
+    parser.add_argument("--recipe-items", type=int, default=12)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--max-ms", type=float, default=10, help="p95 of the endpoint")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    settings.THROTTLING["RATES"] = {}
+    rng = random.Random(args.seed)
+    failed = False
+
+    # ---------- MERGE ----------
+    data = columns(args.items, max(1, args.items // 8), rng)
+    same = all(
+        (entry["name"], entry["unit"]) == (reference["name"], reference["unit"])
+        and abs(entry["amount"] - reference["amount"]) <= 10 ** -AMOUNT_DIGITS # summed in another order
+        for entry, reference in zip(merge_items(*data), merge_items_per_item(*data), strict=True)
+    )
+    print(f"merge of {args.items} items, same list as the per item reference: {same}")
+    failed |= not same
+    for name, merge in (("merge_items", merge_items), ("per item dicts", merge_items_per_item)):
+        print(f"{name:<16}{timed(lambda: merge(*data), args.iterations):8.2f} ms")
+
+    # ---------- ENDPOINT ----------
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        recipe_ids = seed(args.recipes, args.recipe_items, rng)
+        body = json.dumps({"recipes": [{"id": recipe_id, "servings": rng.randint(1, 8)} for recipe_id in recipe_ids]})
+        client = Client()
+
+        def post():
+            response = client.post("/api/v1/recipes/shopping-list/", body, content_type="application/json")
+            assert response.status_code == 200, response.content
+            return response
+
+        with CaptureQueriesContext(connection) as queries:
+            items = post().json()["payload"]["items"]
+        print(f"{connection.vendor}: {args.recipes} recipes x {args.recipe_items} items -> {len(items)} entries, "
+              f"{len(queries)} queries (max {MAX_QUERIES})")
+        failed |= len(queries) > MAX_QUERIES
+
+        samples = []
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            post()
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        p95 = percentile(samples, 0.95)
+        print(f"endpoint p50 {statistics.median(samples):.2f} ms, p95 {p95:.2f} ms, p99 {percentile(samples, 0.99):.2f} ms")
+        if p95 > args.max_ms:
+            print(f"FAIL endpoint p95 over {args.max_ms} ms")
+            failed = True
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
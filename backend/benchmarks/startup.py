@@ -0,0 +1,138 @@
+"""
+Worker cold start of the full profile vs the API-only one (settings.API_ONLY), for config.wsgi and config.asgi.
+
+Every run is a fresh `python -X importtime` process that imports the entrypoint the way a server worker does,
+then serves one anonymous GET /api/v1/auth/me/ (the URLconf and views load on the first request). Reported, median of
+the runs: process wall time, import time of the entrypoint, first request, -X importtime total, modules loaded, max RSS.
+The hashing pool, token maintenance scheduler and DB pool warm-up are switched off - only Django and the app are measured.
+
+    python -m benchmarks.startup --runs 7
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ENTRYPOINTS = ("config.wsgi", "config.asgi")
+PROFILES = {"full": "False", "api-only": "True"}
+
+# Runs in the measured process - nothing imported before the entrypoint but the stdlib
+CHILD = r"""
+import asyncio, importlib, io, json, resource, sys, time
+
+start = time.perf_counter()
+application = importlib.import_module(sys.argv[1]).application
+imported = time.perf_counter() - start
+
+start = time.perf_counter()
+if sys.argv[1] == "config.wsgi":
+    environ = {
+        "REQUEST_METHOD": "GET", "PATH_INFO": "/api/v1/auth/me/", "QUERY_STRING": "", "SERVER_NAME": "localhost",
+        "SERVER_PORT": "80", "HTTP_HOST": "localhost", "wsgi.input": io.BytesIO(), "wsgi.url_scheme": "http",
+    }
+    status = []
+    b"".join(application(environ, lambda code, headers, exc_info=None: status.append(code)))
+    status = int(status[0].split()[0])
+else:
+    scope = {
+        "type": "http", "method": "GET", "path": "/api/v1/auth/me/", "query_string": b"", "headers": [(b"host", b"localhost")],
+        "http_version": "1.1", "scheme": "http", "server": ("localhost", 80), "client": ("127.0.0.1", 1),
+    }
+    messages = []
+
+    async def main():
+        received, done = asyncio.Event(), asyncio.Event()
+
+        async def receive():
+            if received.is_set(): # only a disconnect after the body, once the response is out
+                await done.wait()
+                return {"type": "http.disconnect"}
+            received.set()
+            return {"type": "http.request", "body": b""}
+
+        async def send(message):
+            messages.append(message)
+            if message["type"] == "http.response.body" and not message.get("more_body"):
+                done.set()
+
+        await application(scope, receive, send)
+
+    asyncio.run(main())
+    status = messages[0]["status"]
+first_request = time.perf_counter() - start
+
+print(json.dumps({
+    "import_ms": imported * 1000,
+    "first_request_ms": first_request * 1000,
+    "status": status,
+    "modules": len(sys.modules),
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}))
+"""
+
+
+def importtime_total_ms(stderr: str) -> float:
+    """Sum of the cumulative times of the top level imports in `-X importtime` output"""
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not name[1:].startswith(" "): # nested imports are indented
+            total += int(cumulative)
+    return total / 1000
+
+
+def run_once(entrypoint, api_only) -> dict:
+    env = {
+        **os.environ,
+        "DJANGO_SETTINGS_MODULE": "config.settings",
+        "API_ONLY": api_only,
+        "PASSWORD_HASHING_WORKERS": "0",
+        "TOKEN_MAINTENANCE_INTERVAL": "0",
+        "DB_POOL_MODE": "off",
+    }
+
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD, entrypoint], env=env, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+
+    if process.returncode:
+        errors = [line for line in process.stderr.splitlines() if not line.startswith("import time:")]
+        sys.exit(f"{entrypoint} failed:\n" + "\n".join(errors[-20:]))
+
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    result["process_ms"] = wall * 1000
+    result["importtime_ms"] = importtime_total_ms(process.stderr)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="processes per profile and entrypoint, medians reported")
+    args = parser.parse_args()
+
+    columns = ("process_ms", "import_ms", "first_request_ms", "importtime_ms", "modules", "rss_mb")
+    print(f"{'':<24}" + "".join(f"{column:>18}" for column in columns))
+
+    for entrypoint in ENTRYPOINTS:
+        medians = {}
+        for profile, api_only in PROFILES.items():
+            runs = [run_once(entrypoint, api_only) for _ in range(args.runs)]
+            assert all(run["status"] == 401 for run in runs), "unexpected response to the anonymous /auth/me/"
+
+            medians[profile] = {column: statistics.median(run[column] for run in runs) for column in columns}
+            print(f"{entrypoint + ' ' + profile:<24}" + "".join(f"{medians[profile][c]:18.1f}" for c in columns))
+
+        print(f"{entrypoint + ' reduction':<24}" + "".join(
+            f"{(1 - medians['api-only'][c] / medians['full'][c]) * 100:17.1f}%" for c in columns
+        ))
+
+
+if __name__ == "__main__":
+    main()
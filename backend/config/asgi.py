@@ -12,5 +12,18 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('ASYNC_VIEWS', 'True')
 
 application = get_asgi_application()
+
+from authentication.hashing import start_hashing_pool  # noqa: E402
+from authentication.token_storage import start_token_maintenance_scheduler  # noqa: E402
+from config.db_pool import warm_up_db_pool  # noqa: E402
+from config.metrics import start_metrics_flusher  # noqa: E402
+from recipes.images import start_image_pool  # noqa: E402
+
+warm_up_db_pool()
+start_token_maintenance_scheduler()
+start_hashing_pool()
+start_image_pool()
+start_metrics_flusher()
@@ -0,0 +1,109 @@
+import inspect
+
+from asgiref.sync import sync_to_async
+from rest_framework import exceptions
+from rest_framework.views import APIView
+
+# https://github.com/encode/django-rest-framework/blob/main/rest_framework/views.py
+
+class AsyncAPIView(APIView):
+    """
+    APIView with `async def` handlers, dispatched on the event loop under ASGI (no sync_to_async hop per request).
+
+    Same request lifecycle as DRF's dispatch(), with async-aware hooks:
+        - authenticators: `aauthenticate(request)` if defined, otherwise `authenticate()` in a thread
+        - permissions: `ahas_permission(request, view)` if defined, otherwise `has_permission()` (must not do I/O)
+        - throttles: `aallow_request(request, view)` if defined, otherwise `allow_request()` (must not do I/O)
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.ainitial(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if inspect.isawaitable(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def ainitial(self, request, *args, **kwargs):
+        """See APIView.initial()"""
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+
+        neg = self.perform_content_negotiation(request)
+        request.accepted_renderer, request.accepted_media_type = neg
+
+        version, scheme = self.determine_version(request, *args, **kwargs)
+        request.version, request.versioning_scheme = version, scheme
+
+        await self.aperform_authentication(request)
+        await self.acheck_permissions(request)
+        await self.acheck_throttles(request)
+
+    async def aperform_authentication(self, request):
+        """See Request._authenticate() - sets request.user/auth so DRF never authenticates lazily (synchronously)"""
+        for authenticator in request.authenticators:
+            try:
+                if hasattr(authenticator, "aauthenticate"):
+                    user_auth_tuple = await authenticator.aauthenticate(request)
+                else:
+                    user_auth_tuple = await sync_to_async(authenticator.authenticate)(request)
+            except exceptions.APIException:
+                request._not_authenticated()
+                raise
+
+            if user_auth_tuple is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth_tuple
+                return
+
+        request._not_authenticated()
+
+    async def acheck_permissions(self, request):
+        """See APIView.check_permissions()"""
+        for permission in self.get_permissions():
+            if hasattr(permission, "ahas_permission"):
+                allowed = await permission.ahas_permission(request, self)
+            else:
+                allowed = permission.has_permission(request, self)
+
+            if not allowed:
+                self.permission_denied(
+                    request,
+                    message=getattr(permission, "message", None),
+                    code=getattr(permission, "code", None),
+                )
+
+    async def acheck_throttles(self, request):
+        """See APIView.check_throttles()"""
+        throttle_durations = []
+        for throttle in self.get_throttles():
+            if hasattr(throttle, "aallow_request"):
+                allowed = await throttle.aallow_request(request, self)
+            else:
+                allowed = throttle.allow_request(request, self)
+
+            if not allowed:
+                throttle_durations.append(throttle.wait())
+
+        if throttle_durations:
+            durations = [duration for duration in throttle_durations if duration is not None]
+            self.throttled(request, max(durations, default=None))
+
+    async def options(self, request, *args, **kwargs):
+        return super().options(request, *args, **kwargs)
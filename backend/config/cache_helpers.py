@@ -0,0 +1,55 @@
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def cache_is_local() -> bool:
+    """True for the in-process cache - no I/O, its async API would only add a thread hop"""
+    return isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache)
+
+
+def bump_counter(key, timeout=None) -> int:
+    """Increments a counter kept in the cache (creates it if missing, expiring after `timeout`), returns the new value"""
+    if cache.add(key, 1, timeout=timeout):
+        return 1
+    try:
+        return cache.incr(key)
+    except ValueError: # evicted between add() and incr()
+        cache.set(key, 1, timeout=timeout)
+        return 1
+
+
+async def abump_counter(key, timeout=None) -> int:
+    """See bump_counter()"""
+    if cache_is_local():
+        return bump_counter(key, timeout)
+    if await cache.aadd(key, 1, timeout=timeout):
+        return 1
+    try:
+        return await cache.aincr(key)
+    except ValueError:
+        await cache.aset(key, 1, timeout=timeout)
+        return 1
+
+
+async def acache_get(key, default=None):
+    if cache_is_local():
+        return cache.get(key, default)
+    return await cache.aget(key, default)
+
+
+async def acache_add(key, value, timeout=None) -> bool:
+    if cache_is_local():
+        return cache.add(key, value, timeout=timeout)
+    return await cache.aadd(key, value, timeout=timeout)
+
+
+async def acache_set(key, value, timeout=None):
+    if cache_is_local():
+        return cache.set(key, value, timeout=timeout)
+    return await cache.aset(key, value, timeout=timeout)
+
+
+async def acache_delete(key):
+    if cache_is_local():
+        return cache.delete(key)
+    return await cache.adelete(key)
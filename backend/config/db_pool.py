@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.db import connections
+from .logger_setup import log_exception
+
+# https://docs.djangoproject.com/en/6.0/ref/databases/#connection-pool
+#
+# DB_POOL["MODE"] == "pool": Django's psycopg 3 pool, one per process, shared by all its threads.
+# A request borrows a connection on its first query and gives it back when Django closes the connection at the
+# end of the request - no connect (nor TLS handshake) per request. CONN_HEALTH_CHECKS checks a connection on checkout,
+# idle ones above MIN_SIZE are closed after MAX_IDLE, all of them are replaced after MAX_LIFETIME.
+
+pool_settings = settings.DB_POOL
+
+
+def get_pool(alias="default"):
+    """psycopg_pool.ConnectionPool of the alias, None outside the "pool" mode"""
+    if pool_settings["MODE"] != "pool":
+        return None
+    return connections[alias].pool
+
+
+def warm_up_db_pool():
+    """
+    Opens the pool and waits until MIN_SIZE connections are ready, so the first requests don't pay the connects.
+    Call once per server process (config.wsgi / config.asgi). An unreachable DB is logged, not raised -
+    the pool keeps reconnecting in the background.
+    """
+    pool = get_pool()
+    if pool is None:
+        return
+
+    try:
+        pool.open(wait=True, timeout=pool_settings["TIMEOUT"])
+    except Exception as exc:
+        log_exception(exc)
+
+
+def pool_stats() -> dict[str, float]:
+    """Current state + counters of this process' pool (empty if there is none or it's not open yet)"""
+    pool = get_pool()
+    if pool is None or pool.closed:
+        return {}
+
+    stats = pool.get_stats() # counters are missing until they are first incremented
+    size, available = stats.get("pool_size", 0), stats.get("pool_available", 0)
+
+    return {
+        "in_use": size - available,
+        "idle": available,
+        "max_size": pool.max_size,
+        "waiting": stats.get("requests_waiting", 0),
+        "checkouts": stats.get("requests_num", 0),
+        "wait_seconds": stats.get("requests_wait_ms", 0) / 1000,
+        "timeouts": stats.get("requests_errors", 0),
+        "connects": stats.get("connections_num", 0),
+        "connect_seconds": stats.get("connections_ms", 0) / 1000,
+        "connect_errors": stats.get("connections_errors", 0),
+    }
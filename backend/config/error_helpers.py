@@ -14,4 +14,24 @@ def api_err_dict(err_code, **err_params):
 
 def remove_empty_list_fields(error_dict: dict):
     """Removes fields with empty error list"""
-    return {k: v for k, v in error_dict.items() if v}
\ No newline at end of file
+    return {k: v for k, v in error_dict.items() if v}
+
+def violated_constraint(exc):
+    """
+    Name of the unique constraint/index behind an IntegrityError, None if it can't be told.
+    Postgres reports it in the driver's diagnostics, SQLite only in the message:
+    "UNIQUE constraint failed: index 'name'" (expression indexes) or "UNIQUE constraint failed: table.column".
+    """
+    diag = getattr(exc.__cause__, "diag", None)
+    if diag is not None:
+        return diag.constraint_name
+
+    prefix = "UNIQUE constraint failed: "
+    message = str(exc)
+    if not message.startswith(prefix):
+        return None
+
+    name = message.removeprefix(prefix)
+    if name.startswith("index '"):
+        return name.removeprefix("index '").removesuffix("'")
+    return name
@@ -10,7 +10,9 @@ from rest_framework.exceptions import (
     Throttled,
     ErrorDetail,
 )
+from django.http import HttpResponse
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from .renderers import APIRenderer, render_envelope
 from .responses import api_response
 from .response_codes import ECNS, EC
 from .logger_setup import log_exception
@@ -76,121 +78,148 @@ def get_error_code(*, errors, namespace, fallback_code) -> str:
     return f"{namespace}.{fallback_code}"
 
 
+# ---------- PREBUILT RESPONSES ----------
+
+class PrebuiltResponse:
+    """
+    Constant error envelope, encoded once at import and served as raw bytes (no Response/renderer work).
+    Token expiry 401s are the most common API error - access tokens live for a minute.
+    """
+
+    def __init__(self, code, http_status, errors=None):
+        self.body = render_envelope(api_response(success=False, code=code, errors=errors).data)
+        self.http_status = http_status
+
+    def __call__(self, http_status=None) -> HttpResponse:
+        return HttpResponse(
+            self.body,
+            status=http_status or self.http_status,
+            content_type=APIRenderer.media_type,
+        )
+
+
+def global_error(code, http_status):
+    return PrebuiltResponse(code, http_status, errors={"_global": [code]})
+
+
+TOKEN_RESPONSE = PrebuiltResponse(f"{ECNS.TOKEN}.{EC.Token.GENERIC}", status.HTTP_401_UNAUTHORIZED)
+FORBIDDEN_RESPONSE = global_error(f"{ECNS.FORBIDDEN}.{EC.Forbidden.GENERIC}", status.HTTP_403_FORBIDDEN)
+NOT_FOUND_RESPONSE = global_error(f"{ECNS.NOT_FOUND}.{EC.NotFound.GENERIC}", status.HTTP_404_NOT_FOUND)
+THROTTLED_RESPONSE = global_error(f"{ECNS.RATE_LIMITED}.{EC.RateLimited.GENERIC}", status.HTTP_429_TOO_MANY_REQUESTS)
+API_ERROR_RESPONSE = global_error(f"{ECNS.API_ERROR}.{EC.ApiError.GENERIC}", status.HTTP_400_BAD_REQUEST)
+LENGTH_REQUIRED_RESPONSE = global_error(
+    f"{ECNS.API_ERROR}.{EC.ApiError.LENGTH_REQUIRED}", status.HTTP_411_LENGTH_REQUIRED,
+)
+SERVER_ERROR_RESPONSE = global_error(f"{ECNS.SERVER}.{EC.ServerError.GENERIC}", status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# ---------- HANDLERS ----------
+
+def detailed_error(exc, *, namespace, fallback_code, http_status):
+    """Envelope with the exception's field errors"""
+    errors = extract_error_details(
+        detail=getattr(exc, "detail", None),
+        namespace=namespace,
+        fallback_code=fallback_code,
+    )
+    return api_response(
+        success=False,
+        code=get_error_code(
+            errors=errors,
+            namespace=namespace,
+            fallback_code=fallback_code,
+        ),
+        errors=errors,
+        http_status=http_status,
+    )
+
+
+def handle_token(exc, context):
+    return TOKEN_RESPONSE()
+
+
+def handle_auth_failed(exc, context):
+    return detailed_error(
+        exc,
+        namespace=ECNS.AUTH_FAILED,
+        fallback_code=EC.AuthFailed.GENERIC,
+        http_status=status.HTTP_401_UNAUTHORIZED,
+    )
+
+
+def handle_not_authenticated(exc, context):
+    return detailed_error(
+        exc,
+        namespace=ECNS.NOT_AUTH,
+        fallback_code=EC.NotAuth.GENERIC,
+        http_status=status.HTTP_401_UNAUTHORIZED,
+    )
+
+
+def handle_validation(exc, context):
+    return detailed_error(
+        exc,
+        namespace=ECNS.VALIDATION,
+        fallback_code=EC.Validation.GENERIC,
+        http_status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+    )
+
+
+def handle_permission_denied(exc, context):
+    return FORBIDDEN_RESPONSE()
+
+
+def handle_not_found(exc, context):
+    return NOT_FOUND_RESPONSE()
+
+
+def handle_throttled(exc, context):
+    response = THROTTLED_RESPONSE()
+    if exc.wait:
+        response["Retry-After"] = str(exc.wait)
+    return response
+
+
+def handle_other(exc, context):
+    """Not explicitly handled ones - DRF's handler decides if it's an API error at all"""
+    response = exception_handler(exc, context)
+    if response is None:
+        return None
+
+    log_exception(exc, context)
+    return API_ERROR_RESPONSE(getattr(response, "status_code", status.HTTP_400_BAD_REQUEST))
+
+
+# Most specific class of the exception's MRO wins - InvalidToken (an AuthenticationFailed) is a token error
+HANDLERS = {
+    InvalidToken: handle_token,
+    TokenError: handle_token,
+    AuthenticationFailed: handle_auth_failed,
+    NotAuthenticated: handle_not_authenticated,
+    ValidationError: handle_validation,
+    PermissionDenied: handle_permission_denied,
+    NotFound: handle_not_found,
+    Throttled: handle_throttled,
+}
+
+_handler_by_type: dict[type, Any] = {}
+
+
+def get_handler(exc_type):
+    """HANDLERS lookup along the MRO, resolved once per exception type"""
+    handler = _handler_by_type.get(exc_type)
+    if handler is None:
+        handler = next((HANDLERS[cls] for cls in exc_type.__mro__ if cls in HANDLERS), handle_other)
+        _handler_by_type[exc_type] = handler
+    return handler
+
+
 def custom_exception_handler(exc: Exception, context: dict):
 
     try:
-        raw_detail = getattr(exc, "detail", None)
-        # ---- TOKEN ----
-        if isinstance(exc, (InvalidToken, TokenError)):
-            return api_response(
-                success=False,
-                code=f"{ECNS.TOKEN}.{EC.Token.GENERIC}",
-                http_status=status.HTTP_401_UNAUTHORIZED,
-            )
-
-        # ---- AUTH FAILED ----
-        if isinstance(exc, AuthenticationFailed):
-            errors = extract_error_details(
-                detail=raw_detail,
-                namespace=ECNS.AUTH_FAILED,
-                fallback_code=EC.AuthFailed.GENERIC,
-            )
-            return api_response(
-                success=False,
-                code=get_error_code(
-                    errors=errors,
-                    namespace=ECNS.AUTH_FAILED,
-                    fallback_code=EC.AuthFailed.GENERIC,
-                ),
-                errors=errors,
-                http_status=status.HTTP_401_UNAUTHORIZED,
-            )
-
-        # ---- NOT AUTHENTICATED ----
-        if isinstance(exc, NotAuthenticated):
-            errors = extract_error_details(
-                detail=raw_detail,
-                namespace=ECNS.NOT_AUTH,
-                fallback_code=EC.NotAuth.GENERIC,
-            )
-            return api_response(
-                success=False,
-                code=get_error_code(
-                    errors=errors,
-                    namespace=ECNS.NOT_AUTH,
-                    fallback_code=EC.NotAuth.GENERIC,
-                ),
-                errors=errors,
-                http_status=status.HTTP_401_UNAUTHORIZED,
-            )
-
-        # ---- VALIDATION ----
-        if isinstance(exc, ValidationError):
-            errors = extract_error_details(
-                detail=raw_detail,
-                namespace=ECNS.VALIDATION,
-                fallback_code=EC.Validation.GENERIC,
-            )
-            return api_response(
-                success=False,
-                code=get_error_code(
-                    errors=errors,
-                    namespace=ECNS.VALIDATION,
-                    fallback_code=EC.Validation.GENERIC,
-                ),
-                errors=errors,
-                http_status=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            )
-
-        # ---- PERMISSION ----
-        if isinstance(exc, PermissionDenied):
-            code = f"{ECNS.FORBIDDEN}.{EC.Forbidden.GENERIC}"
-            return api_response(
-                success=False,
-                code=code,
-                errors={"_global": [code]},
-                http_status=status.HTTP_403_FORBIDDEN,
-            )
-
-        # ---- NOT FOUND ----
-        if isinstance(exc, NotFound):
-            code = f"{ECNS.NOT_FOUND}.{EC.NotFound.GENERIC}"
-            return api_response(
-                success=False,
-                code=code,
-                errors={"_global": [code]},
-                http_status=status.HTTP_404_NOT_FOUND,
-            )
-
-        # ---- THROTTLED ----
-        if isinstance(exc, Throttled):
-            code = f"{ECNS.RATE_LIMITED}.{EC.RateLimited.GENERIC}"
-            return api_response(
-                success=False,
-                code=code,
-                errors={"_global": [code]},
-                http_status=status.HTTP_429_TOO_MANY_REQUESTS,
-            )
-
-        # ---- FALLBACK TO DRF (not explicitly handled ones) ----
-        response = exception_handler(exc, context)
-        if response is not None:
-            code = f"{ECNS.API_ERROR}.{EC.ApiError.GENERIC}"
-            log_exception(exc, context)
-            return api_response(
-                success=False,
-                code=code,
-                errors={"_global": [code]},
-                http_status=getattr(response, "status_code", status.HTTP_400_BAD_REQUEST),
-            )
+        return get_handler(type(exc))(exc, context)
 
     # ---- SERVER ERROR ----
     except Exception as handler_exc:
-        code = f"{ECNS.SERVER}.{EC.ServerError.GENERIC}"
         log_exception(handler_exc, context)
-        return api_response(
-            success=False,
-            code=code,
-            errors={"_global": [code]},
-            http_status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        )
+        return SERVER_ERROR_RESPONSE()
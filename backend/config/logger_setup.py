@@ -1,41 +1,213 @@
+import atexit
+import hashlib
+import json
 import logging
+import logging.handlers
+import queue
+import threading
+import time
 import traceback
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict
 
+from django.conf import settings
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 LOG_FILE_PATH = BASE_DIR / "logs.log"
 
 LOG_FILE_PATH.parent.mkdir(parents=True, exist_ok=True)
 
+log_settings = settings.API_LOGGING
+
+# Request threads only put records on a queue, a listener thread formats them and does the disk/console I/O.
+# Output is JSON lines, logs.log rotates by size and by age.
+# Identical stack traces (same fingerprint) are deduplicated: within DEDUP_WINDOW seconds the first one is logged,
+# then every SAMPLE_EVERY-th with the number of skipped ones - an error storm costs a counter increment per error.
+
+
+# ---------- FORMATTING (listener thread) ----------
+
+class JSONLinesFormatter(logging.Formatter):
+    """One JSON object per record, the stack trace is formatted here instead of on the request thread"""
+
+    def format(self, record):
+        entry: Dict[str, Any] = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+
+        for key in ("exception_type", "fingerprint", "repeated", "context"):
+            value = getattr(record, key, None)
+            if value:
+                entry[key] = value
+
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = "".join(traceback.format_exception(*record.exc_info))
+            entry["stack_trace"] = record.exc_text
+
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SizeAndTimeRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler (logs.log.1 ... logs.log.N) that also rolls over every `interval` seconds"""
+
+    def __init__(self, filename, max_bytes, backup_count, interval, **kwargs):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, **kwargs)
+        self.interval = interval
+        self.rollover_at = time.time() + interval if interval else None
+
+    def shouldRollover(self, record):
+        if self.rollover_at is not None and time.time() >= self.rollover_at:
+            if self.stream is None:
+                self.stream = self._open()
+            return self.stream.tell() > 0 # never rotate an empty file
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        if self.rollover_at is not None:
+            self.rollover_at = time.time() + self.interval
+
+
+# ---------- QUEUE (request thread) ----------
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueues records as they are - formatting (stack trace included) is left to the listener.
+    A full queue drops the record instead of blocking the request.
+    """
+    dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            type(self).dropped += 1
+
+
+class Deduplicator:
+    """Per fingerprint sampling of repeated records"""
+
+    def __init__(self, window, sample_every, max_fingerprints=10_000):
+        self.window = window
+        self.sample_every = sample_every
+        self.max_fingerprints = max_fingerprints
+        self._seen: Dict[str, list] = {} # fingerprint -> [window start, count, skipped since last emit]
+        self._lock = threading.Lock()
+
+    def should_log(self, fingerprint) -> tuple[bool, int]:
+        """(log it?, repeats skipped since the last logged one)"""
+        now = time.monotonic()
+
+        with self._lock:
+            seen = self._seen.get(fingerprint)
+
+            if seen is None or now - seen[0] >= self.window:
+                if len(self._seen) >= self.max_fingerprints:
+                    self._seen.clear()
+                skipped = seen[2] if seen else 0
+                self._seen[fingerprint] = [now, 1, 0]
+                return True, skipped
+
+            seen[1] += 1
+            if self.sample_every and seen[1] % self.sample_every == 0:
+                skipped, seen[2] = seen[2], 0
+                return True, skipped
+
+            seen[2] += 1
+            return False, 0
+
+
+def fingerprint(exc: BaseException) -> str:
+    """Exception type + the frames it went through (file, line), no source lines read"""
+    parts = [f"{type(exc).__module__}.{type(exc).__qualname__}"]
+    tb = exc.__traceback__
+    while tb is not None:
+        parts.append(f"{tb.tb_frame.f_code.co_filename}:{tb.tb_lineno}")
+        tb = tb.tb_next
+    return hashlib.blake2b("|".join(parts).encode(), digest_size=8).hexdigest()
+
+
+def summarize_context(context: dict | None) -> Dict[str, Any] | None:
+    """The parts of DRF's exception context worth logging - not the request/view objects themselves"""
+    if not context:
+        return None
+
+    summary: Dict[str, Any] = {}
+
+    view = context.get("view")
+    if view is not None:
+        summary["view"] = type(view).__name__
+
+    request = context.get("request")
+    if request is not None:
+        summary["method"] = request.method
+        summary["path"] = request.path
+        user = getattr(request, "_user", None) # don't trigger lazy authentication here
+        if user is not None and user.is_authenticated:
+            summary["user_id"] = user.pk
+
+    return summary or None
+
+
+# ---------- SETUP ----------
+
 logger = logging.getLogger("api_logger")
 logger.setLevel(logging.INFO)
 logger.propagate = False
 
+deduplicator = Deduplicator(log_settings["DEDUP_WINDOW"], log_settings["SAMPLE_EVERY"])
+
 # Prevent duplicate handlers during reloads
 if not logger.handlers:
-    formatter = logging.Formatter(
-        "%(asctime)s | %(levelname)s | %(message)s\n%(stack_trace)s\n"
-    )
+    formatter = JSONLinesFormatter()
 
     # ---- File handler ----
-    file_handler = logging.FileHandler(LOG_FILE_PATH)
+    file_handler = SizeAndTimeRotatingFileHandler(
+        LOG_FILE_PATH,
+        max_bytes=log_settings["MAX_BYTES"],
+        backup_count=log_settings["BACKUP_COUNT"],
+        interval=log_settings["ROTATE_INTERVAL"],
+        encoding="utf-8",
+        delay=True,
+    )
     file_handler.setLevel(logging.INFO)
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
 
     # ---- Console handler ----
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+
+    # ---- Queue ----
+    log_queue: queue.Queue = queue.Queue(maxsize=log_settings["QUEUE_SIZE"])
+    logger.addHandler(DroppingQueueHandler(log_queue))
+
+    listener = logging.handlers.QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop) # flushes what's left in the queue
 
 
 def log_exception(exc: Exception, context: dict | None = None):
-    stack_trace = "".join(traceback.format_exception(type(exc), exc, exc.__traceback__))
+    exc_fingerprint = fingerprint(exc)
+
+    should_log, skipped = deduplicator.should_log(exc_fingerprint)
+    if not should_log:
+        return
 
-    extra: Dict[str, Any] = {"stack_trace": stack_trace}
-    if context:
-        extra["context"] = context
+    extra: Dict[str, Any] = {
+        "exception_type": type(exc).__name__,
+        "fingerprint": exc_fingerprint,
+        "repeated": skipped,
+        "context": summarize_context(context),
+    }
 
-    logger.error(str(exc), extra=extra)
+    logger.error(str(exc), exc_info=(type(exc), exc, exc.__traceback__), extra=extra)
@@ -0,0 +1,370 @@
+import atexit
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.backends.signals import connection_created
+from .db_pool import pool_stats
+from .logger_setup import log_exception
+
+# Per route metrics: request count by status, latency histogram, DB queries and their time,
+# time waiting for password hashing and response size. Served in Prometheus text format at /api/v1/metrics/ (config.urls).
+#
+# Aggregation is lock-free: every thread writes only its own registry, a scrape sums them up.
+# With METRICS["DIR"] set, each worker process dumps its totals to <DIR>/<pid>.json every FLUSH_INTERVAL seconds
+# and a scrape merges all the files, so any pre-forked worker answers for the whole server.
+
+metrics_settings = settings.METRICS
+
+BUCKETS = metrics_settings["BUCKETS"]
+
+
+# ---------- PER REQUEST ----------
+
+class RequestMetrics:
+    """Accumulated during one request, the context variable is copied into sync_to_async threads"""
+    __slots__ = ("queries", "query_seconds", "hashing_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.hashing_seconds = 0.0
+
+
+current_request: ContextVar[RequestMetrics | None] = ContextVar("current_request_metrics", default=None)
+
+
+def record_hashing(seconds):
+    """Called by authentication.hashing for every wait on the hashing pool"""
+    request_metrics = current_request.get()
+    if request_metrics is not None:
+        request_metrics.hashing_seconds += seconds
+
+
+def count_queries(execute, sql, params, many, context):
+    """Execute wrapper installed on every DB connection, counts only inside a measured request"""
+    request_metrics = current_request.get()
+    if request_metrics is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        request_metrics.queries += 1
+        request_metrics.query_seconds += time.perf_counter() - start
+
+
+def install_query_counter(sender, connection, **kwargs):
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+connection_created.connect(install_query_counter)
+
+
+# ---------- REGISTRY ----------
+
+class RouteStats:
+    __slots__ = ("statuses", "buckets", "latency_sum", "queries", "query_seconds", "hashing_seconds", "response_bytes")
+
+    def __init__(self):
+        self.statuses: dict[int, int] = {}
+        self.buckets = [0] * (len(BUCKETS) + 1) # last one is +Inf
+        self.latency_sum = 0.0
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.hashing_seconds = 0.0
+        self.response_bytes = 0
+
+
+_local = threading.local()
+_registries: list[dict] = []
+_registries_lock = threading.Lock() # only taken once per thread, when its registry is created
+
+
+def get_registry() -> dict:
+    """(route, method) -> RouteStats of the current thread"""
+    registry = getattr(_local, "registry", None)
+    if registry is None:
+        registry = _local.registry = {}
+        with _registries_lock:
+            _registries.append(registry)
+    return registry
+
+
+def observe(route, method, status, seconds, request_metrics, response_bytes):
+    registry = get_registry()
+    stats = registry.get((route, method))
+    if stats is None:
+        stats = registry[(route, method)] = RouteStats()
+
+    stats.statuses[status] = stats.statuses.get(status, 0) + 1
+
+    for i, bound in enumerate(BUCKETS):
+        if seconds <= bound:
+            break
+    else:
+        i = len(BUCKETS)
+    stats.buckets[i] += 1
+
+    stats.latency_sum += seconds
+    stats.queries += request_metrics.queries
+    stats.query_seconds += request_metrics.query_seconds
+    stats.hashing_seconds += request_metrics.hashing_seconds
+    stats.response_bytes += response_bytes
+
+
+# ---------- SAMPLES ----------
+# Flat {"metric\tlabel=value\t...": number} - summed across threads and processes, JSON friendly
+
+def sample_key(name, **labels):
+    return "\t".join([name, *(f"{key}={value}" for key, value in labels.items())])
+
+
+# config.db_pool.pool_stats() -> sample keys, summed across processes like the rest (capacity of all the workers)
+POOL_SAMPLES = {
+    "in_use": sample_key("api_db_pool_connections", state="in_use"),
+    "idle": sample_key("api_db_pool_connections", state="idle"),
+    "max_size": sample_key("api_db_pool_max_connections"),
+    "waiting": sample_key("api_db_pool_waiting_requests"),
+    "checkouts": sample_key("api_db_pool_checkouts_total"),
+    "wait_seconds": sample_key("api_db_pool_wait_seconds_total"),
+    "timeouts": sample_key("api_db_pool_timeouts_total"),
+    "connects": sample_key("api_db_pool_connects_total"),
+    "connect_seconds": sample_key("api_db_pool_connect_seconds_total"),
+    "connect_errors": sample_key("api_db_pool_connect_errors_total"),
+}
+
+
+def snapshot() -> dict[str, float]:
+    """Totals of all threads of this process"""
+    samples: dict[str, float] = {}
+
+    def add(key, value):
+        samples[key] = samples.get(key, 0) + value
+
+    with _registries_lock:
+        registries = list(_registries)
+
+    for registry in registries:
+        for (route, method), stats in list(registry.items()):
+            for status, count in list(stats.statuses.items()):
+                add(sample_key("api_requests_total", route=route, method=method, status=status), count)
+
+            cumulative = 0
+            for bound, count in zip([*BUCKETS, "+Inf"], stats.buckets):
+                cumulative += count
+                add(sample_key("api_request_duration_seconds_bucket", route=route, method=method, le=bound), cumulative)
+
+            add(sample_key("api_request_duration_seconds_sum", route=route, method=method), stats.latency_sum)
+            add(sample_key("api_request_duration_seconds_count", route=route, method=method), cumulative)
+            add(sample_key("api_db_queries_total", route=route, method=method), stats.queries)
+            add(sample_key("api_db_query_seconds_total", route=route, method=method), stats.query_seconds)
+            add(sample_key("api_password_hashing_seconds_total", route=route, method=method), stats.hashing_seconds)
+            add(sample_key("api_response_bytes_total", route=route, method=method), stats.response_bytes)
+
+    for name, value in pool_stats().items():
+        add(POOL_SAMPLES[name], value)
+
+    return samples
+
+
+def merge(*all_samples) -> dict[str, float]:
+    merged: dict[str, float] = {}
+    for samples in all_samples:
+        for key, value in samples.items():
+            merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+METRIC_HELP = {
+    "api_requests_total": ("counter", "Requests by route, method and status"),
+    "api_request_duration_seconds": ("histogram", "Request latency through the whole middleware stack"),
+    "api_db_queries_total": ("counter", "DB queries run by requests"),
+    "api_db_query_seconds_total": ("counter", "Time spent in DB queries"),
+    "api_password_hashing_seconds_total": ("counter", "Time spent waiting for password hashing"),
+    "api_response_bytes_total": ("counter", "Response body bytes (streaming responses not counted)"),
+    "api_db_pool_connections": ("gauge", "Pooled DB connections by state"),
+    "api_db_pool_max_connections": ("gauge", "DB pool capacity"),
+    "api_db_pool_waiting_requests": ("gauge", "Requests waiting for a pooled connection"),
+    "api_db_pool_checkouts_total": ("counter", "Connections handed out by the pool"),
+    "api_db_pool_wait_seconds_total": ("counter", "Time requests waited for a pooled connection"),
+    "api_db_pool_timeouts_total": ("counter", "Requests that got no connection within DB_POOL TIMEOUT"),
+    "api_db_pool_connects_total": ("counter", "Connections opened by the pool"),
+    "api_db_pool_connect_seconds_total": ("counter", "Time spent opening pooled connections"),
+    "api_db_pool_connect_errors_total": ("counter", "Failed connection attempts of the pool"),
+}
+
+
+GAUGES = {name for name, (metric_type, _) in METRIC_HELP.items() if metric_type == "gauge"}
+
+
+def format_value(value) -> str:
+    """Counts as they are, floats round-trip (repr) - :g keeps 6 significant digits, counters would stall"""
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+def render_prometheus(samples: dict[str, float]) -> str:
+    by_metric: dict[str, list[str]] = {name: [] for name in METRIC_HELP}
+
+    for key in samples: # insertion order keeps histogram buckets ascending
+        name, *labels = key.split("\t")
+        base = name.removesuffix("_bucket").removesuffix("_sum").removesuffix("_count")
+        label_text = ",".join(f'{k}="{v}"' for k, v in (label.split("=", 1) for label in labels))
+        series = f"{name}{{{label_text}}}" if label_text else name
+        by_metric.setdefault(base, []).append(f"{series} {format_value(samples[key])}")
+
+    lines = []
+    for name, series in by_metric.items():
+        if not series:
+            continue
+        metric_type, help_text = METRIC_HELP.get(name, ("untyped", ""))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        lines.extend(series)
+
+    return "\n".join(lines) + "\n"
+
+
+# ---------- MULTI PROCESS ----------
+
+def metrics_dir() -> Path | None:
+    directory = metrics_settings["DIR"]
+    return Path(directory) if directory else None
+
+
+def flush():
+    """Writes this process' totals to <DIR>/<pid>.json (atomic replace)"""
+    directory = metrics_dir()
+    if directory is None:
+        return
+
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{os.getpid()}.json"
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(snapshot()))
+    os.replace(tmp_path, path)
+
+
+def pid_alive(pid) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError: # exists, owned by someone else
+        return True
+    return True
+
+
+def without_gauges(samples: dict[str, float]) -> dict[str, float]:
+    return {key: value for key, value in samples.items() if key.split("\t", 1)[0] not in GAUGES}
+
+
+def collect() -> dict[str, float]:
+    """
+    Live totals of this process + the last flushed totals of every other one.
+    Counters of exited workers stay in the totals, their gauges (pool connections) are dropped.
+    """
+    samples = [snapshot()]
+
+    directory = metrics_dir()
+    if directory is not None and directory.is_dir():
+        own = os.getpid()
+        for path in directory.glob("*.json"):
+            try:
+                pid = int(path.stem)
+            except ValueError:
+                continue
+            if pid == own:
+                continue
+            try:
+                flushed = json.loads(path.read_text())
+            except (OSError, ValueError): # being replaced / removed
+                continue
+            samples.append(flushed if pid_alive(pid) else without_gauges(flushed))
+
+    return merge(*samples)
+
+
+def _flush_forever(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            flush()
+        except Exception as exc:
+            log_exception(exc)
+
+
+def start_metrics_flusher():
+    """Call once per server process (config.wsgi / config.asgi), no-op without METRICS["DIR"]"""
+    if not metrics_settings["ENABLED"] or metrics_dir() is None:
+        return
+
+    thread = threading.Thread(
+        target=_flush_forever,
+        args=(metrics_settings["FLUSH_INTERVAL"],),
+        name="metrics-flush",
+        daemon=True,
+    )
+    thread.start()
+    atexit.register(flush)
+
+
+# ---------- MIDDLEWARE ----------
+
+class MetricsMiddleware:
+    """First in MIDDLEWARE, so latency covers the whole stack. Works under WSGI and ASGI."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not metrics_settings["ENABLED"]:
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        request_metrics = RequestMetrics()
+        token = current_request.set(request_metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+
+        self.record(request, response, time.perf_counter() - start, request_metrics)
+        return response
+
+    async def __acall__(self, request):
+        request_metrics = RequestMetrics()
+        token = current_request.set(request_metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_request.reset(token)
+
+        self.record(request, response, time.perf_counter() - start, request_metrics)
+        return response
+
+    @staticmethod
+    def record(request, response, seconds, request_metrics):
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match is not None else "unmatched"
+        response_bytes = 0 if response.streaming else len(response.content)
+
+        observe(route, request.method, response.status_code, seconds, request_metrics, response_bytes)
+
@@ -0,0 +1,145 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.core.handlers.base import BaseHandler
+from django.core.handlers.exception import convert_exception_to_response
+from django.utils.module_loading import import_string
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+# https://github.com/django/django/blob/main/django/core/handlers/base.py
+#
+# Per URL prefix middleware stacks (settings.MIDDLEWARE_ROUTES). /admin/ keeps the session/CSRF/auth/messages stack,
+# /api/ - authenticated by DRF with JWTs - skips it. The stacks are built once, the same way BaseHandler.load_middleware()
+# builds MIDDLEWARE, and a request picks one by the longest matching prefix of its path.
+# process_view/process_template_response/process_exception hooks of the inner middleware are called by RouteMiddleware's
+# own hooks - Django's handler only knows about RouteMiddleware.
+
+
+class RouteStack:
+    """Middleware chain of one route family around RouteMiddleware's get_response"""
+
+    def __init__(self, middleware_paths, get_response, is_async):
+        adapter = BaseHandler()
+
+        self.view_hooks = []
+        self.template_response_hooks = []
+        self.exception_hooks = []
+
+        handler = get_response
+        handler_is_async = is_async
+        for middleware_path in reversed(middleware_paths):
+            middleware = import_string(middleware_path)
+            middleware_can_sync = getattr(middleware, "sync_capable", True)
+            middleware_can_async = getattr(middleware, "async_capable", False)
+            if not middleware_can_sync and not middleware_can_async:
+                raise RuntimeError(f"Middleware {middleware_path} must have at least one of sync_capable/async_capable set to True.")
+            elif not handler_is_async and middleware_can_sync:
+                middleware_is_async = False
+            else:
+                middleware_is_async = middleware_can_async
+
+            try:
+                adapted_handler = adapter.adapt_method_mode(
+                    middleware_is_async, handler, handler_is_async, debug=settings.DEBUG, name=f"middleware {middleware_path}"
+                )
+                mw_instance = middleware(adapted_handler)
+            except MiddlewareNotUsed:
+                continue
+
+            if mw_instance is None:
+                raise ImproperlyConfigured(f"Middleware factory {middleware_path} returned None.")
+
+            if hasattr(mw_instance, "process_view"):
+                self.view_hooks.insert(0, adapter.adapt_method_mode(is_async, mw_instance.process_view))
+            if hasattr(mw_instance, "process_template_response"):
+                self.template_response_hooks.append(
+                    adapter.adapt_method_mode(is_async, mw_instance.process_template_response)
+                )
+            if hasattr(mw_instance, "process_exception"):
+                # always synchronous, like Django's exception middleware
+                self.exception_hooks.append(adapter.adapt_method_mode(False, mw_instance.process_exception))
+
+            handler = convert_exception_to_response(mw_instance)
+            handler_is_async = middleware_is_async
+
+        self.handler = adapter.adapt_method_mode(is_async, handler, handler_is_async)
+
+
+class RouteMiddleware:
+    """
+    Runs the stack of the longest MIDDLEWARE_ROUTES prefix matching request.path_info, "" matches everything else.
+    Prefixes with the same middleware list share one stack.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+        stacks: dict[tuple, RouteStack] = {}
+        routes = []
+        for prefix, middleware_paths in settings.MIDDLEWARE_ROUTES.items():
+            key = tuple(middleware_paths)
+            if key not in stacks:
+                stacks[key] = RouteStack(key, get_response, self.is_async)
+            routes.append((prefix, stacks[key]))
+
+        if not any(prefix == "" for prefix, _ in routes):
+            routes.append(("", RouteStack((), get_response, self.is_async)))
+
+        # longest prefix first - the first match wins
+        self.routes = sorted(routes, key=lambda route: len(route[0]), reverse=True)
+
+        # Django calls a hook for every request once the attribute exists - only set the ones some stack needs
+        if any(stack.view_hooks for stack in stacks.values()):
+            self.process_view = self.aprocess_view if self.is_async else self.sync_process_view
+        if any(stack.template_response_hooks for stack in stacks.values()):
+            self.process_template_response = (
+                self.aprocess_template_response if self.is_async else self.sync_process_template_response
+            )
+        if any(stack.exception_hooks for stack in stacks.values()):
+            self.process_exception = self.sync_process_exception
+
+    def get_stack(self, request) -> RouteStack:
+        path = request.path_info
+        for prefix, stack in self.routes:
+            if path.startswith(prefix):
+                return stack
+        raise AssertionError("unreachable, the '' route matches every path")
+
+    def __call__(self, request):
+        return self.get_stack(request).handler(request)
+
+    # ---------- HOOKS ----------
+
+    def sync_process_view(self, request, view_func, view_args, view_kwargs):
+        for hook in self.get_stack(request).view_hooks:
+            response = hook(request, view_func, view_args, view_kwargs)
+            if response is not None:
+                return response
+        return None
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        for hook in self.get_stack(request).view_hooks:
+            response = await hook(request, view_func, view_args, view_kwargs)
+            if response is not None:
+                return response
+        return None
+
+    def sync_process_template_response(self, request, response):
+        for hook in self.get_stack(request).template_response_hooks:
+            response = hook(request, response)
+        return response
+
+    async def aprocess_template_response(self, request, response):
+        for hook in self.get_stack(request).template_response_hooks:
+            response = await hook(request, response)
+        return response
+
+    def sync_process_exception(self, request, exception):
+        for hook in self.get_stack(request).exception_hooks:
+            response = hook(request, exception)
+            if response is not None:
+                return response
+        return None
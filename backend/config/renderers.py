@@ -0,0 +1,114 @@
+import json
+from functools import lru_cache
+
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError: # optional, stdlib json otherwise
+    orjson = None
+
+# https://github.com/encode/django-rest-framework/blob/main/rest_framework/renderers.py
+
+API_PATH_PREFIX = "/api/v1/"
+
+_drf_encoder = encoders.JSONEncoder()
+
+
+def _default(obj):
+    """Types orjson doesn't know (Decimal, lazy strings, QuerySets...) - same conversions as DRF's encoder"""
+    return _drf_encoder.default(obj)
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+    def dumps(data) -> bytes:
+        return orjson.dumps(data, default=_default, option=_ORJSON_OPTIONS)
+else:
+    def dumps(data) -> bytes:
+        # DRF's JSONRenderer output with the default UNICODE_JSON/COMPACT_JSON/STRICT_JSON settings
+        return json.dumps(
+            data, cls=encoders.JSONEncoder, ensure_ascii=False, separators=(",", ":"), allow_nan=False
+        ).encode()
+
+
+class Envelope(dict):
+    """api_response() body - a plain dict, marked so APIRenderer can take the fragment path"""
+
+
+ENVELOPE_KEYS = ("success", "code", "message", "payload", "errors", "meta")
+
+# Constant parts of the envelope, encoded once
+SUCCESS_PREFIX = {True: b'{"success":true,"code":', False: b'{"success":false,"code":'}
+MESSAGE = b',"message":'
+PAYLOAD = b',"payload":'
+ERRORS = b',"errors":'
+META = b',"meta":'
+NULL = b"null"
+EMPTY = b"{}"
+
+
+@lru_cache(maxsize=1024)
+def encode_code(code) -> bytes:
+    """Response codes are a closed set (SC/EC), each is encoded once"""
+    return dumps(code)
+
+
+def encode_or_empty(value) -> bytes:
+    return dumps(value) if value else EMPTY
+
+
+def render_envelope(data: Envelope) -> bytes:
+    return b"".join((
+        SUCCESS_PREFIX[data["success"]],
+        encode_code(str(data["code"])),
+        MESSAGE,
+        NULL if data["message"] is None else dumps(data["message"]),
+        PAYLOAD,
+        encode_or_empty(data["payload"]),
+        ERRORS,
+        encode_or_empty(data["errors"]),
+        META,
+        encode_or_empty(data["meta"]),
+        b"}",
+    ))
+
+
+def is_intact_envelope(data) -> bool:
+    """Envelope with exactly the original keys in order - views are free to edit response.data"""
+    return (
+        type(data) is Envelope
+        and tuple(data) == ENVELOPE_KEYS
+        and type(data["success"]) is bool
+        and isinstance(data["code"], str)
+    )
+
+
+class APIRenderer(JSONRenderer):
+    """
+    JSONRenderer with a fast encoder (orjson if installed) and byte fragments for the api_response() envelope.
+    Output is the same JSON as DRF's JSONRenderer with the default settings, compact and UTF-8.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        if is_intact_envelope(data):
+            return render_envelope(data)
+
+        return dumps(data)
+
+
+class APIContentNegotiation(DefaultContentNegotiation):
+    """/api/v1/ always answers JSON - the first renderer is picked without parsing the Accept header"""
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        if not format_suffix and request.path.startswith(API_PATH_PREFIX):
+            renderer = renderers[0]
+            return renderer, renderer.media_type
+
+        return super().select_renderer(request, renderers, format_suffix)
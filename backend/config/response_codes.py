@@ -75,6 +75,21 @@ class EC():
         EMAIL_TAKEN = "EMAIL_TAKEN"
         USERNAME_TAKEN = "USERNAME_TAKEN"
         PASSWORD_SAME_AS_OLD = "PASSWORD_SAME_AS_OLD"
+        INVALID_NUMBER = "INVALID_NUMBER"
+        TOO_MANY_TERMS = "TOO_MANY_TERMS"
+        INGREDIENT_TOO_SHORT = "INGREDIENT_TOO_SHORT"
+        INVALID_LIST = "INVALID_LIST"
+        TOO_MANY_RECIPES = "TOO_MANY_RECIPES"
+        RECIPE_NOT_FOUND = "RECIPE_NOT_FOUND"
+        INVALID_CURSOR = "INVALID_CURSOR"
+        INVALID_JSON = "INVALID_JSON"
+        INVALID_OBJECT = "INVALID_OBJECT"
+        INVALID_STRING = "INVALID_STRING"
+        INVALID_BOOLEAN = "INVALID_BOOLEAN"
+        TOO_LONG = "TOO_LONG"
+        LINE_TOO_LONG = "LINE_TOO_LONG"
+        IMAGE_TOO_LARGE = "IMAGE_TOO_LARGE"
+        INVALID_IMAGE = "INVALID_IMAGE"
 
     class Forbidden(StrEnum):
         GENERIC = "GENERIC_ERROR"
@@ -87,6 +102,7 @@ class EC():
 
     class ApiError(StrEnum):
         GENERIC = "GENERIC_ERROR"
+        LENGTH_REQUIRED = "LENGTH_REQUIRED"
 
     class ServerError(StrEnum):
         GENERIC = "GENERIC_ERROR"
@@ -98,6 +114,7 @@ class SC(): # not necessary, but let's keep response codes tidy
 
     Available Classes:
         - `Auth`
+        - `Recipes`
     """
     class Auth(StrEnum):
         GENERIC = "AUTH.GENERIC_SUCCESS"
@@ -108,4 +125,12 @@ class SC(): # not necessary, but let's keep response codes tidy
         USER_DELETED = "AUTH.USER_DELETED"
         PASSWORD_CHANGED = "AUTH.PASSWORD_CHANGED"
         USERNAME_CHANGED = "AUTH.USERNAME_CHANGED"
-        EMAIL_CHANGED = "AUTH.EMAIL_CHANGED"
\ No newline at end of file
+        EMAIL_CHANGED = "AUTH.EMAIL_CHANGED"
+
+    class Recipes(StrEnum):
+        GENERIC = "RECIPES.GENERIC_SUCCESS"
+        VOTED = "RECIPES.VOTED"
+        VOTE_REMOVED = "RECIPES.VOTE_REMOVED"
+        IMPORTED = "RECIPES.IMPORTED"
+        IMAGE_ACCEPTED = "RECIPES.IMAGE_ACCEPTED"
+        IMAGE_REMOVED = "RECIPES.IMAGE_REMOVED"
@@ -1,5 +1,6 @@
 from rest_framework.response import Response
 from rest_framework import status
+from .renderers import Envelope
 
 def api_response(
     *,
@@ -12,13 +13,13 @@ def api_response(
     http_status=status.HTTP_200_OK,
 ):
     return Response(
-        {
+        Envelope({
             "success": success,
             "code": code,
             "message": message,
             "payload": {} if payload is None else payload,
             "errors": {} if errors is None else errors,
             "meta": {} if meta is None else meta,
-        },
+        }),
         status=http_status,
     )
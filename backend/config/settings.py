@@ -40,6 +40,11 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 
 ALLOWED_HOSTS = os.getenv("ALLOWED_HOSTS", "").split(",")
 
+# API-only worker profile: the API authenticates by JWT only, so its workers boot without admin, sessions,
+# messages, templates and staticfiles. /admin/ is served by a separate process of the full profile (API_ONLY unset),
+# routed by the reverse proxy - it is also the one that runs migrate for the tables of those apps.
+API_ONLY = env_bool("API_ONLY")
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -49,22 +54,46 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres', # RecipeSearchDocument's tsvector fields, used on PostgreSQL only
     'rest_framework',
     'rest_framework_simplejwt',
     'rest_framework_simplejwt.token_blacklist',
     "corsheaders",
     'authentication',
     'users',
+    'recipes',
+]
+
+ADMIN_ONLY_APPS = [
+    'django.contrib.admin',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
 ]
 
+if API_ONLY:
+    INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in ADMIN_ONLY_APPS]
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authentication.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'authentication.permissions.IsAuthenticatedEC',
     ),
     "EXCEPTION_HANDLER": "config.exception_handler.custom_exception_handler",
+    'DEFAULT_RENDERER_CLASSES': (
+        'config.renderers.APIRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_CONTENT_NEGOTIATION_CLASS': 'config.renderers.APIContentNegotiation',
+    'DEFAULT_THROTTLE_CLASSES': (
+        'authentication.throttling.IPRateThrottle',
+        'authentication.throttling.IdentifierRateThrottle',
+    ),
+    # Reverse proxies in front of the app that append to X-Forwarded-For - the client IP of the throttles is the
+    # address they saw. 0 = REMOTE_ADDR, the header is client input without a trusted proxy.
+    'NUM_PROXIES': int(os.getenv("NUM_PROXIES", "0")),
 }
 
 SIMPLE_JWT = {
@@ -77,17 +106,106 @@ SIMPLE_JWT = {
     "UPDATE_LAST_LOGIN": True,
 }
 
+# Per-process cache of user rows used by CachedJWTAuthentication (see authentication/user_cache.py)
+USER_CACHE = {
+    "MAX_SIZE": int(os.getenv("USER_CACHE_MAX_SIZE", "4096")),
+    "TTL": int(os.getenv("USER_CACHE_TTL", "60")), # seconds
+    "LOCAL_TTL": 5, # seconds, TTL without a shared CACHE_URL - changes made by other processes show after this long
+}
+
+# Per-process Bloom filter over blacklisted refresh token jtis (see authentication/blacklist_index.py)
+BLACKLIST_INDEX = {
+    "CAPACITY": int(os.getenv("BLACKLIST_INDEX_CAPACITY", "1000000")), # grows on rebuild if exceeded
+    "ERROR_RATE": float(os.getenv("BLACKLIST_INDEX_ERROR_RATE", "0.01")), # false positives are confirmed in the DB
+    "SYNC_OVERLAP": 30, # seconds - covers transactions committing late and clock skew between servers
+}
+
+# Outstanding/blacklisted tokens bucketed by expiry (see authentication/token_storage.py)
+TOKEN_STORAGE = {
+    "BUCKET_SIZE": timedelta(hours=1),
+    "PRECREATE_BUCKETS": 3, # has to cover REFRESH_TOKEN_LIFETIME
+    "MAINTENANCE_INTERVAL": int(os.getenv("TOKEN_MAINTENANCE_INTERVAL", "300")), # seconds, 0 = scheduler off
+    "LOCK_TIMEOUT": "2s", # DDL gives up instead of blocking refreshes, retried on the next run
+    "DELETE_BATCH_SIZE": 1000, # non partitioned backends
+}
+
+# Concurrent refreshes of one refresh token share one rotation (see authentication/refresh_grace.py) - across worker
+# processes only with CACHE_URL, within each process without it
+REFRESH_GRACE = {
+    "WINDOW": int(os.getenv("REFRESH_GRACE_WINDOW", "10")), # seconds the new pair is served for the old token, 0 = off
+    "WAIT": 5, # max seconds a refresh waits for the concurrent one rotating the same token
+    "POLL_INTERVAL": 0.02,
+}
+
+# Error log pipeline (see config/logger_setup.py)
+API_LOGGING = {
+    "MAX_BYTES": 10 * 1024 * 1024, # logs.log rotates at this size...
+    "ROTATE_INTERVAL": 24 * 60 * 60, # ...or after this many seconds, 0 = size only
+    "BACKUP_COUNT": 5,
+    "QUEUE_SIZE": 10_000, # records waiting for the writer thread, more are dropped
+    "DEDUP_WINDOW": 60, # seconds - identical stack traces are logged once per window...
+    "SAMPLE_EVERY": 100, # ...plus every Nth repeat, 0 = first one only
+}
+
+# Process pool for password hashing (see authentication/hashing.py)
+PASSWORD_HASHING = {
+    "WORKERS": int(os.getenv("PASSWORD_HASHING_WORKERS", "2")), # 0 = hash inline in the request thread
+    "QUEUE_DEPTH": int(os.getenv("PASSWORD_HASHING_QUEUE_DEPTH", "32")), # in flight jobs per process, then RATE_LIMITED
+}
+
+# Sliding window throttles of the password hashing endpoints (see authentication/throttling.py)
+THROTTLING = {
+    # "local" (per process) | "cache" (default cache, shared with CACHE_URL) | "db" (ThrottleCounter table)
+    "STORE": os.getenv("THROTTLE_STORE", "cache" if os.getenv("CACHE_URL") else "db"),
+    "LOCAL_MAX_KEYS": 100_000,
+    "RATES": { # view.throttle_scope -> rate per key kind
+        "login": {"ip": "30/min", "identifier": "10/min"},
+        "register": {"ip": "10/min", "identifier": "5/min"},
+        "password_confirm": {"ip": "30/min", "identifier": "5/min"}, # me/* endpoints asking for the current password
+    },
+}
+
+# authentication.async_views - async login/register/refresh/logout/me, only pays off under ASGI (config.asgi turns it on)
+ASYNC_VIEWS = env_bool("ASYNC_VIEWS")
+
+# Per route latency / DB / hashing / response size metrics, Prometheus text at /api/v1/metrics/ (see config/metrics.py)
+METRICS = {
+    "ENABLED": env_bool("METRICS_ENABLED", "True"),
+    "DIR": os.getenv("METRICS_DIR", ""), # shared by the worker processes of one server, empty = this process only
+    "FLUSH_INTERVAL": 10, # seconds between dumps of a worker's totals to DIR
+    "BUCKETS": (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10), # latency histogram, seconds
+}
+
 MIDDLEWARE = [
+    "config.metrics.MetricsMiddleware", # first - measures the whole stack
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    "config.middleware.RouteMiddleware", # MIDDLEWARE_ROUTES
+    "corsheaders.middleware.CorsMiddleware",
+]
+
+# Session/cookie based auth of the admin, DRF's JWT authentication replaces them on the API
+ADMIN_ONLY_MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    "corsheaders.middleware.CorsMiddleware",
 ]
 
+# URL prefix -> middleware run by config.middleware.RouteMiddleware, the longest matching prefix wins
+MIDDLEWARE_ROUTES = {
+    "/admin/": ADMIN_ONLY_MIDDLEWARE,
+    "/api/": [],
+    "": ADMIN_ONLY_MIDDLEWARE, # everything else
+}
+
+if API_ONLY:
+    MIDDLEWARE.remove("config.middleware.RouteMiddleware")
+
+# The admin looks for its middleware in MIDDLEWARE only, RouteMiddleware runs them on /admin/
+SILENCED_SYSTEM_CHECKS = ["admin.E408", "admin.E409", "admin.E410"]
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
 ]
@@ -111,6 +229,11 @@ TEMPLATES = [
     },
 ]
 
+if API_ONLY:
+    TEMPLATES = []
+    # the browsable API is rendered from templates
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = ('config.renderers.APIRenderer',)
+
 WSGI_APPLICATION = 'config.wsgi.application'
 
 
@@ -125,7 +248,107 @@ DATABASES = {
         'PASSWORD': os.getenv("DB_PASSWORD"),
         'HOST': os.getenv("DB_HOST"),
         'PORT': os.getenv("DB_PORT"),
+        'CONN_HEALTH_CHECKS': True, # pooled/persistent connections are checked before a request uses them
+    }
+}
+
+# Connection reuse (see config/db_pool.py)
+#   "pool" - psycopg 3 pool per process (PostgreSQL only), requests borrow a connection and give it back
+#   "persistent" - each thread keeps its connection for MAX_AGE seconds (Django's CONN_MAX_AGE), any backend
+#   "off" - a new connection per request
+DB_POOL = {
+    "MODE": os.getenv("DB_POOL_MODE", "pool" if DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql" else "off"),
+    "MIN_SIZE": int(os.getenv("DB_POOL_MIN_SIZE", "2")), # opened at worker start, never reaped
+    "MAX_SIZE": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+    "TIMEOUT": float(os.getenv("DB_POOL_TIMEOUT", "5")), # seconds a request waits for a free connection, then 500
+    "MAX_IDLE": 300, # seconds - idle connections above MIN_SIZE are closed after
+    "MAX_LIFETIME": 3600, # seconds - connections are replaced after, spreads reconnects over time
+    "MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "600")), # "persistent" mode only
+}
+
+if DB_POOL["MODE"] == "pool":
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": DB_POOL["MIN_SIZE"],
+            "max_size": DB_POOL["MAX_SIZE"],
+            "timeout": DB_POOL["TIMEOUT"],
+            "max_idle": DB_POOL["MAX_IDLE"],
+            "max_lifetime": DB_POOL["MAX_LIFETIME"],
+            "name": "default",
+        },
     }
+elif DB_POOL["MODE"] == "persistent":
+    DATABASES["default"]["CONN_MAX_AGE"] = DB_POOL["MAX_AGE"]
+
+
+# Cache
+# User row versions, the blacklist generation, throttle counts and refresh grace results live in the default cache.
+# With more than one worker process CACHE_URL has to point to Redis (redis://host:6379/0) - shared by the processes,
+# with atomic counters. Without it every process has its own local memory cache, and what relies on it being shared
+# falls back to the database or to shorter lifetimes (see config.cache_helpers.cache_is_local()).
+CACHE_URL = os.getenv("CACHE_URL", "")
+CACHES = {
+    "default": (
+        {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": CACHE_URL} if CACHE_URL
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    ),
+}
+
+# Recipe search (see recipes/search.py) - tsvector + trigram indexes on PostgreSQL, in-process inverted index otherwise
+RECIPE_SEARCH = {
+    "DEFAULT_LIMIT": 20,
+    "MAX_LIMIT": 100,
+    "MAX_OFFSET": 1000, # results past it are not worth ranking, the query should be narrowed
+    "RANK_WINDOW": 5000, # PostgreSQL ranks the newest title/ingredient matches only, over MAX_OFFSET + MAX_LIMIT
+    "MAX_TERMS": 10, # words of `q` + `ingredients`
+    "MIN_INGREDIENT_LEN": 3, # substring match, trigram indexes need 3 characters
+}
+
+# Recipe feed (see recipes/summaries.py) - keyset pages of RecipeSummary rows, newest first
+RECIPE_FEED = {
+    "DEFAULT_LIMIT": 20,
+    "MAX_LIMIT": 100,
+}
+
+# Recipe votes (see recipes/ratings.py)
+RECIPE_RATING = {
+    "MIN_VALUE": 1,
+    "MAX_VALUE": 5,
+    "RECONCILE_BATCH_SIZE": 1000, # recipes locked and recounted per transaction by `manage.py reconcile_ratings`
+}
+
+# Shopping list of a meal plan (see recipes/shopping.py)
+SHOPPING_LIST = {
+    "MAX_RECIPES": 200, # a month of meals, every one a different recipe
+    "MAX_SERVINGS": 1000, # per recipe
+}
+
+# NDJSON import/export of recipes (see recipes/transfer.py)
+RECIPE_TRANSFER = {
+    "EXPORT_CHUNK_SIZE": 500, # recipes per fetch of the server-side cursor, + 2 queries of their ingredients/steps
+    "IMPORT_BATCH_SIZE": 500, # recipes written per transaction
+    "MAX_LINE_BYTES": 1_000_000, # one recipe - longer lines are skipped unread
+    "MAX_PARTS": 1000, # ingredient categories, items of a category, steps - per recipe
+    "MAX_REPORTED_ERRORS": 100, # invalid lines listed in the response of the import endpoint, the rest only counted
+}
+
+
+# Recipe images (see recipes/images.py) - content addressed files on the local filesystem
+RECIPE_IMAGES = {
+    "ROOT": Path(os.getenv("RECIPE_IMAGES_ROOT", BASE_DIR / "media" / "recipe_images")),
+    "MAX_BYTES": 10 * 2**20, # upload
+    "MAX_PIXELS": 40_000_000, # decoded size, checked from the header before the image is rendered
+    "FORMATS": ("JPEG", "PNG", "WEBP"), # accepted uploads (Pillow format names)
+    "WIDTHS": (160, 320, 640, 1280), # responsive variants, WebP + JPEG each - never upscaled
+    "THUMBNAIL_WIDTH": 320, # the image of the feed cards
+    "WEBP_QUALITY": 80,
+    "JPEG_QUALITY": 85,
+    "CHUNK_SIZE": 64 * 2**10, # of the upload, read from the request stream and written to disk
+    "WORKERS": int(os.getenv("RECIPE_IMAGES_WORKERS", "2")), # 0 = render inline, in the request thread
+    "QUEUE_DEPTH": int(os.getenv("RECIPE_IMAGES_QUEUE_DEPTH", "16")), # in flight renders per process, then RATE_LIMITED
+    # internal location of ROOT in the web server - files are sent by it (X-Accel-Redirect), "" = by Django
+    "ACCEL_REDIRECT": os.getenv("RECIPE_IMAGES_ACCEL_REDIRECT", ""),
+    "SHARED_MAX_AGE": 3600, # seconds shared caches keep a public variant - served on for that long once made private
 }
 
 
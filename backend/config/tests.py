@@ -0,0 +1,42 @@
+from unittest import skipUnless
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.http import JsonResponse
+from django.test import TransactionTestCase, override_settings
+from django.urls import path
+from .db_pool import get_pool, pool_stats, warm_up_db_pool
+
+
+def session_view(request):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_backend_pid()")
+        return JsonResponse({"session": cursor.fetchone()[0]})
+
+
+urlpatterns = [path("session/", session_view)]
+
+
+# Requests borrow a pooled connection and give it back (config.db_pool) - a TransactionTestCase, Django closes
+# connections for real outside of a test transaction.
+# the mode from the settings - get_pool() here would create the pool of the database the tests don't run against
+@skipUnless(settings.DB_POOL["MODE"] == "pool", "DB_POOL mode \"pool\" (PostgreSQL) only")
+@override_settings(ROOT_URLCONF=__name__)
+class DatabasePoolTests(TransactionTestCase):
+    def setUp(self):
+        connection.close() # back to the pool - the requests check out every connection of it
+        warm_up_db_pool()
+        get_pool().wait() # until MIN_SIZE connections are ready - a request kept waiting would grow the pool
+
+    def request_session(self) -> int:
+        response = self.client.get("/session/")
+        close_old_connections() # the test client doesn't close connections on request_finished, a server does
+        return response.json()["session"]
+
+    def test_requests_reuse_connections(self):
+        stats = pool_stats()
+        sessions = [self.request_session() for _ in range(stats["idle"] + 1)]
+
+        # one more request than there are idle connections - one of them served two, none was opened
+        self.assertLess(len(set(sessions)), len(sessions))
+        self.assertEqual(pool_stats()["connects"], stats["connects"])
@@ -14,11 +14,13 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
+from django.conf import settings
+from django.http import HttpResponse
 from django.urls import path, include
 from rest_framework.views import APIView
-from authentication.permissions import IsAuthenticatedEC
+from authentication.permissions import IsAdminEC, IsAuthenticatedEC
 from rest_framework.response import Response
+from config.metrics import collect, render_prometheus
 
 class ProtectedTestView(APIView):
     permission_classes = [IsAuthenticatedEC]
@@ -28,8 +30,21 @@ class ProtectedTestView(APIView):
             "auth_type": type(request.auth).__name__,
         })
 
+class MetricsView(APIView):
+    """Prometheus text of config.metrics, merged across the worker processes with METRICS["DIR"] set"""
+    permission_classes = [IsAdminEC]
+    def get(self, request):
+        return HttpResponse(render_prometheus(collect()), content_type="text/plain; version=0.0.4; charset=utf-8")
+
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path("api/v1/protected/", ProtectedTestView.as_view()),
     path("api/v1/auth/", include("authentication.urls")),
+    path("api/v1/recipes/", include("recipes.urls")),
+    path("api/v1/metrics/", MetricsView.as_view()),
 ]
+
+# Not even imported by API-only workers (settings.API_ONLY)
+if not settings.API_ONLY:
+    from django.contrib import admin
+
+    urlpatterns.insert(0, path('admin/', admin.site.urls))
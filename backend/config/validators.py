@@ -48,19 +48,18 @@ def validate_username_format(identifier):
         return [api_err_dict(EC.Validation.USERNAME_INVALID_FORMAT)]
     return []
 
-def validate_email_register(email):
-    """Checks if email is valid and not taken. Email is not required, returns empty list if not provided"""
-    errors = []
+def validate_email_format(email):
+    """Email is not required, returns empty list if not provided"""
     if not email:
-        return errors
+        return []
 
     try:
         validate_email_django(email)
     except DjangoValidationError:
-        errors.append(api_err_dict(EC.Validation.INVALID_EMAIL))
-        return errors
-
-    if User.objects.filter(email__iexact=email).exists():
-        errors.append(api_err_dict(EC.Validation.EMAIL_TAKEN))
+        return [api_err_dict(EC.Validation.INVALID_EMAIL)]
+    return []
 
-    return errors
+def validate_email_unique(email):
+    if email and User.objects.filter(email__iexact=email).exists():
+        return [api_err_dict(EC.Validation.EMAIL_TAKEN)]
+    return []
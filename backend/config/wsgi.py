@@ -14,3 +14,15 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+from authentication.hashing import start_hashing_pool  # noqa: E402
+from authentication.token_storage import start_token_maintenance_scheduler  # noqa: E402
+from config.db_pool import warm_up_db_pool  # noqa: E402
+from config.metrics import start_metrics_flusher  # noqa: E402
+from recipes.images import start_image_pool  # noqa: E402
+
+warm_up_db_pool()
+start_token_maintenance_scheduler()
+start_hashing_pool()
+start_image_pool()
+start_metrics_flusher()
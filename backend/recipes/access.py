@@ -0,0 +1,88 @@
+from enum import IntEnum
+
+from django.db.models import Exists, OuterRef, Q, Value
+from .models import Recipe, RecipeShare
+
+# Who can see a recipe: everyone if it's public, otherwise its author and the users it's shared with (RecipeShare).
+#
+# Single recipes and pages of them (votes, shopping lists) - resolve_access(): the level of the requester
+# for every id in one query (primary key + the (user, recipe) unique index of the shares), cached on the request,
+# so the permission check and the view don't ask twice. authentication.permissions.HasObjectAccessEC checks it.
+# The detail view reads author, flag and share in the query of its document instead (recipes.documents, access_level).
+# Images (recipes.images) - readable through any recipe that has them, image_visibility().
+# Lists (feed, search) - filtered in SQL by readable_filter(), the same rule as a WHERE clause: public rows pass on
+# their own flag, private ones only if they're the requester's or in the ids shared with them (one index range).
+
+
+class Access(IntEnum):
+    """Access of a user to a recipe - every level can do what the ones below it can"""
+    NONE = 0 # someone else's private recipe, or no such recipe
+    PUBLIC = 1 # reads
+    SHARED = 2 # reads, private or not
+    OWNER = 3 # writes, shares
+
+
+READ = Access.PUBLIC
+
+
+def resolve_access(request, recipe_ids) -> dict[int, Access]:
+    """Access of the requester to the recipes - one query for the ids not resolved earlier in this request"""
+    resolved = getattr(request, "recipe_access", None)
+    if resolved is None:
+        resolved = request.recipe_access = {}
+
+    unresolved = [recipe_id for recipe_id in recipe_ids if recipe_id not in resolved]
+    if unresolved:
+        user = request.user
+        resolved.update(dict.fromkeys(unresolved, Access.NONE))
+        rows = Recipe.objects.filter(id__in=unresolved).values_list("id", "author_id", "is_public", shared_with(user))
+        for recipe_id, author_id, is_public, is_shared in rows:
+            resolved[recipe_id] = access_level(user, author_id, is_public, is_shared)
+
+    return {recipe_id: resolved[recipe_id] for recipe_id in recipe_ids}
+
+
+def access_level(user, author_id, is_public, is_shared) -> Access:
+    """Access of the user to a recipe of the author - for queries that read the recipe row anyway"""
+    if author_id == user.pk:
+        return Access.OWNER
+    if is_shared:
+        return Access.SHARED
+    if is_public:
+        return Access.PUBLIC
+    return Access.NONE
+
+
+def shared_with(user, recipe_field="pk"):
+    """Expression - is the recipe (`recipe_field`, its id) shared with the user"""
+    if not user.is_authenticated:
+        return Value(False)
+    return Exists(RecipeShare.objects.filter(recipe_id=OuterRef(recipe_field), user_id=user.pk))
+
+
+def shared_ids(user):
+    """Subquery of the ids of the recipes shared with the user"""
+    return RecipeShare.objects.filter(user_id=user.pk).values("recipe_id")
+
+
+def readable_filter(user, recipe_field="pk") -> Q:
+    """
+    Filter of the rows the user can read, for models with the is_public and author_id of their recipe
+    (Recipe, RecipeSummary) - `recipe_field` the field of the recipe id.
+    """
+    if not user.is_authenticated:
+        return Q(is_public=True)
+    return Q(is_public=True) | Q(author_id=user.pk) | Q(**{f"{recipe_field}__in": shared_ids(user)})
+
+
+def image_visibility(user, key) -> bool | None:
+    """
+    None if the user can read no recipe with the image (key), otherwise whether everyone can (one of them is
+    public) - one query on the image index of the recipes.
+    """
+    return (
+        Recipe.objects.filter(readable_filter(user), image_id=key)
+        .order_by("-is_public")
+        .values_list("is_public", flat=True)
+        .first()
+    )
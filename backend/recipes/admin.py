@@ -0,0 +1,52 @@
+from django.contrib import admin
+from .models import IngredientCategory, IngredientItem, Recipe, RecipeImage, RecipeShare, Step
+
+
+class IngredientCategoryInline(admin.TabularInline):
+    model = IngredientCategory
+    extra = 0
+
+
+class IngredientItemInline(admin.TabularInline):
+    model = IngredientItem
+    extra = 0
+
+
+class StepInline(admin.StackedInline):
+    model = Step
+    extra = 0
+
+
+class RecipeShareInline(admin.TabularInline):
+    model = RecipeShare
+    extra = 0
+    raw_id_fields = ("user",)
+
+
+@admin.register(Recipe)
+class RecipeAdmin(admin.ModelAdmin):
+    list_display = ("title", "author", "base_servings", "is_public", "rating_count", "updated_at")
+    list_filter = ("is_public",)
+    search_fields = ("title", "author__username")
+    raw_id_fields = ("author", "image")
+    inlines = (IngredientCategoryInline, StepInline, RecipeShareInline)
+
+
+@admin.register(RecipeImage)
+class RecipeImageAdmin(admin.ModelAdmin):
+    list_display = ("key", "width", "height", "status", "created_at")
+    list_filter = ("status",)
+    search_fields = ("key",)
+
+
+@admin.register(IngredientCategory)
+class IngredientCategoryAdmin(admin.ModelAdmin):
+    list_display = ("__str__", "recipe", "position")
+    raw_id_fields = ("recipe",)
+    inlines = (IngredientItemInline,)
+
+
+@admin.register(IngredientItem)
+class IngredientItemAdmin(admin.ModelAdmin):
+    list_display = ("name", "amount", "unit", "category")
+    raw_id_fields = ("category",)
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class RecipesConfig(AppConfig):
+    name = 'recipes'
+
+    def ready(self):
+        from . import ratings, search, summaries  # noqa: F401 - connect their signal receivers
@@ -0,0 +1,209 @@
+from datetime import timezone
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Exists, OuterRef, Value
+from .access import Access, access_level, shared_with
+from .images import image_document
+from .models import IngredientCategory, IngredientItem, Recipe, RecipeImage, RecipeShare, RecipeVote, Step
+
+# The nested Recipe document of the frontend (frontend/src/types/recipe.ts), read in at most two queries:
+#   PostgreSQL - one query, the document is built by the DB with json_build_object/json_agg
+#   other backends - recipe + author + image + steps in one query, categories LEFT JOIN items in the other.
+#                    Both return one row per step / item, bounded by the recipe itself.
+# Both return the same document, timestamps formatted the same way. The image (null until its variants are
+# rendered) gets its URLs from recipes.images.image_document() on both.
+# The recipe's row also answers the requester's access (author, is_public, shared with them - recipes.access) and
+# requesterVoted, so the detail endpoint needs no other query.
+
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+PG_TIMESTAMP_FORMAT = 'YYYY-MM-DD"T"HH24:MI:SS.US"Z"'
+
+
+def format_timestamp(value) -> str:
+    return value.astimezone(timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+
+def rating(rating_sum, rating_count, requester_voted=False) -> dict:
+    return {
+        "value": rating_sum / rating_count if rating_count else 0,
+        "votes": rating_count,
+        "requesterVoted": requester_voted,
+    }
+
+
+# ---------- POSTGRESQL ----------
+
+RECIPE_DOCUMENT_SQL = f"""
+SELECT json_build_object(
+    'id', r.id::text,
+    'title', r.title,
+    'description', r.description,
+    'details', json_build_object(
+        'author', u.username,
+        'baseServings', r.base_servings,
+        'lastUpdated', to_char(r.updated_at AT TIME ZONE 'UTC', '{PG_TIMESTAMP_FORMAT}'),
+        'rating', json_build_object(
+            'value', CASE WHEN r.rating_count = 0 THEN 0 ELSE r.rating_sum::float8 / r.rating_count END,
+            'votes', r.rating_count,
+            'requesterVoted', EXISTS (
+                SELECT 1 FROM {RecipeVote._meta.db_table} v WHERE v.recipe_id = r.id AND v.user_id = %(user_id)s
+            )
+        )
+    ),
+    'ingredients', COALESCE((
+        SELECT json_agg(json_build_object(
+            'position', c.position,
+            'title', c.title,
+            'items', COALESCE((
+                SELECT json_agg(json_build_object(
+                    'name', i.name, 'amount', i.amount, 'unit', i.unit, 'notes', i.notes
+                ) ORDER BY i.position)
+                FROM {IngredientItem._meta.db_table} i
+                WHERE i.category_id = c.id
+            ), '[]'::json)
+        ) ORDER BY c.position)
+        FROM {IngredientCategory._meta.db_table} c
+        WHERE c.recipe_id = r.id
+    ), '[]'::json),
+    'steps', COALESCE((
+        SELECT json_agg(
+            CASE WHEN s.title = ''
+                THEN json_build_object('position', s.position, 'description', s.description)
+                ELSE json_build_object('position', s.position, 'title', s.title, 'description', s.description)
+            END
+        ORDER BY s.position)
+        FROM {Step._meta.db_table} s
+        WHERE s.recipe_id = r.id
+    ), '[]'::json)
+), i.key, i.width, i.height, r.author_id, r.is_public, EXISTS (
+    SELECT 1 FROM {RecipeShare._meta.db_table} sh WHERE sh.recipe_id = r.id AND sh.user_id = %(user_id)s
+)
+FROM {Recipe._meta.db_table} r
+JOIN {get_user_model()._meta.db_table} u ON u.id = r.author_id
+LEFT JOIN {RecipeImage._meta.db_table} i ON i.key = r.image_id AND i.status = '{RecipeImage.Status.READY}'
+WHERE r.id = %(pk)s
+"""
+
+
+def postgres_document(pk, user) -> tuple[dict | None, Access]:
+    with connection.cursor() as cursor:
+        cursor.execute(RECIPE_DOCUMENT_SQL, {"pk": pk, "user_id": user.pk}) # NULL user matches no vote or share
+        row = cursor.fetchone()
+    if row is None:
+        return None, Access.NONE
+    document, image_key, width, height, author_id, is_public, is_shared = row # json is decoded by psycopg
+    document["image"] = image_document(image_key, width, height) if image_key else None
+    return document, access_level(user, author_id, is_public, is_shared)
+
+
+# ---------- OTHER BACKENDS ----------
+
+def prefetch_document(pk, user) -> tuple[dict | None, Access]:
+    # 1. recipe + author + steps (LEFT JOIN - a recipe without steps is one row of NULL steps)
+    voted = Value(False)
+    if user.is_authenticated:
+        voted = Exists(RecipeVote.objects.filter(recipe_id=OuterRef("pk"), user_id=user.pk))
+    rows = list(
+        Recipe.objects.filter(pk=pk)
+        .annotate(is_shared=shared_with(user), requester_voted=voted)
+        .values(
+            "id", "title", "description", "base_servings", "rating_sum", "rating_count", "updated_at",
+            "author_id", "is_public", "is_shared", "requester_voted",
+            "author__username", "image__key", "image__width", "image__height", "image__status",
+            "steps__position", "steps__title", "steps__description",
+        )
+        .order_by("steps__position")
+    )
+    if not rows:
+        return None, Access.NONE
+
+    recipe = rows[0]
+    steps = []
+    for row in rows:
+        if row["steps__position"] is None:
+            continue
+        step = {"position": row["steps__position"]}
+        if row["steps__title"]:
+            step["title"] = row["steps__title"]
+        step["description"] = row["steps__description"]
+        steps.append(step)
+
+    # 2. categories + items (LEFT JOIN - empty categories are one row of NULL items)
+    ingredients = []
+    category_rows = (
+        IngredientCategory.objects.filter(recipe_id=pk)
+        .values(
+            "id", "position", "title",
+            "items__position", "items__name", "items__amount", "items__unit", "items__notes",
+        )
+        .order_by("position", "items__position")
+    )
+    current_id = None
+    for row in category_rows:
+        if row["id"] != current_id:
+            current_id = row["id"]
+            ingredients.append({"position": row["position"], "title": row["title"], "items": []})
+        if row["items__position"] is not None:
+            ingredients[-1]["items"].append({
+                "name": row["items__name"],
+                "amount": row["items__amount"],
+                "unit": row["items__unit"],
+                "notes": row["items__notes"],
+            })
+
+    image = None
+    if recipe["image__status"] == RecipeImage.Status.READY:
+        image = image_document(recipe["image__key"], recipe["image__width"], recipe["image__height"])
+
+    document = {
+        "id": str(recipe["id"]),
+        "title": recipe["title"],
+        "description": recipe["description"],
+        "details": {
+            "author": recipe["author__username"],
+            "baseServings": recipe["base_servings"],
+            "lastUpdated": format_timestamp(recipe["updated_at"]),
+            "rating": rating(recipe["rating_sum"], recipe["rating_count"], recipe["requester_voted"]),
+        },
+        "ingredients": ingredients,
+        "steps": steps,
+        "image": image,
+    }
+    return document, access_level(user, recipe["author_id"], recipe["is_public"], recipe["is_shared"])
+
+
+def recipe_document(pk, user) -> tuple[dict | None, Access]:
+    """
+    Nested Recipe document (requesterVoted of `user`) and the user's access to it - (None, Access.NONE) if there is
+    no such recipe. The document is read whatever the access, the caller checks it before returning it.
+    """
+    if connection.vendor == "postgresql":
+        return postgres_document(pk, user)
+    return prefetch_document(pk, user)
+
+
+# ---------- SUMMARIES ----------
+
+SUMMARY_FIELDS = ("id", "title", "base_servings", "rating_sum", "rating_count", "updated_at", "author__username")
+
+
+def recipe_summaries(recipe_ids, voted=frozenset()) -> list[dict]:
+    """
+    Title and details of the recipes, in the order of `recipe_ids` (missing ones left out), one query.
+    `voted` - ids of the recipes the requester has voted for (recipes.ratings.requester_voted).
+    """
+    rows = {row["id"]: row for row in Recipe.objects.filter(id__in=recipe_ids).values(*SUMMARY_FIELDS)}
+    return [
+        {
+            "id": str(row["id"]),
+            "title": row["title"],
+            "details": {
+                "author": row["author__username"],
+                "baseServings": row["base_servings"],
+                "lastUpdated": format_timestamp(row["updated_at"]),
+                "rating": rating(row["rating_sum"], row["rating_count"], row["id"] in voted),
+            },
+        }
+        for row in map(rows.get, recipe_ids) if row is not None
+    ]
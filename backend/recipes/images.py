@@ -0,0 +1,303 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+from django.db import close_old_connections
+from rest_framework.exceptions import Throttled, ValidationError
+from config.error_helpers import api_err_dict
+from config.renderers import API_PATH_PREFIX
+from config.response_codes import EC
+from .models import Recipe, RecipeImage
+
+logger = logging.getLogger(__name__)
+
+# Recipe images, content addressed on the local filesystem - the sha256 of the uploaded bytes is the key:
+#   ROOT/<key[:2]>/<key>/original        the upload, as it was sent
+#   ROOT/<key[:2]>/<key>/<width>.webp    variants, one per WIDTHS in WebP and JPEG - never upscaled, so a variant of
+#   ROOT/<key[:2]>/<key>/<width>.jpg     a smaller image is the image at its own size (its srcset descriptor says so)
+# An upload is streamed to a temporary file in ROOT/tmp while it's hashed, chunk by chunk - the body is never held in
+# memory. Only its header is read in the request (format, pixel count). Content already stored is not stored again.
+#
+# Variants are rendered in a bounded process pool (like the password hashing pool, authentication.hashing), after
+# the upload's transaction commits. The worker marks the image READY (or FAILED) and refreshes the summaries of its
+# recipes - the feed shows a thumbnail only once the variants exist. At most QUEUE_DEPTH renders are in flight per
+# process, uploads above that are rejected with RATE_LIMITED before their body is read. A worker process dying
+# breaks the pool - the next render starts a new one, the image left PENDING is rendered by process_recipe_images.
+#
+# A key names one content forever, the variants are served with immutable cache headers (RecipeImageFileView) to
+# the users who can read a recipe with the image (recipes.access.image_visibility) - by the web server with
+# ACCEL_REDIRECT set.
+
+image_settings = settings.RECIPE_IMAGES
+
+KEY_RE = re.compile(r"[0-9a-f]{64}")
+VARIANT_RE = re.compile(r"(?P<width>[0-9]+)\.(?P<extension>webp|jpg)")
+CONTENT_TYPES = {"webp": "image/webp", "jpg": "image/jpeg"}
+URL_PREFIX = f"{API_PATH_PREFIX}recipes/images/"
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+
+def image_dir(key):
+    return image_settings["ROOT"] / key[:2] / key
+
+
+def variant_path(key, variant):
+    return image_dir(key) / variant
+
+
+def variant_url(key, width, extension) -> str:
+    return f"{URL_PREFIX}{key}/{width}.{extension}"
+
+
+def is_variant(variant) -> bool:
+    """If `variant` is the file name of one of the variants (<width>.<extension>)"""
+    match = VARIANT_RE.fullmatch(variant)
+    return match is not None and int(match["width"]) in image_settings["WIDTHS"]
+
+
+def thumbnail_url(key) -> str | None:
+    """URL of the feed card's image, None without one ("" key)"""
+    return variant_url(key, image_settings["THUMBNAIL_WIDTH"], "webp") if key else None
+
+
+def image_document(key, width, height) -> dict:
+    """Image of the Recipe document - jpeg src and srcsets of the variants, widths as rendered"""
+    variants = {} # rendered width -> configured width (the file name), the smallest name of a repeated width
+    for name in sorted(image_settings["WIDTHS"]):
+        variants.setdefault(min(name, width), name)
+
+    def srcset(extension):
+        return ", ".join(f"{variant_url(key, name, extension)} {rendered}w" for rendered, name in variants.items())
+
+    return {
+        "width": width,
+        "height": height,
+        "src": variant_url(key, variants[max(variants)], "jpg"),
+        "srcset": {"image/webp": srcset("webp"), "image/jpeg": srcset("jpg")},
+    }
+
+
+# ---------- WORKER SIDE (runs in the pool processes) ----------
+
+def _noop():
+    return None
+
+
+def _save(image, path, **options):
+    """Writes the file next to its final path and moves it there - readers never see a partial file"""
+    descriptor, temporary = tempfile.mkstemp(dir=path.parent, prefix=".", suffix=path.suffix)
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            image.save(file, **options)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def render_variants(key) -> tuple[int, int]:
+    """Renders the variants of the stored original, returns its (width, height) upright"""
+    from PIL import ExifTags, Image, ImageOps
+
+    Image.MAX_IMAGE_PIXELS = image_settings["MAX_PIXELS"]
+    widths = sorted(image_settings["WIDTHS"], reverse=True)
+    with Image.open(image_dir(key) / "original") as original:
+        width, height = original.size
+        if original.getexif().get(ExifTags.Base.Orientation) in (5, 6, 7, 8): # stored rotated by 90 degrees
+            width, height = height, width
+        # JPEG decodes at 1/2, 1/4 or 1/8 scale straight away if that's still larger than the largest variant
+        original.draft("RGB", (widths[0], widths[0]))
+        image = ImageOps.exif_transpose(original)
+        if image.mode in ("RGBA", "LA") or "transparency" in image.info:
+            image = image.convert("RGBA")
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+
+    # each variant is scaled down from the next larger one - a fraction of the pixels of the original
+    for name in widths:
+        if name < image.width:
+            image = image.resize(
+                (name, max(1, round(image.height * name / image.width))), Image.Resampling.LANCZOS,
+            )
+        _save(image, image_dir(key) / f"{name}.webp", format="WEBP", quality=image_settings["WEBP_QUALITY"])
+        flat = image
+        if image.mode == "RGBA": # JPEG has no alpha - onto white
+            flat = Image.new("RGB", image.size, "white")
+            flat.paste(image, mask=image.getchannel("A"))
+        _save(flat, image_dir(key) / f"{name}.jpg", format="JPEG", quality=image_settings["JPEG_QUALITY"],
+              optimize=True, progressive=True)
+    return width, height
+
+
+def _render(key) -> bool:
+    """Renders the variants and marks the image READY (FAILED if it can't be decoded), refreshes its recipes"""
+    from .summaries import refresh_summaries # imports this module
+
+    close_old_connections() # the pool's processes keep theirs between jobs, like the server's threads between requests
+    try:
+        width, height = render_variants(key)
+    except Exception:
+        logger.exception(f"Recipe image {key} failed to render")
+        RecipeImage.objects.filter(pk=key).update(status=RecipeImage.Status.FAILED)
+        return False
+
+    RecipeImage.objects.filter(pk=key).update(status=RecipeImage.Status.READY, width=width, height=height)
+    refresh_summaries(Recipe.objects.filter(image_id=key).values_list("id", flat=True))
+    return True
+
+
+# ---------- REQUEST SIDE ----------
+
+def get_executor() -> ProcessPoolExecutor | None:
+    """Pool shared by all threads of the process, None when WORKERS is 0 (render inline)"""
+    global _executor
+
+    workers = image_settings["WORKERS"]
+    if not workers:
+        return None
+
+    with _executor_lock:
+        if _executor is None:
+            # spawn - forking a process with running threads (server, scheduler) is not safe
+            _executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                # not a function of this module - unpickling it would import the models before Django is set up
+                # (DJANGO_SETTINGS_MODULE is inherited from the server's environment)
+                initializer=django.setup,
+            )
+        return _executor
+
+
+def start_image_pool():
+    """Starts the pool processes ahead of the first upload - call once per server process (config.wsgi / config.asgi)"""
+    executor = get_executor()
+    if executor is None:
+        return
+
+    for _ in range(image_settings["WORKERS"]):
+        executor.submit(_noop)
+
+
+def _discard_executor(executor):
+    """Drops a broken pool, the next render starts a new one"""
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def reserve_render():
+    """Takes a render slot, raises Throttled if QUEUE_DEPTH renders are already in flight"""
+    global _in_flight
+    with _in_flight_lock:
+        if _in_flight >= image_settings["QUEUE_DEPTH"]:
+            raise Throttled()
+        _in_flight += 1
+
+
+def release_render(_future=None):
+    global _in_flight
+    with _in_flight_lock:
+        _in_flight -= 1
+
+
+def submit_render(key) -> Future:
+    """
+    Renders the variants of the image in the pool, in the slot taken by reserve_render() - released when it's done.
+    Without a pool the render runs inline.
+    """
+    executor = get_executor()
+    if executor is None:
+        future: Future = Future()
+        try:
+            future.set_result(_render(key))
+        except Exception as exc:
+            future.set_exception(exc)
+        finally:
+            release_render()
+        return future
+
+    try:
+        try:
+            future = executor.submit(_render, key)
+        except BrokenProcessPool: # broken by an earlier render
+            _discard_executor(executor)
+            future = get_executor().submit(_render, key)
+    except Exception:
+        release_render()
+        raise
+    future.add_done_callback(release_render)
+    return future
+
+
+def read_header(path) -> tuple[int, int]:
+    """(width, height) of the image, raises ValidationError if it's not one of FORMATS or has too many pixels"""
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        with Image.open(path, formats=image_settings["FORMATS"]) as image: # reads the header only
+            width, height = image.size
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise ValidationError({"image": [api_err_dict(EC.Validation.INVALID_IMAGE)]})
+    if width * height > image_settings["MAX_PIXELS"]:
+        raise ValidationError({
+            "image": [api_err_dict(EC.Validation.INVALID_IMAGE, maxPixels=image_settings["MAX_PIXELS"])]
+        })
+    return width, height
+
+
+def store_upload(stream) -> tuple[str, int, int]:
+    """
+    Streams an uploaded image into storage, returns its (key, width, height) - raises ValidationError if it's over
+    MAX_BYTES or not an accepted image. Content stored before is only hashed.
+    """
+    max_bytes, chunk_size = image_settings["MAX_BYTES"], image_settings["CHUNK_SIZE"]
+    temporary_dir = image_settings["ROOT"] / "tmp" # on the filesystem of the images - moved by a rename
+    temporary_dir.mkdir(parents=True, exist_ok=True)
+
+    digest, size = hashlib.sha256(), 0
+    descriptor, temporary = tempfile.mkstemp(dir=temporary_dir)
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            while chunk := stream.read(chunk_size):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ValidationError({"image": [api_err_dict(EC.Validation.IMAGE_TOO_LARGE, max=max_bytes)]})
+                digest.update(chunk)
+                file.write(chunk)
+        if not size:
+            raise ValidationError({"image": [api_err_dict(EC.Validation.REQUIRED)]})
+
+        width, height = read_header(temporary)
+        key = digest.hexdigest()
+        original = image_dir(key) / "original"
+        if not original.exists():
+            original.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(temporary, original)
+    finally:
+        if os.path.exists(temporary):
+            os.unlink(temporary)
+    return key, width, height
+
+
+def delete_files(key):
+    """Removes the original and the variants of an image"""
+    directory = image_dir(key)
+    if directory.is_dir():
+        for path in directory.iterdir():
+            path.unlink(missing_ok=True)
+        directory.rmdir()
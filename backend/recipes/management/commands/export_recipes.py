@@ -0,0 +1,41 @@
+import sys
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.models import Recipe
+from recipes.transfer import export_lines
+
+
+class Command(BaseCommand):
+    help = (
+        "Writes recipes as NDJSON, one Recipe document per line, in id order. "
+        "Recipes are read through a server-side cursor, memory use doesn't grow with their number."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--author", help="username - only the recipes of this user (default: all)")
+        parser.add_argument("--output", default="-", help="file path, - for stdout")
+        parser.add_argument("--chunk-size", type=int, default=settings.RECIPE_TRANSFER["EXPORT_CHUNK_SIZE"])
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.all()
+        if options["author"] is not None:
+            try:
+                author = get_user_model().objects.get(username=options["author"])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"No user {options['author']!r}")
+            recipes = recipes.filter(author=author)
+
+        output = sys.stdout.buffer if options["output"] == "-" else open(options["output"], "wb")
+        exported = 0
+        try:
+            for line in export_lines(recipes, options["chunk_size"]):
+                output.write(line)
+                exported += 1
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+
+        self.stderr.write(f"Exported recipes: {exported}")
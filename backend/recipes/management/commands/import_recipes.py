@@ -0,0 +1,42 @@
+import sys
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from config.exception_handler import extract_error_details
+from config.renderers import dumps
+from config.response_codes import ECNS, EC
+from recipes.transfer import import_recipes
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports recipes from NDJSON, one Recipe document per line, as new recipes of --author. "
+        "Lines are read one at a time and written in batches, one transaction each. "
+        "Invalid lines are reported on stderr and skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", help="file path, - for stdin")
+        parser.add_argument("--author", required=True, help="username of the owner of the imported recipes")
+        parser.add_argument("--batch-size", type=int, default=settings.RECIPE_TRANSFER["IMPORT_BATCH_SIZE"])
+
+    def handle(self, *args, **options):
+        try:
+            author = get_user_model().objects.get(username=options["author"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user {options['author']!r}")
+
+        def on_error(line, errors):
+            details = extract_error_details(detail=errors, namespace=ECNS.VALIDATION, fallback_code=EC.Validation.GENERIC)
+            self.stderr.write(f"Line {line}: {dumps(details).decode()}")
+
+        stream = sys.stdin.buffer if options["input"] == "-" else open(options["input"], "rb")
+        try:
+            imported, failed = import_recipes(stream, author, on_error, options["batch_size"])
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+
+        self.stdout.write(f"Imported recipes: {imported}, Failed lines: {failed}")
@@ -0,0 +1,58 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.exceptions import Throttled
+
+from recipes.images import delete_files, image_settings, reserve_render, submit_render
+from recipes.models import RecipeImage
+
+
+class Command(BaseCommand):
+    help = (
+        "Renders the variants of the recipe images left pending (a server stopped mid-render), "
+        "optionally retries the failed ones and deletes the images no recipe uses."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--failed", action="store_true", help="render the failed images again too")
+        parser.add_argument("--prune", action="store_true", help="delete the images no recipe uses, with their files")
+        parser.add_argument(
+            "--min-age", type=int, default=60,
+            help="minutes - younger images are left alone (an upload may be rendering or about to be referenced)",
+        )
+
+    def handle(self, *args, **options):
+        older = timezone.now() - timedelta(minutes=options["min_age"])
+
+        statuses = [RecipeImage.Status.PENDING]
+        if options["failed"]:
+            statuses.append(RecipeImage.Status.FAILED)
+        keys = RecipeImage.objects.filter(status__in=statuses, created_at__lt=older).values_list("key", flat=True)
+        futures = []
+        for key in keys.iterator():
+            while True:
+                try:
+                    reserve_render()
+                    break
+                except Throttled: # QUEUE_DEPTH renders in flight
+                    time.sleep(0.1)
+            futures.append(submit_render(key))
+        rendered = sum(future.result() for future in futures)
+        self.stderr.write(f"Rendered images: {rendered}, failed: {len(futures) - rendered}")
+
+        if options["prune"]:
+            unused = RecipeImage.objects.filter(recipes__isnull=True, created_at__lt=older)
+            pruned = 0
+            for key in unused.values_list("key", flat=True).iterator():
+                # a recipe may have taken the image since it was listed
+                if RecipeImage.objects.filter(pk=key, recipes__isnull=True).delete()[0]:
+                    delete_files(key)
+                    pruned += 1
+
+            # uploads of a server that stopped mid-request
+            for path in (image_settings["ROOT"] / "tmp").glob("*"):
+                if path.stat().st_mtime < older.timestamp():
+                    path.unlink(missing_ok=True)
+            self.stderr.write(f"Pruned images: {pruned}")
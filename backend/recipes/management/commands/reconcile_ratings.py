@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recipes.ratings import reconcile_batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Recounts rating_sum/rating_count of every recipe from its votes and repairs the ones that drifted. "
+        "Recipes are locked and recounted in batches, one transaction each - votes go on in between."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=settings.RECIPE_RATING["RECONCILE_BATCH_SIZE"])
+        parser.add_argument("--dry-run", action="store_true", help="report the drifted recipes, change nothing")
+
+    def handle(self, *args, **options):
+        checked = repaired = 0
+        last_id = 0
+        while True:
+            last_id, count, drifted = reconcile_batch(last_id, options["batch_size"], options["dry_run"])
+            if last_id is None:
+                break
+            checked += count
+            repaired += len(drifted)
+            for recipe_id, stored, counted in drifted:
+                self.stdout.write(f"Recipe {recipe_id}: stored sum/count {stored}, counted {counted}")
+
+        action = "Drifted" if options["dry_run"] else "Repaired"
+        self.stdout.write(f"Checked recipes: {checked}, {action}: {repaired}")
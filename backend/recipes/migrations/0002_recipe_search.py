@@ -0,0 +1,86 @@
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+# GIN indexes of the search (see recipes/search.py), PostgreSQL only - other backends search an in-process index
+INDEXES_SQL = """
+CREATE INDEX "recipe_search_vector_idx" ON "{table}" USING gin ("vector");
+CREATE INDEX "recipe_search_head_vector_idx" ON "{table}" USING gin ("head_vector");
+CREATE INDEX "recipe_search_ingredients_trgm_idx" ON "{table}" USING gin ("ingredients" gin_trgm_ops);
+"""
+
+
+# Documents of the existing recipes, with the columns of this migration - not recipes.search.SEARCH_DOCUMENT_SQL,
+# which reads the columns of the later ones (is_public, 0005 - true by default on both tables, its backfill)
+SEARCH_DOCUMENT_SQL = """
+INSERT INTO {document} (recipe_id, vector, head_vector, ingredients)
+SELECT
+    r.id,
+    strip(head.vector || to_tsvector('simple', r.description || ' ' || steps.text)),
+    head.vector,
+    lower(items.names)
+FROM {recipe} r
+CROSS JOIN LATERAL (
+    SELECT COALESCE(string_agg(i.name, E'\\n'), '') AS names
+    FROM {item} i
+    JOIN {category} c ON c.id = i.category_id
+    WHERE c.recipe_id = r.id
+) items
+CROSS JOIN LATERAL (
+    SELECT COALESCE(string_agg(s.title || ' ' || s.description, ' '), '') AS text
+    FROM {step} s
+    WHERE s.recipe_id = r.id
+) steps
+CROSS JOIN LATERAL (
+    SELECT setweight(to_tsvector('simple', r.title), 'A')
+        || setweight(to_tsvector('simple', items.names), 'B') AS vector
+) head
+"""
+
+
+class TrigramExtensionOnPostgres(TrigramExtension):
+    """TrigramExtension skips other backends on the way forward only - its way back queries pg_extension"""
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+def index_recipes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    def table(model):
+        return apps.get_model("recipes", model)._meta.db_table
+
+    schema_editor.execute(INDEXES_SQL.format(table=table("RecipeSearchDocument")))
+    schema_editor.execute(SEARCH_DOCUMENT_SQL.format(
+        document=table("RecipeSearchDocument"),
+        recipe=table("Recipe"),
+        item=table("IngredientItem"),
+        category=table("IngredientCategory"),
+        step=table("Step"),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0001_initial"),
+    ]
+
+    operations = [
+        TrigramExtensionOnPostgres(),
+        migrations.CreateModel(
+            name="RecipeSearchDocument",
+            fields=[
+                ("recipe", models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name="search_document", serialize=False, to="recipes.recipe")),
+                ("vector", django.contrib.postgres.search.SearchVectorField()),
+                ("head_vector", django.contrib.postgres.search.SearchVectorField()),
+                ("ingredients", models.TextField()),
+            ],
+        ),
+        # the indexes go with the table on the way back
+        migrations.RunPython(index_recipes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 6.0 on 2026-10-18 20:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Summaries of the existing recipes, with the columns of this migration - not recipes.summaries.SUMMARY_SQL, which
+# reads the columns of the later ones. Their defaults are their backfill: is_public (0005) is true on both tables,
+# recipes have no image (0006) - no thumbnail.
+SUMMARY_SQL = """
+INSERT INTO {summary}
+    (recipe_id, author_id, author_name, title, base_servings, rating_sum, rating_count, thumbnail, updated_at)
+SELECT r.id, r.author_id, u.username, r.title, r.base_servings, r.rating_sum, r.rating_count, '', r.updated_at
+FROM {recipe} r
+JOIN {user} u ON u.id = r.author_id
+WHERE r.id IN ({ids})
+"""
+BATCH_SIZE = 500 # ids per INSERT, under SQLite's limit of query parameters
+
+
+def summarize_recipes(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    RecipeSummary = apps.get_model("recipes", "RecipeSummary")
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+
+    recipe_ids = list(Recipe.objects.values_list("id", flat=True))
+    with schema_editor.connection.cursor() as cursor:
+        for start in range(0, len(recipe_ids), BATCH_SIZE):
+            batch = recipe_ids[start:start + BATCH_SIZE]
+            cursor.execute(
+                SUMMARY_SQL.format(
+                    summary=RecipeSummary._meta.db_table,
+                    recipe=Recipe._meta.db_table,
+                    user=User._meta.db_table,
+                    ids=", ".join(["%s"] * len(batch)),
+                ),
+                batch,
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_recipe_vote'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeSummary',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='recipes.recipe')),
+                ('author_name', models.CharField(max_length=150)),
+                ('title', models.CharField(max_length=200)),
+                ('base_servings', models.PositiveSmallIntegerField()),
+                ('rating_sum', models.PositiveIntegerField()),
+                ('rating_count', models.PositiveIntegerField()),
+                ('thumbnail', models.CharField(blank=True, max_length=64)),
+                ('updated_at', models.DateTimeField()),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-updated_at', '-recipe'], name='recipe_summary_feed_idx')],
+            },
+        ),
+        migrations.RunPython(summarize_recipes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 6.0 on 2026-10-18 21:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_recipe_summary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='is_public',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='recipesearchdocument',
+            name='is_public',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='recipesummary',
+            name='is_public',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.CreateModel(
+            name='RecipeShare',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shares', to='recipes.recipe')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='shared_recipes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'recipe'), name='recipe_share_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,176 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models
+
+# Mirrors the Recipe type of the frontend (frontend/src/types/recipe.ts):
+#   Recipe -> details (author, baseServings, lastUpdated, rating), ingredients (categories of items), steps
+
+
+class RecipeImage(models.Model):
+    """
+    An uploaded image, stored once per content - the sha256 of its bytes is the key of its files
+    (original and variants, recipes.images). Recipes with the same image share it.
+    """
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending" # variants being rendered
+        READY = "ready", "Ready"
+        FAILED = "failed", "Failed"
+
+    key = models.CharField(max_length=64, primary_key=True)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    status = models.CharField(max_length=8, choices=Status.choices, default=Status.PENDING)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.key
+
+
+class Recipe(models.Model):
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="recipes")
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    base_servings = models.PositiveSmallIntegerField(default=1)
+    # private ones are seen by the author and the users they're shared with (RecipeShare) only - recipes.access
+    is_public = models.BooleanField(default=True)
+    image = models.ForeignKey(RecipeImage, on_delete=models.SET_NULL, null=True, blank=True, related_name="recipes")
+
+    # Rating value = rating_sum / rating_count, kept on the row so reads never aggregate votes
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True) # lastUpdated
+
+    def __str__(self):
+        return self.title
+
+    @property
+    def rating_value(self) -> float:
+        return self.rating_sum / self.rating_count if self.rating_count else 0
+
+
+class IngredientCategory(models.Model):
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name="ingredient_categories")
+    position = models.PositiveSmallIntegerField()
+    title = models.CharField(max_length=200, null=True, blank=True)
+
+    class Meta:
+        ordering = ["position"]
+        constraints = [
+            # also the index of the detail lookup (recipe_id, position)
+            models.UniqueConstraint(fields=["recipe", "position"], name="ingredient_category_position_unique"),
+        ]
+
+    def __str__(self):
+        return self.title or f"#{self.position}"
+
+
+class IngredientItem(models.Model):
+    category = models.ForeignKey(IngredientCategory, on_delete=models.CASCADE, related_name="items")
+    position = models.PositiveSmallIntegerField()
+    name = models.CharField(max_length=200)
+    amount = models.FloatField()
+    unit = models.CharField(max_length=32, blank=True)
+    notes = models.TextField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["position"]
+        constraints = [
+            models.UniqueConstraint(fields=["category", "position"], name="ingredient_item_position_unique"),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class Step(models.Model):
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name="steps")
+    position = models.PositiveSmallIntegerField()
+    title = models.CharField(max_length=200, blank=True) # optional in the frontend type, "" is left out
+    description = models.TextField()
+
+    class Meta:
+        ordering = ["position"]
+        constraints = [
+            models.UniqueConstraint(fields=["recipe", "position"], name="step_position_unique"),
+        ]
+
+    def __str__(self):
+        return self.title or f"#{self.position}"
+
+
+class RecipeVote(models.Model):
+    """A user's rating of a recipe - counted into Recipe.rating_sum/rating_count by recipes.ratings"""
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name="votes")
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="recipe_votes",
+        db_index=False, # the unique constraint starts with it
+    )
+    value = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            # also the index of requesterVoted (user_id = ? AND recipe_id IN (...))
+            models.UniqueConstraint(fields=["user", "recipe"], name="recipe_vote_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.value} by {self.user_id} for {self.recipe_id}"
+
+
+class RecipeShare(models.Model):
+    """A private recipe shared with a user - they can read it (recipes.access)"""
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name="shares")
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="shared_recipes",
+        db_index=False, # the unique constraint starts with it
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # also the index of the access lookups (user_id = ? AND recipe_id IN (...)) and of the shared ids
+            models.UniqueConstraint(fields=["user", "recipe"], name="recipe_share_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.recipe_id} shared with {self.user_id}"
+
+
+class RecipeSummary(models.Model):
+    """
+    Card of a recipe in lists - everything the feed shows, no joins. Written by recipes.summaries
+    in the transaction of every change of the recipe, its rating or its author's username.
+    """
+    recipe = models.OneToOneField(Recipe, on_delete=models.CASCADE, primary_key=True, related_name="summary")
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    author_name = models.CharField(max_length=150) # username, copied
+    title = models.CharField(max_length=200)
+    base_servings = models.PositiveSmallIntegerField()
+    is_public = models.BooleanField(default=True)
+    rating_sum = models.PositiveIntegerField()
+    rating_count = models.PositiveIntegerField()
+    thumbnail = models.CharField(max_length=64, blank=True) # key of the recipe's image once it's READY, "" if none
+    updated_at = models.DateTimeField() # lastUpdated of the recipe
+
+    class Meta:
+        indexes = [
+            # keyset pagination of the feed - newest first, id breaks ties
+            models.Index(fields=["-updated_at", "-recipe"], name="recipe_summary_feed_idx"),
+        ]
+
+    def __str__(self):
+        return f"summary of {self.recipe_id}"
+
+
+class RecipeSearchDocument(models.Model):
+    """Search data of a recipe, PostgreSQL only - written by recipes.search after every change of the recipe"""
+    recipe = models.OneToOneField(Recipe, on_delete=models.CASCADE, primary_key=True, related_name="search_document")
+    vector = SearchVectorField() # whole recipe, no positions or weights - matching only
+    head_vector = SearchVectorField() # title A, ingredient names B - the matches ranked first
+    ingredients = models.TextField() # lowercase ingredient names, one per line - substring search
+    is_public = models.BooleanField(default=True) # of the recipe - private matches are checked for access only
+
+    def __str__(self):
+        return f"search document of {self.recipe_id}"
@@ -0,0 +1,138 @@
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.signals import pre_delete
+from .documents import rating
+from .models import Recipe, RecipeVote
+from .summaries import refresh_summaries
+
+# Recipe.rating_sum / rating_count are the sum and count of the recipe's votes, kept on the row so reads never touch
+# the votes table. Every vote change updates them in its transaction with F() expressions - relative, so concurrent
+# votes for the same recipe don't overwrite each other. The vote of the user is locked first (SELECT ... FOR UPDATE),
+# a changed vote adds the difference to the value it replaces.
+# Drift from writes around these functions (admin, raw SQL, restored backups) is repaired by
+# `manage.py reconcile_ratings`.
+
+
+def recipe_rating(recipe_id, requester_voted) -> dict:
+    rating_sum, rating_count = Recipe.objects.filter(pk=recipe_id).values_list("rating_sum", "rating_count").get()
+    return rating(rating_sum, rating_count, requester_voted)
+
+
+def locked_vote(recipe_id, user) -> int | None:
+    """Value of the user's vote for the recipe, locked until the end of the transaction"""
+    return (
+        RecipeVote.objects.select_for_update()
+        .filter(recipe_id=recipe_id, user=user)
+        .values_list("value", flat=True)
+        .first()
+    )
+
+
+def cast_vote(recipe_id, user, value) -> dict | None:
+    """Adds or changes the user's vote, returns the new rating of the recipe - None if there is no such recipe"""
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                old_value = locked_vote(recipe_id, user)
+                if old_value == value:
+                    return recipe_rating(recipe_id, requester_voted=True)
+
+                # before the vote is written - an unknown recipe is told by the update, not by a FK violation
+                updated = Recipe.objects.filter(pk=recipe_id).update(
+                    rating_sum=F("rating_sum") + value - (old_value or 0),
+                    rating_count=F("rating_count") + (1 if old_value is None else 0),
+                )
+                if not updated:
+                    return None
+
+                if old_value is None:
+                    RecipeVote.objects.create(recipe_id=recipe_id, user=user, value=value)
+                else:
+                    RecipeVote.objects.filter(recipe_id=recipe_id, user=user).update(value=value)
+                refresh_summaries([recipe_id])
+                return recipe_rating(recipe_id, requester_voted=True)
+        except IntegrityError:
+            # first vote of the user sent twice at once - the counts were rolled back, the retry finds the vote
+            if attempt:
+                raise
+
+
+def remove_vote(recipe_id, user) -> dict | None:
+    """Removes the user's vote, returns the new rating of the recipe - None if the user hasn't voted for it"""
+    with transaction.atomic():
+        old_value = locked_vote(recipe_id, user)
+        if old_value is None:
+            return None
+
+        RecipeVote.objects.filter(recipe_id=recipe_id, user=user).delete()
+        Recipe.objects.filter(pk=recipe_id).update(
+            rating_sum=F("rating_sum") - old_value,
+            rating_count=F("rating_count") - 1,
+        )
+        refresh_summaries([recipe_id])
+        return recipe_rating(recipe_id, requester_voted=False)
+
+
+def requester_voted(user, recipe_ids) -> set[int]:
+    """Ids of the recipes the user has voted for - one query on the (user, recipe) unique index, none if anonymous"""
+    if not user.is_authenticated or not recipe_ids:
+        return set()
+    return set(RecipeVote.objects.filter(user=user, recipe_id__in=recipe_ids).values_list("recipe_id", flat=True))
+
+
+def reconcile_batch(after_id, batch_size, dry_run=False) -> tuple[int | None, int, list[tuple]]:
+    """
+    Recounts rating_sum/rating_count of the next `batch_size` recipes with id > `after_id` from their votes,
+    in one transaction. Returns (last id or None when done, recipes checked,
+    [(recipe id, stored (sum, count), counted (sum, count))] of the recipes that were off - repaired unless `dry_run`).
+    """
+    with transaction.atomic():
+        # locked - a vote in progress is waited for and counted, a later one adds to the recounted values
+        recipes = list(
+            Recipe.objects.select_for_update()
+            .filter(pk__gt=after_id)
+            .order_by("pk")
+            .values_list("pk", "rating_sum", "rating_count")[:batch_size]
+        )
+        if not recipes:
+            return None, 0, []
+
+        first_id, last_id = recipes[0][0], recipes[-1][0]
+        counted = {
+            recipe_id: (votes_sum, votes_count)
+            for recipe_id, votes_sum, votes_count in RecipeVote.objects
+            .filter(recipe_id__gte=first_id, recipe_id__lte=last_id)
+            .values("recipe_id")
+            .annotate(votes_sum=Sum("value"), votes_count=Count("id"))
+            .values_list("recipe_id", "votes_sum", "votes_count")
+        }
+
+        drifted = [
+            (recipe_id, (rating_sum, rating_count), counted.get(recipe_id, (0, 0)))
+            for recipe_id, rating_sum, rating_count in recipes
+            if counted.get(recipe_id, (0, 0)) != (rating_sum, rating_count)
+        ]
+        if drifted and not dry_run:
+            Recipe.objects.bulk_update(
+                [Recipe(pk=recipe_id, rating_sum=votes[0], rating_count=votes[1]) for recipe_id, _, votes in drifted],
+                ["rating_sum", "rating_count"],
+            )
+            refresh_summaries(recipe_id for recipe_id, _, _ in drifted)
+        return last_id, len(recipes), drifted
+
+
+# ---------- SIGNALS ----------
+
+def user_deleting(sender, instance, **kwargs):
+    """The votes of a deleted user are cascaded - their values leave the recipes (and summaries) first"""
+    recipe_ids = list(RecipeVote.objects.filter(user=instance).values_list("recipe_id", flat=True))
+    vote_value = RecipeVote.objects.filter(recipe_id=OuterRef("pk"), user=instance).values("value")
+    Recipe.objects.filter(id__in=recipe_ids).update(
+        rating_sum=F("rating_sum") - Subquery(vote_value),
+        rating_count=F("rating_count") - 1,
+    )
+    refresh_summaries(recipe_ids)
+
+
+pre_delete.connect(user_deleting, sender=get_user_model())
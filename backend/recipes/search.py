@@ -0,0 +1,209 @@
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+from .access import readable_filter
+from .models import IngredientCategory, IngredientItem, Recipe, RecipeSearchDocument, RecipeShare, Step
+from .search_index import search_index
+
+# Search over title, ingredient names, description and steps of recipes:
+#   `terms` - words of the query, every one must match the start of a word of the recipe (prefix match), ranked
+#   `ingredients` - every one must be a substring of an ingredient name of the recipe (case-insensitive)
+#
+# PostgreSQL - RecipeSearchDocument, GIN indexed: tsvector of the head (title A, ingredient names B), stripped
+#              tsvector of the whole recipe (matching only) and the lowercase ingredient names with a trigram index
+#              for LIKE '%name%'. The 'simple' configuration - no stemming or stop words, recipes are written
+#              in more than one language.
+#              Matches with every word in the head come first, ranked by ts_rank of the head (the newest RANK_WINDOW
+#              of them), then the other ones, newest first - a word found in most recipes doesn't rank them all.
+# other backends - the in-process inverted index of recipes/search_index.py, same matching, similar ranking.
+#
+# Private recipes match only for their author and the users they're shared with (recipes.access): PostgreSQL
+# checks the ids of the private matches against the requester's recipes and shares (two subqueries, run once per
+# query, not per match), the in-process index leaves out the private recipes the requester can't read.
+#
+# Both are updated after commit of any write to a recipe, its categories, items or steps (signals below).
+# Writes bypassing signals (bulk_create, QuerySet.update(), raw SQL) call reindex_recipes() themselves.
+
+SEARCH_CONFIG = "simple"
+
+# Recipe fields not in the search document - saves writing only these skip the reindex
+UNINDEXED_FIELDS = frozenset({"rating_sum", "rating_count", "image", "updated_at"})
+
+# Upserts the documents of the recipes
+SEARCH_DOCUMENT_SQL = f"""
+INSERT INTO {RecipeSearchDocument._meta.db_table} (recipe_id, vector, head_vector, ingredients, is_public)
+SELECT
+    r.id,
+    strip(head.vector || to_tsvector('{SEARCH_CONFIG}', r.description || ' ' || steps.text)),
+    head.vector,
+    lower(items.names),
+    r.is_public
+FROM {Recipe._meta.db_table} r
+CROSS JOIN LATERAL (
+    SELECT COALESCE(string_agg(i.name, E'\\n'), '') AS names
+    FROM {IngredientItem._meta.db_table} i
+    JOIN {IngredientCategory._meta.db_table} c ON c.id = i.category_id
+    WHERE c.recipe_id = r.id
+) items
+CROSS JOIN LATERAL (
+    SELECT COALESCE(string_agg(s.title || ' ' || s.description, ' '), '') AS text
+    FROM {Step._meta.db_table} s
+    WHERE s.recipe_id = r.id
+) steps
+CROSS JOIN LATERAL (
+    SELECT setweight(to_tsvector('{SEARCH_CONFIG}', r.title), 'A')
+        || setweight(to_tsvector('{SEARCH_CONFIG}', items.names), 'B') AS vector
+) head
+WHERE r.id = ANY(%s)
+ON CONFLICT (recipe_id) DO UPDATE
+SET vector = EXCLUDED.vector, head_vector = EXCLUDED.head_vector, ingredients = EXCLUDED.ingredients,
+    is_public = EXCLUDED.is_public
+"""
+
+# matches the requester can read - recipes.access.readable_filter() of the search documents
+PUBLIC_FILTER_SQL = " AND d.is_public"
+READABLE_FILTER_SQL = f"""
+    AND (
+        d.is_public
+        OR d.recipe_id IN (SELECT id FROM {Recipe._meta.db_table} WHERE author_id = %(user_id)s)
+        OR d.recipe_id IN (SELECT recipe_id FROM {RecipeShare._meta.db_table} WHERE user_id = %(user_id)s)
+    )"""
+
+# ranks the newest RANK_WINDOW head matches only - ts_rank of every recipe with a common word is too slow
+HEAD_SEARCH_SQL = f"""
+SELECT h.recipe_id, ts_rank(h.head_vector, to_tsquery('{SEARCH_CONFIG}', %(query)s)) AS score
+FROM (
+    SELECT d.recipe_id, d.head_vector
+    FROM {RecipeSearchDocument._meta.db_table} d
+    WHERE d.head_vector @@ to_tsquery('{SEARCH_CONFIG}', %(query)s){{filters}}
+    ORDER BY d.recipe_id DESC
+    LIMIT %(window)s
+) h
+ORDER BY score DESC, h.recipe_id DESC
+LIMIT %(limit)s
+"""
+
+# also returns the head matches - excluded by the caller, estimates of "AND NOT head_vector @@ ..." are way off
+REST_SEARCH_SQL = f"""
+SELECT d.recipe_id, NULL
+FROM {RecipeSearchDocument._meta.db_table} d
+WHERE d.vector @@ to_tsquery('{SEARCH_CONFIG}', %(query)s){{filters}}
+ORDER BY d.recipe_id DESC
+LIMIT %(limit)s
+"""
+
+INGREDIENTS_SEARCH_SQL = f"""
+SELECT d.recipe_id, NULL
+FROM {RecipeSearchDocument._meta.db_table} d
+WHERE TRUE{{filters}}
+ORDER BY d.recipe_id DESC
+LIMIT %(limit)s
+"""
+
+
+# ---------- QUERIES ----------
+
+def postgres_search(terms, ingredients, limit, offset, user) -> list[tuple[int, float | None]]:
+    # every query stops at the end of the page
+    params = {"limit": offset + limit, "window": settings.RECIPE_SEARCH["RANK_WINDOW"], "user_id": user.pk}
+    filters = READABLE_FILTER_SQL if user.is_authenticated else PUBLIC_FILTER_SQL
+    for position, name in enumerate(ingredients):
+        filters += f" AND d.ingredients LIKE %(ingredient_{position})s"
+        params[f"ingredient_{position}"] = f"%{connection.ops.prep_for_like_query(name)}%"
+
+    with connection.cursor() as cursor:
+        if not terms:
+            cursor.execute(INGREDIENTS_SEARCH_SQL.format(filters=filters), params)
+            return cursor.fetchall()[offset:]
+
+        params["query"] = " & ".join(f"{term}:*" for term in terms) # words only, nothing to escape
+        cursor.execute(HEAD_SEARCH_SQL.format(filters=filters), params)
+        matches = cursor.fetchall()
+        if len(matches) == params["limit"]:
+            return matches[offset:]
+
+        # all the head matches are in, the rest of the page is newest first
+        head_ids = {recipe_id for recipe_id, _ in matches}
+        cursor.execute(REST_SEARCH_SQL.format(filters=filters), params)
+        matches += [match for match in cursor.fetchall() if match[0] not in head_ids]
+        return matches[offset:offset + limit]
+
+
+def search_recipes(terms, ingredients, limit, offset, user) -> list[tuple[int, float | None]]:
+    """
+    [(recipe id, score)] of one page of the recipes the user can read, best first. Score is None for matches listed
+    newest first - ingredient only searches, and on PostgreSQL the matches outside of the title and ingredients.
+    `terms` as returned by tokenize(), `ingredients` lowercase.
+    """
+    if connection.vendor == "postgresql":
+        return postgres_search(terms, ingredients, limit, offset, user)
+
+    hidden = set(Recipe.objects.filter(is_public=False).exclude(readable_filter(user)).values_list("id", flat=True))
+    return search_index.search(terms, ingredients, limit, offset, hidden)
+
+
+# ---------- WRITES ----------
+
+def reindex_recipes(recipe_ids, batch_size=1000):
+    """Brings the search data of the recipes up to date (deleted ones are gone with them). Call after commit."""
+    recipe_ids = list(recipe_ids)
+    if connection.vendor != "postgresql":
+        search_index.refresh(recipe_ids)
+        return
+
+    with connection.cursor() as cursor:
+        for start in range(0, len(recipe_ids), batch_size):
+            cursor.execute(SEARCH_DOCUMENT_SQL, [recipe_ids[start:start + batch_size]])
+
+
+# Ids changed by the current transaction of the thread - one reindex per transaction, not per saved row
+pending = threading.local()
+
+
+def flush_pending():
+    recipe_ids = getattr(pending, "recipe_ids", set())
+    category_ids = getattr(pending, "category_ids", set())
+    pending.recipe_ids, pending.category_ids = set(), set()
+
+    if category_ids:
+        # gone categories were cascaded from their recipe, which is pending itself
+        recipe_ids.update(
+            IngredientCategory.objects.filter(id__in=category_ids).values_list("recipe_id", flat=True)
+        )
+    if recipe_ids:
+        reindex_recipes(recipe_ids)
+
+
+def schedule_reindex(recipe_id=None, category_id=None):
+    """Reindexes the recipe once the transaction commits (right away in autocommit)"""
+    if recipe_id is not None:
+        pending.__dict__.setdefault("recipe_ids", set()).add(recipe_id)
+    if category_id is not None:
+        pending.__dict__.setdefault("category_ids", set()).add(category_id)
+    # every call registers - callbacks of a rolled back savepoint are dropped, the first one to run takes them all
+    transaction.on_commit(flush_pending)
+
+
+def recipe_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and update_fields <= UNINDEXED_FIELDS:
+        return
+    schedule_reindex(recipe_id=instance.pk)
+
+
+def child_changed(sender, instance, **kwargs):
+    schedule_reindex(recipe_id=instance.recipe_id)
+
+
+def item_changed(sender, instance, **kwargs):
+    schedule_reindex(category_id=instance.category_id)
+
+
+post_save.connect(recipe_changed, sender=Recipe)
+post_delete.connect(recipe_changed, sender=Recipe)
+for model in (IngredientCategory, Step):
+    post_save.connect(child_changed, sender=model)
+    post_delete.connect(child_changed, sender=model)
+post_save.connect(item_changed, sender=IngredientItem)
+post_delete.connect(item_changed, sender=IngredientItem)
@@ -0,0 +1,210 @@
+import heapq
+import logging
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+from django.core.cache import cache
+from config.cache_helpers import bump_counter
+from .models import IngredientItem, Recipe, Step
+
+logger = logging.getLogger(__name__)
+
+# In-process inverted index of recipes for backends without full-text search (SQLite in development).
+# One per worker process, built from the DB on the first search. Writes update the index of the writing process
+# and bump a generation counter in the cache - a process that finds the counter moved rebuilds its index.
+# Shared between processes only if CACHES points to a shared backend, like the other counters.
+#
+# A word of a recipe is in the tier of the best field it comes from: title, ingredients, description, steps -
+# PostgreSQL's setweight() A, B, C and D, weighted like ts_rank does (1.0, 0.4, 0.2, 0.1, in tenths here).
+# The score of a recipe is the sum, over the query words, of the weight of its best word starting with the query word.
+# Postings are sets per tier, so matching and ranking are set operations - no Python loop over the matching recipes.
+
+GENERATION_KEY = "recipes:search_generation"
+
+TITLE, INGREDIENT, DESCRIPTION, STEP = range(4)
+TIER_WEIGHTS = (10, 4, 2, 1)
+
+CHUNK_SIZE = 2000
+
+WORD_RE = re.compile(r"[^\W_]+") # what PostgreSQL's parser takes for words, "_" separates them too
+
+
+def tokenize(text) -> list[str]:
+    return WORD_RE.findall(text.lower())
+
+
+def load_documents(recipe_ids=None) -> dict[int, tuple[dict, set]]:
+    """recipe id -> ({word: tier}, {ingredient name}) of the recipes, all of them if `recipe_ids` is None"""
+    recipes = Recipe.objects.all()
+    steps = Step.objects.all()
+    items = IngredientItem.objects.all()
+    if recipe_ids is not None:
+        recipes = recipes.filter(id__in=recipe_ids)
+        steps = steps.filter(recipe_id__in=recipe_ids)
+        items = items.filter(category__recipe_id__in=recipe_ids)
+
+    documents = {}
+
+    def add(recipe_id, text, tier):
+        words = documents[recipe_id][0]
+        for word in tokenize(text):
+            if words.get(word, tier) >= tier:
+                words[word] = tier
+
+    for recipe_id, title, description in recipes.values_list("id", "title", "description").iterator(CHUNK_SIZE):
+        documents[recipe_id] = ({}, set())
+        add(recipe_id, title, TITLE)
+        add(recipe_id, description, DESCRIPTION)
+
+    for recipe_id, title, description in steps.values_list("recipe_id", "title", "description").iterator(CHUNK_SIZE):
+        if recipe_id in documents: # created after the recipes were read
+            add(recipe_id, f"{title} {description}", STEP)
+
+    for recipe_id, name in items.values_list("category__recipe_id", "name").iterator(CHUNK_SIZE):
+        if recipe_id in documents:
+            add(recipe_id, name, INGREDIENT)
+            documents[recipe_id][1].add(name.lower())
+
+    return documents
+
+
+class InvertedIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.generation = None # of the data in the index, None = not built
+        self.reset()
+
+    def reset(self):
+        self.postings: dict[str, tuple[set[int], ...]] = {} # word -> recipe ids per tier
+        self.words: list[str] = [] # sorted, for prefix lookups
+        self.recipe_words: dict[int, tuple[tuple[str, int], ...]] = {}
+        self.names: dict[str, set[int]] = defaultdict(set) # ingredient name -> recipe ids
+        self.recipe_names: dict[int, tuple[str, ...]] = {}
+
+    # ---------- WRITES (lock held) ----------
+
+    def add(self, recipe_id, words: dict, names: set, keep_sorted=True):
+        for word, tier in words.items():
+            tiers = self.postings.get(word)
+            if tiers is None:
+                tiers = self.postings[word] = (set(), set(), set(), set())
+                if keep_sorted:
+                    insort(self.words, word)
+            tiers[tier].add(recipe_id)
+        for name in names:
+            self.names[name].add(recipe_id)
+        self.recipe_words[recipe_id] = tuple(words.items())
+        self.recipe_names[recipe_id] = tuple(names)
+
+    def remove(self, recipe_id):
+        for word, tier in self.recipe_words.pop(recipe_id, ()):
+            tiers = self.postings[word]
+            tiers[tier].discard(recipe_id)
+            if not any(tiers):
+                del self.postings[word]
+                del self.words[bisect_left(self.words, word)]
+        for name in self.recipe_names.pop(recipe_id, ()):
+            recipe_ids = self.names[name]
+            recipe_ids.discard(recipe_id)
+            if not recipe_ids:
+                del self.names[name]
+
+    def rebuild(self):
+        generation = cache.get(GENERATION_KEY, 0) # before reading - writes committed meanwhile rebuild again
+        documents = load_documents()
+        with self.lock:
+            self.reset()
+            for recipe_id, (words, names) in documents.items():
+                self.add(recipe_id, words, names, keep_sorted=False)
+            self.words = sorted(self.postings)
+            self.generation = generation
+        logger.info(f"Recipe search index built: {len(documents)} recipes, {len(self.words)} words")
+
+    def refresh(self, recipe_ids):
+        """Re-reads the recipes into the index (if built), tells the other processes to rebuild theirs"""
+        if self.generation is not None:
+            documents = load_documents(recipe_ids)
+            with self.lock:
+                for recipe_id in recipe_ids:
+                    self.remove(recipe_id)
+                    if recipe_id in documents:
+                        self.add(recipe_id, *documents[recipe_id])
+
+        generation = bump_counter(GENERATION_KEY)
+        with self.lock:
+            # not built - stays so, a process that only writes (bulk import) never loads the documents
+            if self.generation is not None:
+                # another process wrote in between - its changes are not in this index
+                self.generation = generation if self.generation == generation - 1 else -1
+
+    # ---------- READS ----------
+
+    def ensure_current(self):
+        if self.generation != cache.get(GENERATION_KEY, 0):
+            self.rebuild()
+
+    def match_prefix(self, prefix) -> list[set[int]]:
+        """Recipe ids per tier of their best word starting with `prefix`"""
+        matched = [set(), set(), set(), set()]
+        for position in range(bisect_left(self.words, prefix), len(self.words)):
+            word = self.words[position]
+            if not word.startswith(prefix):
+                break
+            for tier, recipe_ids in enumerate(self.postings[word]):
+                matched[tier] |= recipe_ids
+
+        better = set()
+        for recipe_ids in matched:
+            recipe_ids -= better
+            better |= recipe_ids
+        return matched
+
+    def match_ingredient(self, substring) -> set[int]:
+        matches = set()
+        for name, recipe_ids in self.names.items():
+            if substring in name:
+                matches |= recipe_ids
+        return matches
+
+    def search(self, terms, ingredients, limit, offset, hidden=frozenset()) -> list[tuple[int, float | None]]:
+        """See recipes.search.search_recipes() - `hidden` ids of the recipes left out"""
+        self.ensure_current()
+        with self.lock:
+            term_tiers = [self.match_prefix(term) for term in terms]
+
+            candidates = None
+            for recipe_ids in [set().union(*tiers) for tiers in term_tiers] + [
+                self.match_ingredient(substring) for substring in ingredients
+            ]:
+                candidates = recipe_ids if candidates is None else candidates & recipe_ids
+                if not candidates:
+                    return []
+        candidates = candidates - hidden
+        if not candidates:
+            return []
+
+        if not terms:
+            newest = heapq.nlargest(offset + limit, candidates)
+            return [(recipe_id, None) for recipe_id in newest[offset:]]
+
+        # score -> recipe ids, one term at a time - the scores are sums of the tier weights, a handful of values
+        by_score = {0: candidates}
+        for tiers in term_tiers:
+            next_by_score = defaultdict(set)
+            for score, recipe_ids in by_score.items():
+                for weight, tier_ids in zip(TIER_WEIGHTS, tiers):
+                    if matched := recipe_ids & tier_ids:
+                        next_by_score[score + weight] |= matched
+            by_score = next_by_score
+
+        page, wanted = [], offset + limit
+        for score in sorted(by_score, reverse=True):
+            page.extend((recipe_id, score / 10) for recipe_id in heapq.nlargest(wanted - len(page), by_score[score]))
+            if len(page) >= wanted:
+                break
+        return page[offset:]
+
+
+search_index = InvertedIndex()
@@ -0,0 +1,144 @@
+from django.conf import settings
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from config.error_helpers import api_err_dict, remove_empty_list_fields
+from config.response_codes import EC
+from .search_index import tokenize
+from .summaries import decode_cursor
+
+search_settings = settings.RECIPE_SEARCH
+
+MAX_ID = 2**63 - 1 # BigAutoField
+
+
+def parse_int(value, default, min_value, max_value):
+    """(int, errors) of a query param or JSON value, `default` if missing"""
+    if value in (None, ""):
+        return default, []
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        number = None
+    if number is None or not min_value <= number <= max_value:
+        return None, [api_err_dict(EC.Validation.INVALID_NUMBER, min=min_value, max=max_value)]
+    return number, []
+
+
+class RecipeSearchSerializer(serializers.Serializer):
+    """Query params of the search: q (words), ingredients (comma separated), limit, offset"""
+
+    q = serializers.CharField(required=False, allow_blank=True, trim_whitespace=False)
+    ingredients = serializers.CharField(required=False, allow_blank=True)
+    limit = serializers.CharField(required=False, allow_blank=True)
+    offset = serializers.CharField(required=False, allow_blank=True)
+
+    def validate(self, attrs):
+        errors = {}
+
+        terms = list(dict.fromkeys(tokenize(attrs.get("q", "")))) # unique, in order
+        ingredients = list(dict.fromkeys(
+            name for name in (part.strip().lower() for part in attrs.get("ingredients", "").split(",")) if name
+        ))
+
+        # ---------- REQUIRED ----------
+        if not terms and not ingredients:
+            errors["q"] = [api_err_dict(EC.Validation.REQUIRED)]
+
+        # ---------- TERMS ----------
+        max_terms = search_settings["MAX_TERMS"]
+        if len(terms) + len(ingredients) > max_terms:
+            errors.setdefault("q", []).append(api_err_dict(EC.Validation.TOO_MANY_TERMS, max=max_terms))
+
+        min_len = search_settings["MIN_INGREDIENT_LEN"]
+        if any(len(name) < min_len for name in ingredients):
+            errors["ingredients"] = [api_err_dict(EC.Validation.INGREDIENT_TOO_SHORT, min=min_len)]
+
+        # ---------- PAGE ----------
+        limit, errors["limit"] = parse_int(
+            attrs.get("limit"), search_settings["DEFAULT_LIMIT"], 1, search_settings["MAX_LIMIT"]
+        )
+        offset, errors["offset"] = parse_int(attrs.get("offset"), 0, 0, search_settings["MAX_OFFSET"])
+
+        errors = remove_empty_list_fields(errors)
+        if errors:
+            raise ValidationError(errors)
+
+        return {"terms": terms, "ingredients": ingredients, "limit": limit, "offset": offset}
+
+
+class RecipeFeedSerializer(serializers.Serializer):
+    """Query params of the feed: cursor (nextCursor of the previous page), limit"""
+
+    cursor = serializers.CharField(required=False, allow_blank=True)
+    limit = serializers.CharField(required=False, allow_blank=True)
+
+    def validate(self, attrs):
+        errors = {}
+
+        after = None
+        if attrs.get("cursor"):
+            after = decode_cursor(attrs["cursor"])
+            if after is None:
+                errors["cursor"] = [api_err_dict(EC.Validation.INVALID_CURSOR)]
+
+        feed_settings = settings.RECIPE_FEED
+        limit, errors["limit"] = parse_int(
+            attrs.get("limit"), feed_settings["DEFAULT_LIMIT"], 1, feed_settings["MAX_LIMIT"]
+        )
+
+        errors = remove_empty_list_fields(errors)
+        if errors:
+            raise ValidationError(errors)
+
+        return {"after": after, "limit": limit}
+
+
+class ShoppingListSerializer(serializers.Serializer):
+    """Body of the shopping list: {"recipes": [{"id": recipe id, "servings": servings to cook}]}"""
+
+    recipes = serializers.JSONField(required=False, allow_null=True)
+
+    def validate(self, attrs):
+        recipes = attrs.get("recipes")
+        max_recipes = settings.SHOPPING_LIST["MAX_RECIPES"]
+        max_servings = settings.SHOPPING_LIST["MAX_SERVINGS"]
+
+        if not recipes:
+            raise ValidationError({"recipes": [api_err_dict(EC.Validation.REQUIRED)]})
+        if not isinstance(recipes, list) or not all(isinstance(entry, dict) for entry in recipes):
+            raise ValidationError({"recipes": [api_err_dict(EC.Validation.INVALID_LIST)]})
+        if len(recipes) > max_recipes:
+            raise ValidationError({"recipes": [api_err_dict(EC.Validation.TOO_MANY_RECIPES, max=max_recipes)]})
+
+        # the same recipe twice in a plan is cooked twice
+        servings, errors = {}, []
+        for position, entry in enumerate(recipes):
+            recipe_id, _ = parse_int(entry.get("id"), None, 1, MAX_ID)
+            count, _ = parse_int(entry.get("servings"), None, 1, max_servings)
+            if recipe_id is None:
+                errors.append(api_err_dict(EC.Validation.RECIPE_NOT_FOUND, position=position))
+            elif count is None:
+                errors.append(api_err_dict(EC.Validation.INVALID_NUMBER, position=position, min=1, max=max_servings))
+            else:
+                servings[recipe_id] = servings.get(recipe_id, 0) + count
+
+        if errors:
+            raise ValidationError({"recipes": errors})
+
+        return {"servings": servings}
+
+
+class RecipeVoteSerializer(serializers.Serializer):
+    """Body of a vote: {"value": MIN_VALUE..MAX_VALUE}"""
+
+    value = serializers.JSONField(required=False, allow_null=True)
+
+    def validate(self, attrs):
+        min_value, max_value = settings.RECIPE_RATING["MIN_VALUE"], settings.RECIPE_RATING["MAX_VALUE"]
+        value, errors = parse_int(attrs.get("value"), None, min_value, max_value)
+        if value is None and not errors:
+            errors = [api_err_dict(EC.Validation.REQUIRED)]
+        if errors:
+            raise ValidationError({"value": errors})
+
+        return {"value": value}
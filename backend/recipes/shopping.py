@@ -0,0 +1,118 @@
+import operator
+from array import array
+
+from .models import Recipe
+
+# Shopping list of a meal plan - the ingredient items of many recipes, each recipe scaled from its base servings
+# to the servings asked for, amounts converted to one base unit per dimension and items of the same name merged.
+#
+# Items are handled as columns (recipe ids, names, amounts, units): units and names are resolved once per distinct
+# value, amounts scaled and converted as one array of doubles, summed into an array of totals indexed by the slot
+# of (name, base unit). The only loop per item is that sum - no per item dicts, tuples or objects.
+
+# Unit as typed (lowercase, no trailing ".") -> (base unit, factor to it). Other units merge only with the same unit.
+UNITS = {
+    # mass -> g
+    "g": ("g", 1.0), "gram": ("g", 1.0), "grams": ("g", 1.0), "gr": ("g", 1.0),
+    "kg": ("g", 1000.0), "kilogram": ("g", 1000.0), "kilograms": ("g", 1000.0),
+    "mg": ("g", 0.001),
+    "dag": ("g", 10.0), "dkg": ("g", 10.0),
+    "oz": ("g", 28.349523125), "ounce": ("g", 28.349523125), "ounces": ("g", 28.349523125),
+    "lb": ("g", 453.59237), "lbs": ("g", 453.59237), "pound": ("g", 453.59237), "pounds": ("g", 453.59237),
+    # volume -> ml
+    "ml": ("ml", 1.0), "cl": ("ml", 10.0), "dl": ("ml", 100.0),
+    "l": ("ml", 1000.0), "litre": ("ml", 1000.0), "liter": ("ml", 1000.0), "litres": ("ml", 1000.0),
+    "liters": ("ml", 1000.0),
+    "tsp": ("ml", 5.0), "teaspoon": ("ml", 5.0), "teaspoons": ("ml", 5.0), "łyżeczka": ("ml", 5.0),
+    "łyżeczki": ("ml", 5.0), "łyżeczek": ("ml", 5.0),
+    "tbsp": ("ml", 15.0), "tablespoon": ("ml", 15.0), "tablespoons": ("ml", 15.0), "łyżka": ("ml", 15.0),
+    "łyżki": ("ml", 15.0), "łyżek": ("ml", 15.0),
+    "cup": ("ml", 240.0), "cups": ("ml", 240.0), "szklanka": ("ml", 250.0), "szklanki": ("ml", 250.0),
+    "szklanek": ("ml", 250.0),
+    "fl oz": ("ml", 29.5735295625), "pint": ("ml", 473.176473), "pints": ("ml", 473.176473),
+    # count -> no unit
+    "": ("", 1.0), "pc": ("", 1.0), "pcs": ("", 1.0), "piece": ("", 1.0), "pieces": ("", 1.0),
+    "szt": ("", 1.0), "x": ("", 1.0),
+}
+
+# Base unit -> (larger unit, factor) a total is shown in once it reaches one of them
+DISPLAY_UNITS = {"g": ("kg", 1000.0), "ml": ("l", 1000.0)}
+
+AMOUNT_DIGITS = 2
+
+
+def normalize_unit(unit) -> tuple[str, float]:
+    key = unit.strip().lower().rstrip(".")
+    return UNITS.get(key, (key, 1.0))
+
+
+def merge_items(recipe_ids, names, amounts, units, scales) -> list[dict]:
+    """
+    Shopping list entries [{name, amount, unit}] sorted by name, of items given as columns
+    (item i = recipe_ids[i], names[i], amounts[i], units[i]). `scales` - {recipe id: factor of its amounts}.
+    """
+    # ---------- DISTINCT VALUES ----------
+    conversions = {unit: normalize_unit(unit) for unit in set(units)}
+    base_units = sorted({base_unit for base_unit, _ in conversions.values()})
+    factors = {unit: factor for unit, (_, factor) in conversions.items()}
+
+    # slot of an item = name key id * len(base_units) + base unit id - ids in sorted order, so are the slots
+    spellings = dict.fromkeys(names) # distinct, in order of first appearance
+    name_keys = {name: name.strip().lower() for name in spellings}
+    sorted_keys = sorted(set(name_keys.values()))
+    key_ids = {key: i for i, key in enumerate(sorted_keys)}
+    name_codes = {name: key_ids[key] * len(base_units) for name, key in name_keys.items()}
+    unit_codes = {unit: base_units.index(base_unit) for unit, (base_unit, _) in conversions.items()}
+
+    # the spelling of the first item is the one shown
+    shown_names = {}
+    for name, key in name_keys.items():
+        shown_names.setdefault(key_ids[key], name.strip())
+
+    # ---------- COLUMNS ----------
+    # amount * servings scale * unit factor and the slot of every item, map() only - no Python level loop
+    scaled = array("d", map(
+        operator.mul,
+        amounts,
+        map(operator.mul, map(scales.__getitem__, recipe_ids), map(factors.__getitem__, units)),
+    ))
+    slots = array("l", map(operator.add, map(name_codes.__getitem__, names), map(unit_codes.__getitem__, units)))
+
+    totals = array("d", [0.0]) * (len(sorted_keys) * len(base_units))
+    for slot, amount in zip(slots, scaled):
+        totals[slot] += amount
+
+    # ---------- ENTRIES ----------
+    entries = []
+    for slot in sorted(set(slots)):
+        key_id, base_unit_id = divmod(slot, len(base_units))
+        amount, unit = totals[slot], base_units[base_unit_id]
+        if unit in DISPLAY_UNITS and amount >= DISPLAY_UNITS[unit][1]:
+            unit, factor = DISPLAY_UNITS[unit]
+            amount /= factor
+        entries.append({"name": shown_names[key_id], "amount": round(amount, AMOUNT_DIGITS), "unit": unit})
+    return entries
+
+
+def shopping_list(servings) -> tuple[list[dict], list[int]]:
+    """
+    (entries, ids of missing recipes) of a meal plan - `servings` {recipe id: servings to cook}. One query.
+    """
+    rows = list(Recipe.objects.filter(id__in=servings).values_list(
+        "id",
+        "base_servings",
+        "ingredient_categories__items__name",
+        "ingredient_categories__items__amount",
+        "ingredient_categories__items__unit",
+    ))
+    recipe_ids, base_servings, names, amounts, units = zip(*rows) if rows else [()] * 5
+
+    found = dict(zip(recipe_ids, base_servings))
+    missing = [recipe_id for recipe_id in servings if recipe_id not in found]
+    if missing:
+        return [], missing
+
+    scales = {recipe_id: servings[recipe_id] / (base or 1) for recipe_id, base in found.items()}
+    # LEFT JOINs - a recipe or category without items is a row of None item fields
+    items = [item for item in zip(recipe_ids, names, amounts, units) if item[1] is not None]
+    return merge_items(*(zip(*items) if items else [()] * 4), scales), []
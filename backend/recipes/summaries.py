@@ -0,0 +1,123 @@
+import base64
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Q
+from django.db.models.signals import post_save
+from .access import readable_filter
+from .documents import format_timestamp, rating
+from .images import thumbnail_url
+from .models import Recipe, RecipeImage, RecipeSummary
+
+# RecipeSummary - the card of every recipe, the only table the feed reads. Pages are keyset paginated on
+# (updated_at, recipe_id) DESC with the index of the same order - page N costs what page 1 does, no OFFSET.
+#
+# The rows are copied from the recipe and its author by one upsert (refresh_summaries), in the transaction of the
+# write: Recipe.save() (signal below), votes (recipes.ratings), username changes (signal below, one UPDATE).
+# Writes bypassing signals (bulk_create, QuerySet.update(), raw SQL) call refresh_summaries() themselves.
+# The thumbnail is the key of the recipe's image once its variants are rendered (recipes.images refreshes the
+# summaries of its recipes then), "" before.
+
+BATCH_SIZE = 500 # ids per upsert, under SQLite's limit of query parameters
+
+# Upserts the summaries of the recipes - {ids} is a list of placeholders
+SUMMARY_SQL = f"""
+INSERT INTO {RecipeSummary._meta.db_table}
+    (recipe_id, author_id, author_name, title, base_servings, is_public, rating_sum, rating_count, thumbnail,
+    updated_at)
+SELECT r.id, r.author_id, u.username, r.title, r.base_servings, r.is_public, r.rating_sum, r.rating_count,
+    COALESCE(i.key, ''), r.updated_at
+FROM {Recipe._meta.db_table} r
+JOIN {get_user_model()._meta.db_table} u ON u.id = r.author_id
+LEFT JOIN {RecipeImage._meta.db_table} i ON i.key = r.image_id AND i.status = '{RecipeImage.Status.READY}'
+WHERE r.id IN ({{ids}})
+ON CONFLICT (recipe_id) DO UPDATE SET
+    author_id = excluded.author_id,
+    author_name = excluded.author_name,
+    title = excluded.title,
+    base_servings = excluded.base_servings,
+    is_public = excluded.is_public,
+    rating_sum = excluded.rating_sum,
+    rating_count = excluded.rating_count,
+    thumbnail = excluded.thumbnail,
+    updated_at = excluded.updated_at
+"""
+
+FEED_FIELDS = (
+    "recipe_id", "author_name", "title", "base_servings", "rating_sum", "rating_count", "thumbnail", "updated_at",
+)
+
+
+def refresh_summaries(recipe_ids):
+    """Copies the recipes into their summaries (deleted ones are gone with them)"""
+    recipe_ids = list(recipe_ids)
+    with connection.cursor() as cursor:
+        for start in range(0, len(recipe_ids), BATCH_SIZE):
+            batch = recipe_ids[start:start + BATCH_SIZE]
+            cursor.execute(SUMMARY_SQL.format(ids=", ".join(["%s"] * len(batch))), batch)
+
+
+# ---------- FEED ----------
+
+def encode_cursor(row) -> str:
+    key = f"{row['updated_at'].isoformat()}|{row['recipe_id']}"
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+
+def decode_cursor(cursor) -> tuple[datetime, int] | None:
+    """(updated_at, recipe id) of the last recipe of the previous page, None if the cursor is not one of ours"""
+    try:
+        updated_at, recipe_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        updated_at, recipe_id = datetime.fromisoformat(updated_at), int(recipe_id)
+    except ValueError: # base64, utf-8, timestamp or id
+        return None
+    return (updated_at, recipe_id) if updated_at.tzinfo is not None else None
+
+
+def feed_page(after, limit, user) -> list[dict]:
+    """
+    Summary rows of one page the user can read, newest first - `after` (updated_at, recipe id) of the previous
+    page's last row
+    """
+    rows = RecipeSummary.objects.filter(readable_filter(user, "recipe_id")).order_by("-updated_at", "-recipe_id")
+    if after is not None:
+        updated_at, recipe_id = after
+        rows = rows.filter(
+            Q(updated_at__lt=updated_at) | Q(updated_at=updated_at, recipe_id__lt=recipe_id),
+            updated_at__lte=updated_at, # the index range - the OR alone is a filter
+        )
+    return list(rows.values(*FEED_FIELDS)[:limit])
+
+
+def summary_card(row, voted) -> dict:
+    """Recipe card of the feed - `voted` ids of the recipes the requester has voted for"""
+    return {
+        "id": str(row["recipe_id"]),
+        "title": row["title"],
+        "thumbnail": thumbnail_url(row["thumbnail"]),
+        "details": {
+            "author": row["author_name"],
+            "baseServings": row["base_servings"],
+            "lastUpdated": format_timestamp(row["updated_at"]),
+            "rating": rating(row["rating_sum"], row["rating_count"], row["recipe_id"] in voted),
+        },
+    }
+
+
+# ---------- SIGNALS ----------
+
+def recipe_saved(sender, instance, **kwargs):
+    refresh_summaries([instance.pk])
+
+
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and "username" not in update_fields):
+        return
+    RecipeSummary.objects.filter(author_id=instance.pk).exclude(author_name=instance.username).update(
+        author_name=instance.username
+    )
+
+
+post_save.connect(recipe_saved, sender=Recipe)
+post_save.connect(user_saved, sender=get_user_model())
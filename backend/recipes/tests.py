@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from .models import IngredientCategory, IngredientItem, Recipe, RecipeShare, RecipeVote, Step
+
+User = get_user_model()
+
+
+# Queries of the recipe detail - the access check, the document and requesterVoted are answered by the document's
+# query (recipes.documents): one on PostgreSQL, two on the other backends (categories + items on their own).
+class RecipeDetailQueriesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author", email="author@example.com", password="pw1234")
+        cls.reader = User.objects.create_user(username="reader", email="reader@example.com", password="pw1234")
+        cls.public = cls.create_recipe("Public soup", is_public=True)
+        cls.private = cls.create_recipe("Private soup", is_public=False)
+        RecipeVote.objects.create(recipe=cls.public, user=cls.author, value=5)
+
+    @classmethod
+    def create_recipe(cls, title, is_public) -> Recipe:
+        recipe = Recipe.objects.create(author=cls.author, title=title, base_servings=2, is_public=is_public)
+        for c in range(2):
+            category = IngredientCategory.objects.create(recipe=recipe, position=c, title=f"Part {c}")
+            IngredientItem.objects.bulk_create([
+                IngredientItem(category=category, position=i, name=f"ingredient {c}.{i}", amount=i + 1, unit="g")
+                for i in range(3)
+            ])
+        Step.objects.bulk_create([Step(recipe=recipe, position=s, description=f"Step {s}") for s in range(3)])
+        return recipe
+
+    @property
+    def detail_queries(self):
+        return 1 if connection.vendor == "postgresql" else 2
+
+    def get_detail(self, recipe, user=None):
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(user)}"} if user else {}
+        url = f"/api/v1/recipes/{recipe.pk}/"
+        if user:
+            self.client.get(url, **headers) # the user row is cached from then on (CachedJWTAuthentication)
+        with self.assertNumQueries(self.detail_queries):
+            return self.client.get(url, **headers)
+
+    def test_owner(self):
+        response = self.get_detail(self.public, self.author)
+        self.assertEqual(response.status_code, 200)
+        recipe = response.json()["payload"]["recipe"]
+        self.assertEqual([len(category["items"]) for category in recipe["ingredients"]], [3, 3])
+        self.assertEqual(len(recipe["steps"]), 3)
+        self.assertTrue(recipe["details"]["rating"]["requesterVoted"])
+
+    def test_owner_private(self):
+        response = self.get_detail(self.private, self.author)
+        self.assertEqual(response.status_code, 200)
+
+    def test_anonymous_public(self):
+        response = self.get_detail(self.public)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.json()["payload"]["recipe"]["details"]["rating"]["requesterVoted"])
+
+    def test_anonymous_private(self):
+        response = self.get_detail(self.private)
+        self.assertEqual(response.status_code, 404)
+
+    def test_reader_private(self):
+        response = self.get_detail(self.private, self.reader)
+        self.assertEqual(response.status_code, 404)
+
+    def test_reader_shared(self):
+        RecipeShare.objects.create(recipe=self.private, user=self.reader)
+        response = self.get_detail(self.private, self.reader)
+        self.assertEqual(response.status_code, 200)
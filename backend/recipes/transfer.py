@@ -0,0 +1,333 @@
+import json
+import math
+from itertools import batched, groupby
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from config.error_helpers import api_err_dict
+from config.renderers import dumps, orjson
+from config.response_codes import EC
+from .documents import format_timestamp
+from .models import IngredientCategory, IngredientItem, Recipe, Step
+from .search import reindex_recipes
+from .summaries import refresh_summaries
+
+# Bulk transfer of recipes as NDJSON - one Recipe document (frontend/src/types/recipe.ts) per line, list order is
+# the position. Both directions hold a bounded number of recipes in memory, whatever the size of the stream:
+#   export - recipes read in id order through a server-side cursor (iterator(chunk_size)), the ingredients and steps
+#            of each chunk in two more queries, lines yielded as they are built. Under ASGI chunks are read by id
+#            through an async iterator (aexport_lines) - Django would buffer a sync one.
+#   import - read line by line (a line over MAX_LINE_BYTES is skipped, not buffered), validated, valid recipes
+#            written BATCH_SIZE at a time with bulk_create, one transaction per batch. Invalid lines are reported
+#            with the EC codes of the API and skipped - the rest of the stream is imported.
+# bulk_create sends no signals: summaries are refreshed in the batch's transaction, search data after its commit.
+#
+# Exported lines carry id, author and lastUpdated for reference - import ignores them (and ratings, which are
+# votes of other users), the recipes are new ones of the importing user. isPublic is kept, shares are not.
+
+transfer_settings = settings.RECIPE_TRANSFER
+
+loads = orjson.loads if orjson is not None else json.loads
+
+MAX_POSITION = 32767 # PositiveSmallIntegerField
+MAX_SERVINGS = 32767
+ROWS_PER_INSERT = 2000 # rows of one INSERT, under the query parameter limits of the backends
+
+
+# ---------- EXPORT ----------
+
+def chunk_ingredients(recipe_ids) -> dict[int, list[dict]]:
+    """recipe id -> ingredient categories with their items, of a chunk of recipes - one query"""
+    rows = (
+        IngredientCategory.objects.filter(recipe_id__in=recipe_ids)
+        .order_by("recipe_id", "position", "items__position")
+        .values_list(
+            "recipe_id", "id", "title", "items__name", "items__amount", "items__unit", "items__notes",
+        )
+    )
+    ingredients = {}
+    # LEFT JOIN - an empty category is one row of None item fields
+    for (recipe_id, _, title), items in groupby(rows, key=lambda row: row[:3]):
+        ingredients.setdefault(recipe_id, []).append({
+            "title": title,
+            "items": [
+                {"name": name, "amount": amount, "unit": unit, "notes": notes}
+                for _, _, _, name, amount, unit, notes in items if name is not None
+            ],
+        })
+    return ingredients
+
+
+def chunk_steps(recipe_ids) -> dict[int, list[dict]]:
+    """recipe id -> steps, of a chunk of recipes - one query"""
+    rows = (
+        Step.objects.filter(recipe_id__in=recipe_ids)
+        .order_by("recipe_id", "position")
+        .values_list("recipe_id", "title", "description")
+    )
+    steps = {}
+    for recipe_id, title, description in rows:
+        # "" title is left out, like in the detail document
+        steps.setdefault(recipe_id, []).append(
+            {"title": title, "description": description} if title else {"description": description}
+        )
+    return steps
+
+
+def export_rows(recipes):
+    return recipes.order_by("id").values_list(
+        "id", "title", "description", "base_servings", "is_public", "updated_at", "author__username",
+    )
+
+
+def chunk_lines(chunk) -> list[bytes]:
+    """NDJSON lines of a chunk of export_rows() - two queries"""
+    recipe_ids = [row[0] for row in chunk]
+    ingredients, steps = chunk_ingredients(recipe_ids), chunk_steps(recipe_ids)
+    return [
+        dumps({
+            "id": str(recipe_id),
+            "title": title,
+            "description": description,
+            "details": {
+                "author": author,
+                "baseServings": base_servings,
+                "isPublic": is_public,
+                "lastUpdated": format_timestamp(updated_at),
+            },
+            "ingredients": ingredients.get(recipe_id, []),
+            "steps": steps.get(recipe_id, []),
+        }) + b"\n"
+        for recipe_id, title, description, base_servings, is_public, updated_at, author in chunk
+    ]
+
+
+def export_lines(recipes, chunk_size=None):
+    """NDJSON lines (bytes) of the recipes of a Recipe queryset, in id order"""
+    chunk_size = chunk_size or transfer_settings["EXPORT_CHUNK_SIZE"]
+    for chunk in batched(export_rows(recipes).iterator(chunk_size=chunk_size), chunk_size):
+        yield from chunk_lines(chunk)
+
+
+async def aexport_lines(recipes, chunk_size=None):
+    """
+    Async version of export_lines() for ASGI - Django reads a sync iterator of a streaming response into a list
+    there. Chunks are read by id (keyset), each one in a single trip to a thread - rows, ingredients and steps.
+    """
+    chunk_size = chunk_size or transfer_settings["EXPORT_CHUNK_SIZE"]
+
+    def next_lines(after) -> tuple[list[bytes], int | None]:
+        """Lines of the chunk after the id, the id to continue after (None after the last chunk)"""
+        chunk = list(export_rows(recipes.filter(id__gt=after))[:chunk_size])
+        return chunk_lines(chunk), chunk[-1][0] if len(chunk) == chunk_size else None
+
+    after = 0
+    while after is not None:
+        lines, after = await sync_to_async(next_lines)(after)
+        for line in lines:
+            yield line
+
+
+# ---------- VALIDATION ----------
+
+def check_text(errors, path, value, max_length=None, required=False, allow_null=False):
+    """The string, None if it's missing or invalid (errors[path] set if it's not allowed to)"""
+    if value is None:
+        if required:
+            errors[path] = [api_err_dict(EC.Validation.REQUIRED)]
+        elif not allow_null:
+            return ""
+        return None
+    if not isinstance(value, str):
+        errors[path] = [api_err_dict(EC.Validation.INVALID_STRING)]
+    elif required and not value.strip():
+        errors[path] = [api_err_dict(EC.Validation.BLANK)]
+    elif max_length is not None and len(value) > max_length:
+        errors[path] = [api_err_dict(EC.Validation.TOO_LONG, max=max_length)]
+    else:
+        return value
+    return None
+
+
+def check_list(errors, path, value) -> list[dict]:
+    """The list of objects, [] if it's missing or invalid"""
+    if value is None:
+        return []
+    max_length = min(transfer_settings["MAX_PARTS"], MAX_POSITION)
+    if not isinstance(value, list):
+        errors[path] = [api_err_dict(EC.Validation.INVALID_LIST)]
+    elif len(value) > max_length:
+        errors[path] = [api_err_dict(EC.Validation.TOO_LONG, max=max_length)]
+    elif not all(isinstance(element, dict) for element in value):
+        errors[path] = [api_err_dict(EC.Validation.INVALID_OBJECT)]
+    else:
+        return value
+    return []
+
+
+def check_number(errors, path, value, minimum, maximum=None, integer=False):
+    if value is None:
+        errors[path] = [api_err_dict(EC.Validation.REQUIRED)]
+        return None
+    valid = isinstance(value, int if integer else (int, float)) and not isinstance(value, bool)
+    if valid and not integer:
+        try:
+            value = float(value) # stored as a float - the stdlib decoder gives ints of any size
+        except OverflowError:
+            value = math.inf
+        valid = math.isfinite(value)
+    if not valid or value < minimum or (maximum is not None and value > maximum):
+        params = {"min": minimum} if maximum is None else {"min": minimum, "max": maximum}
+        errors[path] = [api_err_dict(EC.Validation.INVALID_NUMBER, **params)]
+        return None
+    return value
+
+
+def parse_recipe(document) -> tuple[tuple | None, dict]:
+    """
+    ((title, description, base servings, is public, [(category title, [(name, amount, unit, notes)])],
+    [(title, description)]), errors) of a decoded line - errors {"field.path": [api_err_dict(...)]},
+    the recipe None if there are any.
+    """
+    if not isinstance(document, dict):
+        return None, {"_global": [api_err_dict(EC.Validation.INVALID_OBJECT)]}
+
+    errors = {}
+    title = check_text(
+        errors, "title", document.get("title"), Recipe._meta.get_field("title").max_length, required=True,
+    )
+    description = check_text(errors, "description", document.get("description"))
+
+    details = document.get("details")
+    base_servings, is_public = 1, True
+    if details is not None and not isinstance(details, dict):
+        errors["details"] = [api_err_dict(EC.Validation.INVALID_OBJECT)]
+    elif details is not None:
+        if details.get("baseServings") is not None:
+            base_servings = check_number(errors, "details.baseServings", details["baseServings"], 1, MAX_SERVINGS, True)
+        if details.get("isPublic") is not None:
+            is_public = details["isPublic"]
+            if not isinstance(is_public, bool):
+                errors["details.isPublic"] = [api_err_dict(EC.Validation.INVALID_BOOLEAN)]
+
+    categories = []
+    for c, category in enumerate(check_list(errors, "ingredients", document.get("ingredients"))):
+        path = f"ingredients.{c}"
+        category_title = check_text(
+            errors, f"{path}.title", category.get("title"),
+            IngredientCategory._meta.get_field("title").max_length, allow_null=True,
+        )
+        items = []
+        for i, item in enumerate(check_list(errors, f"{path}.items", category.get("items"))):
+            item_path = f"{path}.items.{i}"
+            items.append((
+                check_text(
+                    errors, f"{item_path}.name", item.get("name"),
+                    IngredientItem._meta.get_field("name").max_length, required=True,
+                ),
+                check_number(errors, f"{item_path}.amount", item.get("amount"), 0),
+                check_text(
+                    errors, f"{item_path}.unit", item.get("unit"), IngredientItem._meta.get_field("unit").max_length,
+                ),
+                check_text(errors, f"{item_path}.notes", item.get("notes"), allow_null=True),
+            ))
+        categories.append((category_title, items))
+
+    steps = [
+        (
+            check_text(errors, f"steps.{s}.title", step.get("title"), Step._meta.get_field("title").max_length),
+            check_text(errors, f"steps.{s}.description", step.get("description"), required=True),
+        )
+        for s, step in enumerate(check_list(errors, "steps", document.get("steps")))
+    ]
+
+    if errors:
+        return None, errors
+    return (title, description, base_servings, is_public, categories, steps), {}
+
+
+# ---------- IMPORT ----------
+
+def read_lines(stream, max_bytes):
+    """(line number, line) of a binary stream - line None if it's over `max_bytes` (the rest of it is skipped)"""
+    number = 0
+    while line := stream.readline(max_bytes + 1):
+        number += 1
+        if len(line) > max_bytes and not line.endswith(b"\n"):
+            while (rest := stream.readline(max_bytes + 1)) and not rest.endswith(b"\n"):
+                pass
+            line = None
+        yield number, line
+
+
+def write_batch(author, recipes) -> list[int]:
+    """Creates the parsed recipes (parse_recipe) of the author in one transaction, returns their ids"""
+    with transaction.atomic():
+        created = Recipe.objects.bulk_create([
+            Recipe(
+                author=author, title=title, description=description, base_servings=base_servings, is_public=is_public,
+            )
+            for title, description, base_servings, is_public, _, _ in recipes
+        ], batch_size=ROWS_PER_INSERT)
+        categories = IngredientCategory.objects.bulk_create([
+            IngredientCategory(recipe_id=recipe.pk, position=position, title=category_title)
+            for recipe, (_, _, _, _, recipe_categories, _) in zip(created, recipes)
+            for position, (category_title, _) in enumerate(recipe_categories)
+        ], batch_size=ROWS_PER_INSERT)
+        # categories come back in the order they were given
+        category_items = (items for _, _, _, _, recipe_categories, _ in recipes for _, items in recipe_categories)
+        IngredientItem.objects.bulk_create([
+            IngredientItem(
+                category_id=category.pk, position=position, name=name, amount=amount, unit=unit, notes=notes,
+            )
+            for category, items in zip(categories, category_items)
+            for position, (name, amount, unit, notes) in enumerate(items)
+        ], batch_size=ROWS_PER_INSERT)
+        Step.objects.bulk_create([
+            Step(recipe_id=recipe.pk, position=position, title=step_title, description=step_description)
+            for recipe, (_, _, _, _, _, recipe_steps) in zip(created, recipes)
+            for position, (step_title, step_description) in enumerate(recipe_steps)
+        ], batch_size=ROWS_PER_INSERT)
+
+        recipe_ids = [recipe.pk for recipe in created]
+        refresh_summaries(recipe_ids)
+
+    reindex_recipes(recipe_ids)
+    return recipe_ids
+
+
+def import_recipes(stream, author, on_error, batch_size=None) -> tuple[int, int]:
+    """
+    Imports the NDJSON lines of a binary stream as recipes of the author, returns (recipes imported, lines failed).
+    on_error(line number, errors) is called for every invalid line. Blank lines are skipped.
+    """
+    batch_size = batch_size or transfer_settings["IMPORT_BATCH_SIZE"]
+    max_bytes = transfer_settings["MAX_LINE_BYTES"]
+    imported = failed = 0
+    batch = []
+
+    for number, line in read_lines(stream, max_bytes):
+        if line is None:
+            errors = {"_global": [api_err_dict(EC.Validation.LINE_TOO_LONG, max=max_bytes)]}
+        elif not line.strip():
+            continue
+        else:
+            try:
+                recipe, errors = parse_recipe(loads(line))
+            except ValueError: # JSON or UTF-8
+                errors = {"_global": [api_err_dict(EC.Validation.INVALID_JSON)]}
+
+        if errors:
+            failed += 1
+            on_error(number, errors)
+            continue
+
+        batch.append(recipe)
+        if len(batch) >= batch_size:
+            imported += len(write_batch(author, batch))
+            batch = []
+
+    if batch:
+        imported += len(write_batch(author, batch))
+    return imported, failed
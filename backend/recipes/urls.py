@@ -0,0 +1,17 @@
+from django.urls import path
+from .views import (
+    RecipeDetailView, RecipeExportView, RecipeFeedView, RecipeImageFileView, RecipeImageView, RecipeImportView,
+    RecipeSearchView, RecipeVoteView, ShoppingListView,
+)
+
+urlpatterns = [
+    path("export/", RecipeExportView.as_view(), name="recipe_export"),
+    path("feed/", RecipeFeedView.as_view(), name="recipe_feed"),
+    path("images/<str:key>/<str:variant>", RecipeImageFileView.as_view(), name="recipe_image_file"),
+    path("import/", RecipeImportView.as_view(), name="recipe_import"),
+    path("search/", RecipeSearchView.as_view(), name="recipe_search"),
+    path("shopping-list/", ShoppingListView.as_view(), name="shopping_list"),
+    path("<int:pk>/", RecipeDetailView.as_view(), name="recipe_detail"),
+    path("<int:pk>/image/", RecipeImageView.as_view(), name="recipe_image"),
+    path("<int:pk>/vote/", RecipeVoteView.as_view(), name="recipe_vote"),
+]
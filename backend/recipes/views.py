@@ -0,0 +1,310 @@
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from rest_framework import status
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.permissions import AllowAny
+from rest_framework.views import APIView
+from authentication.permissions import HasObjectAccessEC, IsAuthenticatedEC
+from config.error_helpers import api_err_dict
+from config.exception_handler import LENGTH_REQUIRED_RESPONSE, extract_error_details
+from config.response_codes import ECNS, EC, SC
+from config.responses import api_response
+from .access import READ, Access, image_visibility, resolve_access
+from .documents import recipe_document, recipe_summaries
+from .images import (
+    CONTENT_TYPES, KEY_RE, image_settings, is_variant, release_render, reserve_render, store_upload, submit_render,
+    variant_path,
+)
+from .models import Recipe, RecipeImage
+from .search import search_recipes
+from .ratings import cast_vote, remove_vote, requester_voted
+from .serializers import RecipeFeedSerializer, RecipeSearchSerializer, RecipeVoteSerializer, ShoppingListSerializer
+from .shopping import shopping_list
+from .summaries import encode_cursor, feed_page, summary_card
+from .transfer import aexport_lines, export_lines, import_recipes
+
+
+class RecipeObjectView(APIView):
+    """Views of the recipe of the URL (pk) - the requester needs `required_access` to it (recipes.access)"""
+    permission_classes = [HasObjectAccessEC]
+    required_access = READ
+
+    def object_access(self, request, recipe_ids) -> dict[int, Access]:
+        return resolve_access(request, recipe_ids)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.check_object_permissions(request, kwargs["pk"])
+
+
+class RecipeDetailView(RecipeObjectView):
+    recipe = None
+
+    def object_access(self, request, recipe_ids) -> dict[int, Access]:
+        # the query of the document answers the access too - no resolve_access() query of its own
+        pk, = recipe_ids
+        self.recipe, access = recipe_document(pk, request.user)
+        return {pk: access}
+
+    def get(self, request, pk):
+        return api_response(
+            success=True,
+            code=SC.Recipes.GENERIC,
+            payload={"recipe": self.recipe},
+        )
+
+
+class RecipeSearchView(APIView):
+    """GET ?q=words&ingredients=a,b&limit=&offset= - ranked page of recipe summaries"""
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        serializer = RecipeSearchSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        # one more than asked for tells if there is a next page
+        matches = search_recipes(
+            params["terms"], params["ingredients"], params["limit"] + 1, params["offset"], request.user
+        )
+        page = matches[:params["limit"]]
+
+        recipe_ids = [recipe_id for recipe_id, _ in page]
+        results = recipe_summaries(recipe_ids, requester_voted(request.user, recipe_ids))
+        scores = dict(page)
+        for result in results:
+            result["score"] = scores[int(result["id"])]
+
+        return api_response(
+            success=True,
+            code=SC.Recipes.GENERIC,
+            payload={"results": results, "hasMore": len(matches) > params["limit"]},
+        )
+
+
+class RecipeFeedView(APIView):
+    """GET ?cursor=&limit= - recipe cards, newest first, keyset paginated"""
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        serializer = RecipeFeedSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        # one more than asked for tells if there is a next page
+        rows = feed_page(params["after"], params["limit"] + 1, request.user)
+        page = rows[:params["limit"]]
+        voted = requester_voted(request.user, [row["recipe_id"] for row in page])
+
+        return api_response(
+            success=True,
+            code=SC.Recipes.GENERIC,
+            payload={
+                "results": [summary_card(row, voted) for row in page],
+                "nextCursor": encode_cursor(page[-1]) if len(rows) > params["limit"] else None,
+            },
+        )
+
+
+class RecipeVoteView(RecipeObjectView):
+    """POST {"value"} - votes for the recipe or changes the vote, DELETE - takes the vote back"""
+    permission_classes = [IsAuthenticatedEC, HasObjectAccessEC]
+
+    def post(self, request, pk):
+        serializer = RecipeVoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        recipe_rating = cast_vote(pk, request.user, serializer.validated_data["value"])
+        if recipe_rating is None:
+            raise NotFound()
+
+        return api_response(
+            success=True,
+            code=SC.Recipes.VOTED,
+            payload={"rating": recipe_rating},
+        )
+
+    def delete(self, request, pk):
+        recipe_rating = remove_vote(pk, request.user)
+        if recipe_rating is None:
+            raise NotFound()
+
+        return api_response(
+            success=True,
+            code=SC.Recipes.VOTE_REMOVED,
+            payload={"rating": recipe_rating},
+        )
+
+
+class ShoppingListView(APIView):
+    """POST {"recipes": [{"id", "servings"}]} - ingredients of the recipes scaled, converted and merged"""
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        serializer = ShoppingListSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        servings = serializer.validated_data["servings"]
+        # recipes the requester can't read are as missing as the deleted ones (resolved as Access.NONE too)
+        unreadable = [recipe_id for recipe_id, access in resolve_access(request, servings).items() if not access]
+        items, missing = shopping_list(servings) if not unreadable else ([], unreadable)
+        if missing:
+            raise ValidationError({"recipes": [api_err_dict(EC.Validation.RECIPE_NOT_FOUND, ids=missing)]})
+
+        return api_response(
+            success=True,
+            code=SC.Recipes.GENERIC,
+            payload={"items": items},
+        )
+
+
+class RecipeExportView(APIView):
+    """GET - the requester's recipes as NDJSON, one Recipe document per line, streamed"""
+
+    def perform_content_negotiation(self, request, force=False):
+        # Accept: application/x-ndjson is not a renderer's - errors are rendered as JSON instead of a 406
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request):
+        recipes = Recipe.objects.filter(author=request.user)
+        # ASGI consumes a sync iterator whole before sending it (sync_to_async(list))
+        lines = aexport_lines(recipes) if isinstance(request._request, ASGIRequest) else export_lines(recipes)
+        response = StreamingHttpResponse(lines, content_type="application/x-ndjson")
+        response["Content-Disposition"] = 'attachment; filename="recipes.ndjson"'
+        return response
+
+
+class RecipeImportView(APIView):
+    """POST NDJSON body, one Recipe document per line - creates the recipes, reports the invalid lines"""
+
+    def post(self, request):
+        max_errors = settings.RECIPE_TRANSFER["MAX_REPORTED_ERRORS"]
+        errors = []
+
+        def on_error(line, line_errors):
+            if len(errors) < max_errors:
+                errors.append({
+                    "line": line,
+                    "errors": extract_error_details(
+                        detail=line_errors, namespace=ECNS.VALIDATION, fallback_code=EC.Validation.GENERIC
+                    ),
+                })
+
+        # Django reads no body without Content-Length (chunked upload) - refused instead of an empty import
+        if not request.META.get("CONTENT_LENGTH"):
+            return LENGTH_REQUIRED_RESPONSE()
+
+        # the body is read line by line from the request stream, never as a whole (request.data is not touched)
+        stream = request.stream
+        if stream is None:
+            raise ValidationError({"_global": [api_err_dict(EC.Validation.REQUIRED)]})
+        imported, failed = import_recipes(stream, request.user, on_error)
+
+        return api_response(
+            success=True,
+            code=SC.Recipes.IMPORTED,
+            payload={"imported": imported, "failed": failed, "errors": errors},
+        )
+
+
+class RecipeImageView(RecipeObjectView):
+    """
+    PUT image body (JPEG, PNG or WebP) - sets the recipe's image, its variants are rendered in the background
+    (202 until they are, recipes.images). DELETE - removes the image from the recipe.
+    """
+    permission_classes = [IsAuthenticatedEC, HasObjectAccessEC]
+    required_access = Access.OWNER
+
+    def put(self, request, pk):
+        max_bytes = image_settings["MAX_BYTES"]
+        if int(request.META.get("CONTENT_LENGTH") or 0) > max_bytes: # rejected before the body is read
+            raise ValidationError({"image": [api_err_dict(EC.Validation.IMAGE_TOO_LARGE, max=max_bytes)]})
+
+        # the slot is taken before the body is read - a full pool rejects the upload at no cost
+        reserve_render()
+        try:
+            # the body is streamed to disk from the request stream, never as a whole (request.data is not touched)
+            stream = request.stream
+            if stream is None:
+                raise ValidationError({"image": [api_err_dict(EC.Validation.REQUIRED)]})
+            key, width, height = store_upload(stream)
+
+            with transaction.atomic():
+                image, created = RecipeImage.objects.get_or_create(
+                    key=key, defaults={"width": width, "height": height},
+                )
+                if image.status == RecipeImage.Status.FAILED: # stored again - retried
+                    image.status = RecipeImage.Status.PENDING
+                    image.save(update_fields=["status"])
+                recipe = Recipe.objects.filter(pk=pk).first() # deleted since the access check
+                if recipe is None:
+                    raise NotFound()
+                recipe.image = image
+                recipe.save(update_fields=["image", "updated_at"])
+        except BaseException:
+            release_render()
+            raise
+
+        if image.status == RecipeImage.Status.READY: # same content uploaded before
+            release_render()
+        else:
+            submit_render(key)
+
+        return api_response(
+            success=True,
+            code=SC.Recipes.IMAGE_ACCEPTED,
+            payload={"key": key, "status": image.status},
+            http_status=status.HTTP_200_OK if image.status == RecipeImage.Status.READY else status.HTTP_202_ACCEPTED,
+        )
+
+    def delete(self, request, pk):
+        recipe = Recipe.objects.filter(pk=pk).first()
+        if recipe is None:
+            raise NotFound()
+        if recipe.image_id is not None:
+            recipe.image = None
+            recipe.save(update_fields=["image", "updated_at"])
+
+        return api_response(
+            success=True,
+            code=SC.Recipes.IMAGE_REMOVED,
+        )
+
+
+class RecipeImageFileView(APIView):
+    """
+    GET - a variant of an image (recipes.images) to requesters who can read a recipe with it, 404 to the others.
+    Browsers cache it for good (the URL names its content), shared caches for SHARED_MAX_AGE and only if a public
+    recipe has it. The web server sends the file with ACCEL_REDIRECT set - Django only checks the access.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, key, variant):
+        if not KEY_RE.fullmatch(key) or not is_variant(variant):
+            raise NotFound()
+        is_public = image_visibility(request.user, key)
+        if is_public is None:
+            raise NotFound()
+
+        etag = f'"{key}-{variant}"'
+        if is_public:
+            cache_control = f"public, max-age=31536000, s-maxage={image_settings['SHARED_MAX_AGE']}, immutable"
+        else:
+            cache_control = "private, max-age=31536000, immutable"
+        content_type = CONTENT_TYPES[variant.rsplit(".", 1)[1]]
+        if etag in request.headers.get("If-None-Match", ""):
+            response = HttpResponseNotModified()
+        elif image_settings["ACCEL_REDIRECT"]:
+            # under ASGI a FileResponse is read into memory before it's sent
+            response = HttpResponse(content_type=content_type)
+            response["X-Accel-Redirect"] = f"{image_settings['ACCEL_REDIRECT']}{key[:2]}/{key}/{variant}"
+        else:
+            try:
+                response = FileResponse(open(variant_path(key, variant), "rb"), content_type=content_type)
+            except FileNotFoundError:
+                raise NotFound()
+        response["ETag"] = etag
+        response["Cache-Control"] = cache_control
+        return response
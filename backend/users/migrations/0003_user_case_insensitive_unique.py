@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-18 19:33
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0002_user_identifier_lower_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='user',
+            name='unique_email_if_not_null',
+        ),
+        migrations.RemoveIndex(
+            model_name='user',
+            name='user_email_lower_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='user',
+            name='user_username_lower_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('username'), name='user_username_ci_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='user_email_ci_unique'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractUser
 
 class User(AbstractUser):
@@ -30,11 +31,10 @@ class User(AbstractUser):
 
     class Meta:
         constraints = [
-            models.UniqueConstraint(
-                fields=["email"],
-                condition=models.Q(email__isnull=False),
-                name="unique_email_if_not_null"
-            )
+            # Case-insensitive uniqueness, enforced by the DB - registration and username/email changes insert directly.
+            # The lower() unique indexes also serve the login identifier lookup.
+            models.UniqueConstraint(Lower("username"), name="user_username_ci_unique"),
+            models.UniqueConstraint(Lower("email"), name="user_email_ci_unique"), # NULLs don't collide
         ]
 
     def save(self, *args, **kwargs): 
@@ -1,3 +1,56 @@
-# from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+User = get_user_model()
+
+
+# Query counts of the password endpoints - login looks the user up once, by username or email (functional lower()
+# indexes, LoginSerializer.get_user_queryset). Throttles are off, their counters depend on THROTTLING["STORE"].
+@override_settings(PASSWORD_HASHING={**settings.PASSWORD_HASHING, "WORKERS": 0})
+@mock.patch.dict(settings.THROTTLING["RATES"], clear=True)
+class PasswordEndpointQueriesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="alice", email="alice@example.com", password="pw1234")
+
+    def login(self, identifier, password="pw1234"):
+        return self.client.post(
+            "/api/v1/auth/login/", {"identifier": identifier, "password": password}, content_type="application/json",
+        )
+
+    def test_login_by_username(self):
+        # user lookup, outstanding refresh token, last_login
+        with self.assertNumQueries(3):
+            response = self.login("Alice")
+        self.assertEqual(response.status_code, 200)
+
+    def test_login_by_email(self):
+        with self.assertNumQueries(3):
+            response = self.login("ALICE@example.com")
+        self.assertEqual(response.status_code, 200)
+
+    def test_login_wrong_password(self):
+        # the user lookup only
+        with self.assertNumQueries(1):
+            response = self.login("alice", password="wrong")
+        self.assertEqual(response.status_code, 401)
+
+    def test_login_unknown_user(self):
+        with self.assertNumQueries(1):
+            response = self.login("nobody")
+        self.assertEqual(response.status_code, 401)
+
+    def test_register(self):
+        # the insert checks the uniqueness of username and email (in a savepoint here, the test's transaction
+        # is open), outstanding refresh token
+        with self.assertNumQueries(4):
+            response = self.client.post(
+                "/api/v1/auth/register/",
+                {"username": "bob", "email": "bob@example.com", "password": "pw1234", "password_confirm": "pw1234"},
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(User.objects.filter(username="bob").exists())